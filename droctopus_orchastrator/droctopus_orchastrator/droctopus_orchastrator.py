@@ -1,8 +1,17 @@
 import reflex as rx
 from reflex.components.chakra import circle, vstack, hstack, container, center, text, heading, button
 import asyncio
-from bleak import BleakClient, BleakScanner
+import os
+import sys
 import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "droctopus_orchestrator"))
+from ble_discovery import disconnect_all
+from ble_writer import FrameWriter
+from command_input import CommandPlayer, LineReader, parse_line
+from framing import make_encoder
+from transport import make_transport
 
 # Global state to store motor values
 class State(rx.State):
@@ -20,6 +29,11 @@ class State(rx.State):
 SERVICE_UUID_2 = "87654321-4321-4321-4321-0987654321ba"
 CHARACTERISTIC_UUID_2 = "fedcbafe-4321-8765-4321-fedcbafedcba"
 DEVICE_NAME_2 = "ESP32_Receiver"
+frame_encoder = make_encoder("legacy")
+
+# "bleak" for the real receiver, or e.g. "sim:latency=0.01,loss=0.01" to run the UI against
+# the in-memory simulation (see droctopus_orchestrator/transport.py)
+transport = make_transport(os.environ.get("DROCTOPUS_TRANSPORT", "bleak"))
 
 # Function to run the BLE client in a separate thread
 def run_ble_client():
@@ -27,77 +41,64 @@ def run_ble_client():
 
 async def ble_client_loop():
     """Main BLE client loop."""
-    print("Scanning for ESP32_Receiver...")
+    print("Connecting to ESP32_Receiver...")
     
-    # Set global state to scanning
-    State.connection_status = "Scanning..."
+    # Set global state to connecting
+    State.connection_status = "Connecting..."
     yield
     
-    devices = await BleakScanner.discover()
-    address2 = None
+    # Last-known address first, falling back to a scan that stops once the receiver is seen
+    started = time.monotonic()
+    clients = await transport.connect_devices([DEVICE_NAME_2])
     
-    for d in devices:
-        if d.name == DEVICE_NAME_2:
-            address2 = d.address
-    
-    if not address2:
+    if DEVICE_NAME_2 not in clients:
         print("Could not find ESP32_Receiver!")
         State.connection_status = "Device not found"
         yield
         return
     
-    print(f"Found ESP32_Receiver at {address2}")
-    State.connection_status = f"Found device at {address2}"
-    yield
-    
-    client2 = BleakClient(address2)
+    client2 = clients[DEVICE_NAME_2]
+    print(f"Connected to ESP32_Receiver at {client2.address} "
+          f"({(time.monotonic() - started) * 1000:.0f} ms after startup)!")
     
     try:
-        async with client2:
-            await client2.connect()
-            print("Connected to ESP32_Receiver!")
-            State.connection_status = "Connected"
-            yield
+        State.connection_status = "Connected"
+        yield
+        
+        # The writer owns the characteristic and input is read on a thread, so waiting for
+        # the operator never stalls the event loop; piped files stream at link rate
+        writer2 = FrameWriter(client2, CHARACTERISTIC_UUID_2).start()
+        reader = LineReader(prompt="Enter 10 integers (0-255) separated by spaces, or commands: ")
+        
+        def send(values):
+            # Frame with 0xAA header and queue for ESP32_Receiver
+            framed_data = frame_encoder.encode(values)
+            writer2.submit(framed_data)
+            if reader.prompt is not None:
+                print(f"Queued: {[hex(b) for b in framed_data]}")
+            
+            # Update the UI state with the new values
+            State.update_motors(State, list(values))
+        
+        player = CommandPlayer(send, writer2.wait_for_room)
+        async for line in reader.lines():
+            try:
+                commands = parse_line(line)
+            except ValueError as e:
+                print(f"Error: {e}")
+                continue
+            await player.run(commands)
+        
+        await writer2.flush()
+        await writer2.stop()
+        print(f"Sent {writer2.sent} frames")
             
-            while True:
-                try:
-                    # Get user input
-                    user_input = input("Enter 10 integers (0-255) separated by spaces: ")
-                    numbers = user_input.strip().split()
-                    
-                    # Validate
-                    if len(numbers) != 10:
-                        print("Error: You must enter exactly 10 integers.")
-                        continue
-                    
-                    try:
-                        byte_values = [int(x) for x in numbers]
-                    except ValueError:
-                        print("Error: Please enter only valid integers.")
-                        continue
-                    
-                    if any(not (0 <= b <= 255) for b in byte_values):
-                        print("Error: Integers must be between 0 and 255.")
-                        continue
-                    
-                    # Frame with 0xAA header
-                    framed_data = bytes([0xAA] + byte_values)
-                    
-                    # Send to ESP32_Receiver
-                    await client2.write_gatt_char(CHARACTERISTIC_UUID_2, framed_data)
-                    print(f"Sent: {[hex(b) for b in framed_data]}")
-                    
-                    # Update the UI state with the new values
-                    State.update_motors(State, byte_values)
-                    
-                except KeyboardInterrupt:
-                    print("\nExiting...")
-                    break
-                
     except Exception as e:
         print(f"Connection error: {e}")
         State.connection_status = f"Error: {str(e)}"
         yield
+    finally:
+        await disconnect_all(clients)
 
 
 # Motor visualization component
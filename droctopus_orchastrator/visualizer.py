@@ -1,6 +1,12 @@
 import asyncio
-from bleak import BleakClient, BleakScanner
 import matplotlib.pyplot as plt
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "droctopus_orchestrator"))
+from ble_discovery import connect_devices, disconnect_all
+from haptic_renderer import HapticRenderer
 
 # UUIDs (same as before)
 SERVICE_UUID_2 = "87654321-4321-4321-4321-0987654321ba"
@@ -14,7 +20,10 @@ COLORS = [(57, 252, 3), (65, 181, 129), (65, 250, 228), (247, 173, 255), (40, 11
 BACKGROUND = (255, 236, 207)
 
 
-# Visualization function
+# Visualization function (persistent, blitted renderer shared with the orchestrators)
+renderer_view = None
+
+
 def draw_combined_visual(joint_angles_rad, motor_values):
     """
     Draws 4 joint angle radian gauges and 10 haptic motor feedback circles.
@@ -22,68 +31,36 @@ def draw_combined_visual(joint_angles_rad, motor_values):
     Args:
         joint_angles_rad (list of float): 4 values in radians (-π to π)
         motor_values (list of int): 10 values between 1–255
-    """
-    if len(joint_angles_rad) != 4:
-        raise ValueError("Please provide 4 joint angles (radians).")
-    if len(motor_values) != 10:
-        raise ValueError("Please provide 10 haptic motor values (1–255).")
-
-    fig = plt.figure(figsize=(14, 7))
-    gs = fig.add_gridspec(2, 1, height_ratios=[2, 1])
 
-    # --- Top: 4 Joint Angle Gauges ---
-    ax_row1 = [fig.add_subplot(gs[0], projection='polar') for _ in range(4)]
-    for i, (ax, angle) in enumerate(zip(ax_row1, joint_angles_rad)):
-        ax.clear()
-        ax.set_theta_zero_location('N')
-        ax.set_theta_direction(-1)
-        ax.set_rticks([])
-        ax.set_xticks(np.linspace(-np.pi, np.pi, 5))
-        ax.set_xticklabels([r"$-\pi$", r"$-\frac{\pi}{2}$", "0", r"$\frac{\pi}{2}$", r"$\pi$"])
-
-        # Background arc
-        ax.bar(np.linspace(-np.pi, np.pi, 100), [1]*100, width=0.06, color='#eee', alpha=0.3)
-        # Current angle
-        ax.bar([angle], [1], width=0.15, color='C0')
-        ax.set_title(f"Joint {i+1}\n{angle:.2f} rad", va='bottom')
-
-    # --- Bottom: 10 Haptic Motor Circles ---
-    ax_haptics = fig.add_subplot(gs[1])
-    ax_haptics.set_xlim(0, 10)
-    ax_haptics.set_ylim(0, 1)
-    ax_haptics.axis('off')
-    ax_haptics.set_title("Haptic Motor Feedback", fontsize=14)
+    Returns:
+        bool: False once the window has been closed.
+    """
+    global renderer_view
 
-    for i, (val, color) in enumerate(zip(motor_values, COLORS)):
-        radius = 0.1 + (val / 255.0) * 0.3
-        circle = plt.Circle((i + 0.5, 0.5), radius, color=color)
-        ax_haptics.add_patch(circle)
-        ax_haptics.text(i + 0.5, 0.05, f"{val}", ha='center', va='center', fontsize=9)
+    if renderer_view is None:
+        plt.ion()
+        renderer_view = HapticRenderer([(r/255, g/255, b/255) for r, g, b in COLORS])
+        plt.show(block=False)
+    elif not plt.fignum_exists(renderer_view.fig.number):
+        return False
 
-    plt.tight_layout()
-    plt.show()
+    renderer_view.update(joint_angles_rad, motor_values)
+    return True
 
 
 
 async def send_user_commands():
-    print("Scanning for ESP32_Receiver...")
-    devices = await BleakScanner.discover()
-    address2 = None
-    for d in devices:
-        if d.name == DEVICE_NAME_2:
-            address2 = d.address
-    
-    if not address2:
+    started = time.monotonic()
+    clients = await connect_devices([DEVICE_NAME_2])
+    if DEVICE_NAME_2 not in clients:
         print("Could not find ESP32_Receiver!")
         return
     
-    print(f"Found ESP32_Receiver at {address2}")
-    client2 = BleakClient(address2)
+    client2 = clients[DEVICE_NAME_2]
+    print(f"Connected to ESP32_Receiver at {client2.address} "
+          f"({(time.monotonic() - started) * 1000:.0f} ms after startup)!")
     
-    async with client2:
-        await client2.connect()
-        print("Connected to ESP32_Receiver!")
-        
+    try:
         # Initialize with zeros
         byte_values = [0] * 10
         visualization_active = draw_combined_visual([0,0,0,0,], byte_values)
@@ -124,6 +101,8 @@ async def send_user_commands():
             except KeyboardInterrupt:
                 print("\nExiting...")
                 break
+    finally:
+        await disconnect_all(clients)
         
 if __name__ == "__main__":
     asyncio.run(send_user_commands())
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Encoder for RoArm-M2-S serial commands.
+
+The arm takes newline-terminated JSON; the only command on the hot path is
+T:102 (all angle control). Instead of building a dict and running json.dumps
+for every update, angles are quantized and formatted straight into a bytes
+template, and the encoded line is cached per quantized pose so repeated poses
+cost a dict lookup.
+
+https://www.waveshare.com/wiki/RoArm-M2-S_Robotic_Arm_Control
+"""
+import json
+from collections import OrderedDict
+
+CMD_ALL_ANGLES = 102
+CMD_FEEDBACK = 105  # ask for one feedback line
+CMD_FEEDBACK_FLOW = 131  # {"cmd": 1} streams feedback continuously, {"cmd": 0} stops it
+FEEDBACK = 1051  # "T" of the feedback lines the arm sends back
+
+# Same key order as the dicts previously passed to json.dumps
+_ALL_ANGLES_TEMPLATE = (
+    b'{"T":102,"base":%.4f,"shoulder":%.4f,"elbow":%.4f,"hand":%.4f,"spd":%d,"acc":%d}\n'
+)
+
+# Angle resolution used for caching; well below one servo step (2*pi / 4096)
+ANGLE_QUANTUM = 0.0001
+
+
+class AllAnglesEncoder:
+    """Encodes T:102 commands, caching the encoded bytes per quantized pose."""
+
+    def __init__(self, quantum=ANGLE_QUANTUM, cache_size=4096):
+        self.quantum = quantum
+        self.cache_size = cache_size
+        self._scale = 1.0 / quantum
+        self._cache = OrderedDict()
+
+    def encode(self, base, shoulder, elbow, hand, spd=10, acc=10):
+        """Return the newline-terminated JSON line for the given pose."""
+        scale = self._scale
+        key = (round(base * scale), round(shoulder * scale), round(elbow * scale), round(hand * scale), spd, acc)
+        line = self._cache.get(key)
+        if line is not None:
+            self._cache.move_to_end(key)
+            return line
+
+        q = self.quantum
+        line = _ALL_ANGLES_TEMPLATE % (key[0] * q, key[1] * q, key[2] * q, key[3] * q, spd, acc)
+        self._cache[key] = line
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return line
+
+
+class CommandBatcher:
+    """
+    Collects encoded command lines and hands them to the serial port in one write.
+
+    `add` only appends to a list; `flush` does a single `ser.write` for
+    everything pending, so bursts of commands cost one system call.
+    """
+
+    def __init__(self, ser):
+        self.ser = ser
+        self._pending = []
+        self.commands = 0
+        self.writes = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, line):
+        self._pending.append(line)
+
+    def flush(self):
+        """Write everything pending; returns the number of bytes written."""
+        pending = self._pending
+        if not pending:
+            return 0
+        data = pending[0] if len(pending) == 1 else b"".join(pending)
+        self.commands += len(pending)
+        self.writes += 1
+        pending.clear()
+        self.ser.write(data)
+        return len(data)
+
+
+# Shared default encoder for the orchestrators
+all_angles_encoder = AllAnglesEncoder()
+
+
+def encode_all_angles(base, shoulder, elbow, hand, spd=10, acc=10):
+    """Encode a T:102 all angle control command with the shared cache."""
+    return all_angles_encoder.encode(base, shoulder, elbow, hand, spd, acc)
+
+
+def encode_command(command):
+    """Encode any other (non hot path) command dict as a JSON line."""
+    return (json.dumps(command, separators=(",", ":")) + "\n").encode()
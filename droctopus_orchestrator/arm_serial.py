@@ -0,0 +1,186 @@
+"""
+Asyncio transport for the RoArm-M2-S serial link.
+
+Writes go through a bounded queue drained by a writer task, so coroutines
+never block on the port and a stalled arm applies backpressure instead of
+piling up commands. A reader thread parses the arm's JSON feedback lines
+incrementally into ArmTelemetry tuples and hands them to the event loop.
+The time from queueing bytes to the end of their ser.write goes into the
+write_latency histogram (latency.py).
+"""
+import asyncio
+import json
+import threading
+import time
+from typing import NamedTuple
+
+import serial
+
+from arm_commands import CMD_FEEDBACK, CMD_FEEDBACK_FLOW, FEEDBACK, encode_command
+from latency import LatencyHistogram
+
+
+class ArmTelemetry(NamedTuple):
+    """One T:1051 feedback line: joint positions (rad) and loads."""
+    timestamp: float  # time.monotonic() when the line was parsed
+    base: float
+    shoulder: float
+    elbow: float
+    hand: float
+    base_load: float
+    shoulder_load: float
+    elbow_load: float
+    hand_load: float
+
+    @property
+    def angles(self):
+        return (self.base, self.shoulder, self.elbow, self.hand)
+
+
+def parse_feedback(line, timestamp=None):
+    """Parse one line from the arm; returns ArmTelemetry or None for anything else."""
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or data.get("T") != FEEDBACK:
+        return None
+    try:
+        return ArmTelemetry(
+            time.monotonic() if timestamp is None else timestamp,
+            float(data["b"]), float(data["s"]), float(data["e"]), float(data["t"]),
+            float(data.get("torB", 0)), float(data.get("torS", 0)),
+            float(data.get("torE", 0)), float(data.get("torH", 0)),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def open_arm_port(port, baudrate=115200):
+    """Open the arm's serial port without resetting the ESP32 on it."""
+    ser = serial.Serial(port, baudrate=baudrate, dsrdtr=None, timeout=0.1)
+    try:
+        ser.setRTS(False)
+        ser.setDTR(False)
+    except OSError:
+        pass  # no modem control lines, e.g. the pty of fake_arm.py
+    return ser
+
+
+class ArmSerial:
+    """Non-blocking writes and a telemetry stream over one serial.Serial."""
+
+    def __init__(self, ser, max_pending=32, telemetry_size=64):
+        """
+        Args:
+            ser (serial.Serial): open port; a read timeout keeps the reader thread responsive.
+            max_pending (int): queued writes before `write` starts waiting.
+            telemetry_size (int): buffered feedback lines before the oldest is dropped.
+        """
+        self.ser = ser
+        self._out = asyncio.Queue(max_pending)  # (data, time.monotonic_ns() when queued)
+        self._telemetry = asyncio.Queue(telemetry_size)
+        self._loop = None
+        self._writer_task = None
+        self._reader_thread = None
+        self._closed = threading.Event()
+
+        self.latest = None  # most recent ArmTelemetry
+        self.bytes_written = 0
+        self.telemetry_dropped = 0
+        self.ignored_lines = 0
+        self.write_latency = LatencyHistogram()  # ns from write() until the bytes were handed to the port
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._writer_task = asyncio.create_task(self._writer())
+        self._reader_thread = threading.Thread(target=self._reader, daemon=True)
+        self._reader_thread.start()
+        return self
+
+    async def close(self):
+        self._closed.set()
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+        if self._reader_thread is not None:
+            await asyncio.to_thread(self._reader_thread.join, 1.0)
+        self.ser.close()
+
+    async def write(self, data):
+        """Queue bytes for the port, waiting only if `max_pending` writes are already queued."""
+        await self._out.put((data, time.monotonic_ns()))
+
+    def write_nowait(self, data):
+        """Queue bytes without waiting; raises asyncio.QueueFull when backed up."""
+        self._out.put_nowait((data, time.monotonic_ns()))
+
+    async def request_feedback(self):
+        """Ask the arm for a single feedback line."""
+        await self.write(encode_command({"T": CMD_FEEDBACK}))
+
+    async def set_feedback_flow(self, enabled):
+        """Turn the arm's continuous feedback stream on or off."""
+        await self.write(encode_command({"T": CMD_FEEDBACK_FLOW, "cmd": 1 if enabled else 0}))
+
+    async def telemetry(self):
+        """Async iterator over feedback as it arrives."""
+        while True:
+            yield await self._telemetry.get()
+
+    async def _writer(self):
+        out = self._out
+        while True:
+            data, queued_ns = await out.get()
+            queued = [queued_ns]
+            # Everything queued meanwhile goes out in the same write
+            if not out.empty():
+                chunks = [data]
+                while not out.empty():
+                    data, queued_ns = out.get_nowait()
+                    chunks.append(data)
+                    queued.append(queued_ns)
+                data = b"".join(chunks)
+            await asyncio.to_thread(self.ser.write, data)
+            self.bytes_written += len(data)
+            written_ns = time.monotonic_ns()
+            for queued_ns in queued:
+                self.write_latency.record(written_ns - queued_ns)
+
+    def _reader(self):
+        buffer = bytearray()
+        while not self._closed.is_set():
+            try:
+                chunk = self.ser.read(self.ser.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError):
+                # Port closed underneath us
+                break
+            if not chunk:
+                continue
+            buffer.extend(chunk)
+
+            start = 0
+            while True:
+                end = buffer.find(b"\n", start)
+                if end < 0:
+                    break
+                line = bytes(buffer[start:end]).strip()
+                start = end + 1
+                if not line:
+                    continue
+                telemetry = parse_feedback(line)
+                if telemetry is None:
+                    self.ignored_lines += 1
+                    continue
+                self._loop.call_soon_threadsafe(self._deliver, telemetry)
+            del buffer[:start]
+
+    def _deliver(self, telemetry):
+        self.latest = telemetry
+        if self._telemetry.full():
+            self._telemetry.get_nowait()
+            self.telemetry_dropped += 1
+        self._telemetry.put_nowait(telemetry)
@@ -0,0 +1,404 @@
+"""
+Audio to haptics: sound felt across the vest's 10 motors.
+
+Audio comes in blocks from a WAV file or from raw PCM on stdin, one block
+per motor frame, so the frame rate is sample_rate / block. For every block
+a BandAnalyzer
+
+    1. appends the block to the newest `window` samples and takes a real FFT
+       of them through a Hann taper
+    2. sums the power into 10 log-spaced bands with one precomputed
+       (10, bins) matrix product; motor 1 gets the lowest band
+    3. maps each band's level in dB from `floor` (silent) up to full scale
+       onto 0-255
+    4. smooths each band with a one-pole envelope that rises with `attack`
+       and falls with `release`, so motors do not buzz with every block
+
+and the frame goes out in the chosen framing (0xAA by default).
+
+Latency is the trade-off between block, window and smoothing: a sound only
+reaches the motors once its block is complete, the FFT centre sits half a
+window behind the newest sample, and the envelope needs about `attack` to
+rise. A live stream (--live) also keeps at most `max_blocks` blocks queued,
+dropping the oldest when analysis falls behind, so the total stays bounded.
+The budget is printed at startup and --latency-budget refuses settings that
+exceed it. Bigger windows resolve the low bands better; smaller blocks and
+windows react faster.
+
+    python audio_haptics.py music.wav --transport sim
+    arecord -f S16_LE -r 16000 -c 1 | \
+        python audio_haptics.py - --sample-rate 16000 --live --max-blocks 2 --latency-budget 80
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+from haptic_mapping import FRAME_HEADER, NUM_MOTORS
+
+BANDS = NUM_MOTORS
+LOW_HZ = 80.0
+HIGH_HZ = 8000.0
+FLOOR_DB = -60.0  # band level, relative to a full-scale sine, that leaves a motor off
+ATTACK = 0.01  # seconds for an envelope to rise most of the way
+RELEASE = 0.15  # seconds for it to fall back
+
+
+def band_edges(sample_rate, low=LOW_HZ, high=HIGH_HZ, bands=BANDS):
+    """bands + 1 log-spaced band edges in Hz, capped at the Nyquist frequency."""
+    return np.geomspace(low, min(high, sample_rate / 2), bands + 1)
+
+
+def pcm_to_float(data, sample_width, channels):
+    """Little-endian PCM bytes (8-bit unsigned or 16/24/32-bit signed) to mono float32 in -1..1."""
+    if sample_width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        values = raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16)
+        samples = (np.where(values & 0x800000, values - 0x1000000, values) / 8388608.0).astype(np.float32)
+    elif sample_width == 4:
+        samples = (np.frombuffer(data, dtype="<i4") / 2147483648.0).astype(np.float32)
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width} bytes")
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+class AudioSource:
+    """Reads mono float32 blocks from raw PCM or a WAV file."""
+
+    def __init__(self, stream, sample_rate, channels=1, sample_width=2, name="stdin"):
+        """
+        Args:
+            stream (file): binary stream of little-endian PCM, interleaved if multichannel.
+            sample_rate (int): samples per second per channel.
+            channels (int): interleaved channels, mixed down to mono.
+            sample_width (int): bytes per sample: 1 (unsigned), 2, 3 or 4 (signed).
+            name (str): shown in the printed summary.
+        """
+        self.stream = stream
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.name = name
+        self._wav = None
+
+    @classmethod
+    def open(cls, path, sample_rate=None, channels=1, sample_width=2):
+        """A WAV file, or "-" for raw PCM on stdin in the given format."""
+        if path == "-":
+            if not sample_rate:
+                raise ValueError("Raw PCM on stdin needs --sample-rate")
+            return cls(sys.stdin.buffer, sample_rate, channels, sample_width)
+        wav = wave.open(path, "rb")
+        source = cls(None, wav.getframerate(), wav.getnchannels(), wav.getsampwidth(), name=path)
+        source._wav = wav
+        return source
+
+    def read(self, samples):
+        """Up to `samples` mono samples; fewer at the end of the stream, none after it."""
+        if self._wav is not None:
+            data = self._wav.readframes(samples)
+        else:
+            size = samples * self.channels * self.sample_width
+            data = self.stream.read(size)
+            # A pipe returns whatever has arrived; fill the block unless the stream ended
+            while data and len(data) < size:
+                more = self.stream.read(size - len(data))
+                if not more:
+                    break
+                data += more
+            data = data[:len(data) - len(data) % (self.channels * self.sample_width)]
+        return pcm_to_float(data, self.sample_width, self.channels)
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+
+
+class BandAnalyzer:
+    """10-band FFT filterbank with per-band envelopes, turning audio blocks into motor values."""
+
+    def __init__(self, sample_rate, block, window=1024, low=LOW_HZ, high=HIGH_HZ, floor=FLOOR_DB, attack=ATTACK,
+                 release=RELEASE, escape_header=True):
+        """
+        Args:
+            sample_rate (int): samples per second.
+            block (int): samples per motor frame.
+            window (int): FFT size; raised to `block` if smaller.
+            low, high (float): outer band edges in Hz.
+            floor (float): dB below a full-scale sine at which a motor is off.
+            attack, release (float): envelope time constants in seconds.
+            escape_header (bool): replace 0xAA outputs with 254 for the legacy receiver.
+        """
+        self.sample_rate = sample_rate
+        self.block = block
+        self.window = max(window, block)
+        self.frame_rate = sample_rate / block
+        self.floor = floor
+        self.attack = attack
+        self.escape_header = escape_header
+
+        self._history = np.zeros(self.window, dtype=np.float32)
+        self._taper = np.hanning(self.window).astype(np.float32)
+        # Power a full-scale sine leaves in the spectrum through the taper (Parseval), i.e. 0 dB
+        self._full_scale = self.window * float(np.square(self._taper.astype(np.float64)).sum()) / 4
+
+        # Band matrix: which FFT bins each band sums; a band narrower than a bin takes its nearest bin
+        freqs = np.fft.rfftfreq(self.window, 1.0 / sample_rate)
+        self.edges = band_edges(sample_rate, low, high)
+        self.bands = np.zeros((BANDS, len(freqs)), dtype=np.float32)
+        for band in range(BANDS):
+            inside = (freqs >= self.edges[band]) & (freqs < self.edges[band + 1])
+            if not inside.any():
+                inside[np.argmin(np.abs(freqs - np.sqrt(self.edges[band] * self.edges[band + 1])))] = True
+            self.bands[band, inside] = 1.0
+
+        self._rise = np.float32(np.exp(-1.0 / (attack * self.frame_rate)) if attack > 0 else 0.0)
+        self._fall = np.float32(np.exp(-1.0 / (release * self.frame_rate)) if release > 0 else 0.0)
+        self._envelope = np.zeros(BANDS, dtype=np.float32)
+
+    def latency(self, queued_blocks=0):
+        """Worst-case sound-to-frame latency in seconds, by stage."""
+        return {
+            "block": self.block / self.sample_rate,
+            "window": self.window / 2 / self.sample_rate,
+            "attack": self.attack,
+            "queue": queued_blocks * self.block / self.sample_rate,
+        }
+
+    def _levels(self, power):
+        """Band power (..., 10) -> 0..255 targets."""
+        db = 10.0 * np.log10(power / self._full_scale + 1e-12)
+        return np.clip((db - self.floor) * (255.0 / -self.floor), 0.0, 255.0).astype(np.float32)
+
+    def _smooth(self, target):
+        envelope = self._envelope
+        coefficient = np.where(target > envelope, self._rise, self._fall)
+        envelope += (1.0 - coefficient) * (target - envelope)
+        values = np.rint(envelope).astype(np.uint8)
+        if self.escape_header:
+            values[values == FRAME_HEADER] = 254
+        return values
+
+    def process(self, block):
+        """
+        Motor values for one block of samples.
+
+        Args:
+            block (ndarray): float32 samples in -1..1, normally `block` of them.
+
+        Returns:
+            (10,) uint8 array.
+        """
+        history = self._history
+        count = len(block)
+        if count >= self.window:
+            history[:] = block[-self.window:]
+        else:
+            history[:-count] = history[count:]
+            history[-count:] = block
+        spectrum = np.fft.rfft(history * self._taper)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        return self._smooth(self._levels(self.bands @ power))
+
+    def process_many(self, samples):
+        """
+        Motor values for a whole recording at once, as process() would give block by block.
+
+        The FFTs of every window run as one batch; only the envelopes step frame by frame.
+
+        Returns:
+            (N, 10) uint8 array, one row per complete block.
+        """
+        count = len(samples) // self.block
+        padded = np.concatenate((self._history, np.asarray(samples[:count * self.block], dtype=np.float32)))
+        windows = np.lib.stride_tricks.sliding_window_view(padded, self.window)[self.block::self.block][:count]
+        spectra = np.fft.rfft(windows * self._taper, axis=1)
+        power = spectra.real ** 2 + spectra.imag ** 2
+        targets = self._levels(power @ self.bands.T)
+        self._history[:] = padded[-self.window:]
+        values = np.empty((count, BANDS), dtype=np.uint8)
+        for row, target in enumerate(targets):
+            values[row] = self._smooth(target)
+        return values
+
+
+class BlockReader:
+    """Reads audio blocks on a daemon thread and delivers them on the event loop."""
+
+    def __init__(self, source, block, live=False, max_blocks=4):
+        """
+        Args:
+            source (AudioSource): where the samples come from.
+            block (int): samples per block.
+            live (bool): the source runs in real time; when the loop falls behind, drop the
+                oldest queued blocks instead of holding up the reader.
+            max_blocks (int): blocks read ahead.
+        """
+        self.source = source
+        self.block = block
+        self.live = live
+        self.max_blocks = max_blocks
+        self.blocks_read = 0
+        self.dropped = 0
+
+    async def blocks(self):
+        """Async iterator over blocks of samples, until the end of the stream."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(self.max_blocks)
+
+        def offer(block):
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(block)
+
+        def hand_over(block):
+            try:
+                if self.live:
+                    loop.call_soon_threadsafe(offer, block)
+                else:
+                    # Blocks this thread while the queue is full, so a file is only read as fast as it is played
+                    asyncio.run_coroutine_threadsafe(queue.put(block), loop).result()
+            except RuntimeError:
+                return False  # the loop has gone away
+            return True
+
+        def read():
+            try:
+                while True:
+                    block = self.source.read(self.block)
+                    if not len(block) or not hand_over(block):
+                        break
+            except (OSError, ValueError) as e:
+                print(f"Stopped reading audio: {e}")
+            finally:
+                hand_over(None)
+
+        threading.Thread(target=read, daemon=True, name="BlockReader").start()
+        while True:
+            block = await queue.get()
+            if block is None:
+                return
+            self.blocks_read += 1
+            yield block
+
+
+async def stream_audio(reader, analyzer, submit, ticker=None):
+    """
+    Analyze blocks as they arrive and submit a frame for each.
+
+    Args:
+        reader (BlockReader): the audio.
+        analyzer (BandAnalyzer): blocks -> motor values.
+        submit (callable): called with the motor values (uint8 array) of every frame.
+        ticker (rate_loop.RateLoop): paces a source that is not live, None to go as fast as it reads.
+
+    Returns:
+        frames submitted.
+    """
+    frames = 0
+    async for block in reader.blocks():
+        submit(analyzer.process(block))
+        frames += 1
+        if ticker is not None:
+            await ticker.tick()
+    return frames
+
+
+def print_budget(analyzer, queued_blocks):
+    latency = analyzer.latency(queued_blocks)
+    parts = ", ".join(f"{stage} {seconds * 1000:.1f}" for stage, seconds in latency.items() if seconds)
+    print(f"{analyzer.frame_rate:.1f} frames/s from blocks of {analyzer.block} samples at {analyzer.sample_rate} Hz, "
+          f"FFT {analyzer.window}")
+    print(f"Latency budget {sum(latency.values()) * 1000:.1f} ms ({parts} ms)")
+    print("Bands (Hz): " + ", ".join(f"{low:.0f}-{high:.0f}" for low, high in zip(analyzer.edges, analyzer.edges[1:])))
+
+
+async def run(args, source):
+    from framing import make_encoder
+    from rate_loop import RateLoop
+    from waveform import drive
+
+    block = max(1, round(source.sample_rate / args.rate))
+    analyzer = BandAnalyzer(source.sample_rate, block, window=args.window, low=args.low, high=args.high,
+                            floor=args.floor, attack=args.attack, release=args.release,
+                            escape_header=args.framing == "legacy")
+    queued_blocks = args.max_blocks if args.live else 0
+    print_budget(analyzer, queued_blocks)
+    budget = sum(analyzer.latency(queued_blocks).values()) * 1000
+    if args.latency_budget is not None and budget > args.latency_budget:
+        raise SystemExit(f"Latency budget of {args.latency_budget:g} ms exceeded ({budget:.1f} ms); "
+                         f"use a higher --rate, a smaller --window, a shorter --attack or fewer --max-blocks")
+    if args.info:
+        return
+
+    reader = BlockReader(source, block, live=args.live, max_blocks=args.max_blocks)
+    # A file is played in real time; a live stream is already paced by its sound card
+    ticker = None if args.live else RateLoop(analyzer.frame_rate, name="audio")
+    encoder = make_encoder(args.framing) if args.framing != "delta" else None
+
+    def submit_to(writer):
+        if encoder is None:
+            return lambda values: writer.submit(values.tobytes())
+        return lambda values: writer.submit(encoder.encode(values.tobytes()))
+
+    async def feed(writer):
+        started = time.monotonic()
+        frames = await stream_audio(reader, analyzer, submit_to(writer), ticker)
+        seconds = time.monotonic() - started
+        print(f"Played {reader.blocks_read * block / source.sample_rate:.1f} s of {source.name}: {frames} frames "
+              f"in {seconds:.1f} s, {reader.dropped} blocks dropped")
+        if ticker is not None:
+            ticker.report()
+
+    await drive(feed, args.framing, args.transport, use_cache=not args.rescan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Feel audio on the vest: a 10-band filterbank drives the motors')
+    parser.add_argument('source', help='WAV file, or - for raw little-endian PCM on stdin')
+    parser.add_argument('--sample-rate', type=int, default=None, help='Sample rate of raw PCM on stdin')
+    parser.add_argument('--channels', type=int, default=1, help='Interleaved channels of raw PCM on stdin')
+    parser.add_argument('--sample-width', type=int, choices=[1, 2, 3, 4], default=2,
+                        help='Bytes per sample of raw PCM on stdin')
+    parser.add_argument('--rate', type=float, default=100.0,
+                        help='Motor frames per second; each frame analyzes a block of sample_rate / rate samples')
+    parser.add_argument('--window', type=int, default=1024, help='FFT size in samples')
+    parser.add_argument('--low', type=float, default=LOW_HZ, help='Lowest band edge in Hz')
+    parser.add_argument('--high', type=float, default=HIGH_HZ, help='Highest band edge in Hz')
+    parser.add_argument('--floor', type=float, default=FLOOR_DB, help='Band level in dB at which a motor is off')
+    parser.add_argument('--attack', type=float, default=ATTACK, help='Envelope rise time in seconds')
+    parser.add_argument('--release', type=float, default=RELEASE, help='Envelope fall time in seconds')
+    parser.add_argument('--live', action='store_true',
+                        help='The source is a real-time stream: keep up with it, dropping blocks if needed')
+    parser.add_argument('--max-blocks', type=int, default=4, help='Blocks queued between reading and analysis')
+    parser.add_argument('--latency-budget', type=float, default=None, metavar='MS',
+                        help='Refuse settings whose worst-case latency exceeds this many ms')
+    parser.add_argument('--info', action='store_true', help='Only print the bands and the latency budget')
+    parser.add_argument('--framing', choices=['legacy', 'cobs', 'delta'], default='legacy')
+    parser.add_argument('--rescan', action='store_true', help='Ignore the cached BLE address')
+    parser.add_argument('--transport', default='bleak', help='"bleak" or "sim[:...]" (see transport.py)')
+    args = parser.parse_args()
+
+    try:
+        source = AudioSource.open(args.source, args.sample_rate, args.channels, args.sample_width)
+    except (OSError, EOFError, wave.Error, ValueError) as e:
+        parser.error(f"cannot read {args.source}: {e}")
+    try:
+        asyncio.run(run(args, source))
+    finally:
+        source.close()
+
+
+if __name__ == "__main__":
+    main()
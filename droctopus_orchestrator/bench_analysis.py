@@ -0,0 +1,116 @@
+"""
+Session analysis speed on a synthetic recording.
+
+Writes a session file of --frames haptic frames at 100 Hz (10M frames is
+about 28 hours, 640 MB) with joints sweeping at different rates and some
+timing jitter, then times session_analysis.analyze() on it. For comparison a
+plain-Python pass over SessionReader records computes the duty cycle of a
+prefix of the file and is extrapolated to the full length.
+
+    python bench_analysis.py --frames 10000000
+    python bench_analysis.py --frames 1000000 --framing cobs --keep /tmp/synthetic.drs
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import session_analysis
+from framing import FrameEncoder
+from haptic_mapping import MAX_ANGLE, MIN_ANGLE, HapticMapper
+from session_analysis import RECORD_DTYPE
+from session_log import FRAME, HEADER, MAGIC, RECORD_SIZE, VERSION, SessionReader
+
+
+def write_synthetic(path, frames, framing, chunk=1 << 20, seed=1):
+    """Write `frames` FRAME records at a jittery 100 Hz straight from NumPy."""
+    rng = np.random.default_rng(seed)
+    mapper = HapticMapper(escape_header=framing == "legacy")
+    encoder = FrameEncoder()
+    rates = np.array([0.05, 0.11, 0.23, 0.5])  # sweeps per second for base, shoulder, elbow, hand
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, framing.encode(), time.time(), frames))
+        for start in range(0, frames, chunk):
+            count = min(chunk, frames - start)
+            index = np.arange(start, start + count)
+            t = index * 0.01 + rng.normal(0.0, 0.0005, count)
+            angles = MIN_ANGLE + (MAX_ANGLE - MIN_ANGLE) * 0.5 * (1 - np.cos(2 * np.pi * t[:, None] * rates))
+
+            block = np.zeros(count, dtype=RECORD_DTYPE)
+            block["t_ns"] = (t * 1e9).astype(np.int64)
+            block["kind"] = FRAME
+            block["joints"] = angles
+            if framing == "legacy":
+                block["data"][:, :11] = mapper.frame_batch(angles)
+                block["length"] = 11
+            elif framing == "delta":
+                block["data"][:, :10] = mapper.motor_batch(angles)
+                block["length"] = 10
+            else:
+                # COBS frames carry a sequence number and CRC; encoding them one by one is the slow part here
+                for row, motors in zip(block["data"], mapper.motor_batch(angles)):
+                    frame = encoder.encode(motors.tobytes())
+                    row[:len(frame)] = np.frombuffer(frame, dtype=np.uint8)
+                block["length"] = 14
+            f.write(block.tobytes())
+
+
+def python_duty(path, limit):
+    """Duty cycle the straightforward way: one Record at a time (legacy frame layout)."""
+    reader = SessionReader(path)
+    on_time = [0.0] * 10
+    previous = None
+    count = min(limit, len(reader))
+    for index in range(count):
+        record = reader[index]
+        if record.kind != FRAME:
+            continue
+        if previous is not None:
+            dt = record.t - previous.t
+            for motor, value in enumerate(previous.data[1:11]):
+                if value:
+                    on_time[motor] += dt
+        previous = record
+    reader.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Session analysis benchmark on a synthetic recording')
+    parser.add_argument('--frames', type=int, default=10_000_000)
+    parser.add_argument('--framing', choices=['legacy', 'cobs', 'delta'], default='legacy')
+    parser.add_argument('--python-frames', type=int, default=200_000,
+                        help='Frames timed for the plain-Python comparison')
+    parser.add_argument('--keep', metavar='PATH', help='Write the synthetic file here and keep it')
+    args = parser.parse_args()
+
+    path = args.keep or os.path.join(tempfile.mkdtemp(), "synthetic.drs")
+    started = time.perf_counter()
+    write_synthetic(path, args.frames, args.framing)
+    written = time.perf_counter() - started
+    size = os.path.getsize(path)
+    print(f"wrote {args.frames} frames ({size / 1e6:.0f} MB, {args.frames / 100 / 3600:.1f} h at 100 Hz) "
+          f"in {written:.1f} s")
+
+    try:
+        started = time.perf_counter()
+        stats = session_analysis.analyze(path)
+        elapsed = time.perf_counter() - started
+        session_analysis.report(stats)
+        print(f"\nanalyze: {elapsed:.2f} s, {args.frames / elapsed / 1e6:.1f} M frames/s, "
+              f"{size / elapsed / 1e9:.2f} GB/s")
+
+        started = time.perf_counter()
+        counted = python_duty(path, args.python_frames)
+        python_elapsed = (time.perf_counter() - started) * args.frames / counted
+        print(f"plain Python duty cycle alone: ~{python_elapsed:.0f} s for all frames "
+              f"(timed on {counted}), {python_elapsed / elapsed:.0f}x slower")
+    finally:
+        if not args.keep:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
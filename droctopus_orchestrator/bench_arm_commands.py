@@ -0,0 +1,88 @@
+"""
+Commands/sec for T:102 robot arm commands: the old dict + json.dumps path
+versus the template/caching encoder. Commands are written to an unbuffered
+os.devnull so every write is a real system call, like a serial port.
+
+    python bench_arm_commands.py --commands 500000
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from arm_commands import AllAnglesEncoder, CommandBatcher
+
+
+def make_poses(count, distinct):
+    """Keyboard-style poses: angles on a 0.3 rad grid, `distinct` of them."""
+    rng = random.Random(0)
+    grid = [round(-3.0 + 0.3 * i, 2) for i in range(21)]
+    unique = [tuple(rng.choice(grid) for _ in range(4)) for _ in range(distinct)]
+    return [unique[rng.randrange(distinct)] for _ in range(count)]
+
+
+def run_json(poses, port):
+    for base, shoulder, elbow, hand in poses:
+        command = {
+            "T": 102,
+            "base": base,
+            "shoulder": shoulder,
+            "elbow": elbow,
+            "hand": hand,
+            "spd": 10,
+            "acc": 10
+        }
+        port.write((json.dumps(command) + "\n").encode())
+
+
+def run_encoder(poses, port, cache_size):
+    encoder = AllAnglesEncoder(cache_size=cache_size)
+    encode = encoder.encode
+    for base, shoulder, elbow, hand in poses:
+        port.write(encode(base, shoulder, elbow, hand))
+
+
+def run_batched(poses, port, batch):
+    encoder = AllAnglesEncoder()
+    encode = encoder.encode
+    batcher = CommandBatcher(port)
+    add = batcher.add
+    for i, (base, shoulder, elbow, hand) in enumerate(poses, 1):
+        add(encode(base, shoulder, elbow, hand))
+        if i % batch == 0:
+            batcher.flush()
+    batcher.flush()
+
+
+def measure(name, fn, count):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed
+    print(f"{name:>28}: {rate / 1e3:9.1f} k commands/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark robot arm command encoding')
+    parser.add_argument('--commands', type=int, default=500_000, help='Commands to encode per variant')
+    parser.add_argument('--distinct', type=int, default=1000, help='Distinct poses in the stream')
+    parser.add_argument('--batch', type=int, default=32, help='Commands per serial write in the batched run')
+    args = parser.parse_args()
+
+    poses = make_poses(args.commands, args.distinct)
+    port = open(os.devnull, 'wb', buffering=0)
+
+    baseline = measure("json.dumps", lambda: run_json(poses, port), args.commands)
+    cold = measure("template, no cache hits", lambda: run_encoder(poses, port, 0), args.commands)
+    warm = measure("template + cache", lambda: run_encoder(poses, port, 4096), args.commands)
+    batched = measure(f"template + cache, batch {args.batch}",
+                      lambda: run_batched(poses, port, args.batch), args.commands)
+
+    print(f"\nspeedup vs json.dumps: no cache x{cold / baseline:.1f}, "
+          f"cache x{warm / baseline:.1f}, cache+batch x{batched / baseline:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Frames/sec per core of the audio-to-haptics filterbank.
+
+Runs audio_haptics.BandAnalyzer on synthetic audio (a log chirp over noise)
+for a few FFT sizes, both block by block as a live stream is processed and
+over the whole recording at once with process_many(). Everything runs on
+one thread, so the numbers are per core; compare them with the frame rate
+(100 frames/s by default) to see how much headroom one core leaves.
+
+    python bench_audio_haptics.py --seconds 30 --sample-rate 44100
+"""
+import argparse
+import time
+
+import numpy as np
+
+from audio_haptics import BandAnalyzer
+
+
+def synthetic_audio(seconds, sample_rate):
+    t = np.arange(round(seconds * sample_rate)) / sample_rate
+    low, high = 60.0, min(10000.0, sample_rate / 2)
+    phase = 2 * np.pi * low * seconds / np.log(high / low) * (np.exp(t / seconds * np.log(high / low)) - 1)
+    noise = np.random.default_rng(0).standard_normal(len(t))
+    return (0.5 * np.sin(phase) + 0.05 * noise).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Audio-to-haptics filterbank throughput')
+    parser.add_argument('--seconds', type=float, default=20.0, help='Length of the synthetic audio')
+    parser.add_argument('--sample-rate', type=int, default=44100)
+    parser.add_argument('--rate', type=float, default=100.0, help='Motor frames per second of audio')
+    parser.add_argument('--windows', type=int, nargs='+', default=[512, 1024, 2048, 4096], help='FFT sizes')
+    args = parser.parse_args()
+
+    samples = synthetic_audio(args.seconds, args.sample_rate)
+    block = round(args.sample_rate / args.rate)
+    print(f"{args.seconds:g} s of audio at {args.sample_rate} Hz, blocks of {block} samples "
+          f"({args.sample_rate / block:.1f} frames/s needed)")
+    print(f"{'window':>7} {'latency ms':>11} {'streamed/s':>11} {'us/frame':>9} {'batched/s':>10} {'realtime':>9}")
+
+    for window in args.windows:
+        streamed = BandAnalyzer(args.sample_rate, block, window=window)
+        started = time.perf_counter()
+        frames = 0
+        for start in range(0, len(samples) - block + 1, block):
+            streamed.process(samples[start:start + block])
+            frames += 1
+        stream_seconds = time.perf_counter() - started
+
+        batched = BandAnalyzer(args.sample_rate, block, window=window)
+        started = time.perf_counter()
+        values = batched.process_many(samples)
+        batch_seconds = time.perf_counter() - started
+        if len(values) != frames:
+            raise RuntimeError(f"process_many() gave {len(values)} frames, process() {frames}")
+
+        latency = sum(streamed.latency().values()) * 1000
+        fps = frames / stream_seconds
+        print(f"{streamed.window:>7} {latency:11.1f} {fps:11.0f} {stream_seconds / frames * 1e6:9.1f} "
+              f"{frames / batch_seconds:10.0f} {fps / streamed.frame_rate:8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Bandwidth benchmark for the keyframe + delta encoding of the haptic stream.
+
+Simulates the vest loop at a fixed tick rate for a few joint-motion patterns,
+maps the joints to motor bytes with the real HapticMapper, and compares the
+bytes/s of legacy 0xAA frames, plain COBS frames and delta-in-COBS frames.
+A second pass drops random packets on the way and checks the decoder only
+ever outputs states the sender actually had, recovering at the next keyframe.
+
+    python bench_delta.py --rate 100 --seconds 60 --loss 0.02
+"""
+import argparse
+import math
+import random
+
+from frame_delta import DeltaFrameDecoder, DeltaFrameEncoder
+from framing import FrameEncoder, LegacyEncoder
+from haptic_mapping import HapticMapper
+
+REST = (0.0, 0.0, 1.57, 3.14)
+
+
+def idle(rng):
+    return lambda t: REST
+
+
+def keyboard(rng):
+    """One joint at a time nudged by 0.05 rad per 50 ms while a key is held, like keyboard_control."""
+    angles = list(REST)
+    held = {"joint": None, "direction": 1, "until": 0.0, "next_step": 0.0}
+
+    def at(t):
+        if t >= held["until"]:
+            # Alternate between holding a key for 0.2-1.5 s and leaving the keyboard alone for 0.5-3 s
+            if held["joint"] is None:
+                held.update(joint=rng.randrange(4), direction=rng.choice((-1, 1)), until=t + rng.uniform(0.2, 1.5))
+            else:
+                held.update(joint=None, until=t + rng.uniform(0.5, 3.0))
+        joint = held["joint"]
+        if joint is not None and t >= held["next_step"]:
+            angles[joint] = max(-3.14, min(3.14, angles[joint] + 0.05 * held["direction"]))
+            held["next_step"] = t + 0.05
+        return tuple(angles)
+    return at
+
+
+def sweep(rng):
+    """All four joints moving continuously, the worst case for deltas."""
+    return lambda t: tuple(rest + math.sin(2 * math.pi * (0.2 + 0.1 * j) * t) for j, rest in enumerate(REST))
+
+
+PATTERNS = {"idle": idle, "keyboard": keyboard, "sweep": sweep}
+
+
+def simulate(pattern, rate, seconds, seed):
+    """Motor payloads for every tick of the simulated loop."""
+    angles_at = pattern(random.Random(seed))
+    mapper = HapticMapper(escape_header=False)
+    return [bytes(mapper.motor_values(angles_at(i / rate))) for i in range(int(rate * seconds))]
+
+
+def bandwidth(name, payloads, rate, keyframe_interval):
+    seconds = len(payloads) / rate
+    legacy = sum(len(LegacyEncoder().encode(p)) for p in payloads)
+    cobs_encoder = FrameEncoder()
+    cobs = sum(len(cobs_encoder.encode(p)) for p in payloads)
+
+    tick = [0.0]
+    encoder = DeltaFrameEncoder(keyframe_interval, clock=lambda: tick[0])
+    packets = 0
+    for i, payload in enumerate(payloads):
+        tick[0] = i / rate
+        if encoder.encode(payload) is not None:
+            packets += 1
+
+    print(f"{name:>9}: legacy {legacy / seconds:7.0f} B/s   COBS {cobs / seconds:7.0f} B/s   "
+          f"delta {encoder.bytes_out / seconds:7.0f} B/s ({packets / seconds:5.1f} packets/s, "
+          f"{encoder.bytes_out / legacy:.1%} of legacy)")
+
+
+def lossy(payloads, rate, keyframe_interval, loss, seed):
+    rng = random.Random(seed)
+    tick = [0.0]
+    encoder = DeltaFrameEncoder(keyframe_interval, clock=lambda: tick[0])
+    decoder = DeltaFrameDecoder()
+    wrong = 0
+    decoded = 0
+    dropped = 0
+    for i, payload in enumerate(payloads):
+        tick[0] = i / rate
+        data = encoder.encode(payload)
+        if data is None:
+            continue
+        if rng.random() < loss:
+            dropped += 1
+            continue
+        for state in decoder.feed(data):
+            decoded += 1
+            if state != payload:
+                wrong += 1
+    print(f"     loss: dropped {dropped} packets, decoded {decoded}, ignored {decoder.delta.skipped} "
+          f"deltas while out of sync, wrong states {wrong}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare legacy and delta-compressed haptic frame bandwidth')
+    parser.add_argument('--rate', type=float, default=100.0, help='Simulated loop rate in Hz')
+    parser.add_argument('--seconds', type=float, default=60.0, help='Simulated duration per pattern')
+    parser.add_argument('--keyframe', type=float, default=1.0, help='Seconds between keyframes')
+    parser.add_argument('--loss', type=float, default=0.02, help='Packet loss rate for the lossy pass')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    for name, pattern in PATTERNS.items():
+        payloads = simulate(pattern, args.rate, args.seconds, args.seed)
+        bandwidth(name, payloads, args.rate, args.keyframe)
+        lossy(payloads, args.rate, args.keyframe, args.loss, args.seed)
+
+
+if __name__ == "__main__":
+    main()
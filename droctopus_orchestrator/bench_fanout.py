@@ -0,0 +1,88 @@
+"""
+Fan-out throughput on the simulated transport: one sender, N vests.
+
+Runs orchestrator.main() with `--receivers` against `--transport sim:receivers=N,...`
+and reports what reached each vest. Scenarios with `slow=` put the last vest on
+a link that takes only one write per that many seconds; the other vests
+should still see the full sender rate and their usual latency.
+
+    python bench_fanout.py --seconds 5
+    python bench_fanout.py --scenario "sim:receivers=16,slow=0.05,rate=200" --output-framing delta
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+
+import orchestrator
+from latency import ms
+
+SCENARIOS = [
+    "sim:receivers=1,rate=100",
+    "sim:receivers=4,rate=100",
+    "sim:receivers=4,rate=100,slow=0.05",
+    "sim:receivers=8,rate=100,slow=0.05",
+    "sim:receivers=8,rate=500,slow=0.05",
+]
+
+
+async def run_scenario(spec, framing, output_framing, vest_rate, seconds, warmup):
+    options = dict(item.partition("=")[::2] for item in spec.partition(":")[2].split(",") if item)
+    # Expecting the exact count lets the scan stop as soon as every vest has been seen
+    sys.argv = ["orchestrator.py", "--transport", spec, "--framing", framing,
+                "--receivers", "ESP32_Receiver*", "--vests", options.get("receivers", "1")]
+    if output_framing:
+        sys.argv += ["--output-framing", output_framing]
+    if vest_rate:
+        sys.argv += ["--vest-rate", str(vest_rate)]
+
+    # The relay prints every frame; keep that out of the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        task = asyncio.create_task(orchestrator.main())
+        await asyncio.sleep(warmup)
+        if task.done():
+            task.result()
+        orchestrator.transport.reset_stats()
+        await asyncio.sleep(seconds)
+        stats = orchestrator.transport.stats()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    sent_per_sec = stats["sent"] / stats["seconds"]
+    vests = list(stats["receivers"].values())
+    slow = "slow=" in spec
+    fast = vests[:-1] if slow and len(vests) > 1 else vests
+    fast_fps = min(vest["fps"] for vest in fast)
+    fast_p99 = max((vest["latency_p99"] for vest in fast if vest["latency_p99"] is not None), default=None)
+    if slow:
+        slow_columns = f"{vests[-1]['fps']:8.0f} {ms(vests[-1]['latency_p50'], 1, 6, '')}"
+    else:
+        slow_columns = f"{'-':>8} {'-':>6}"
+    print(f"{spec:<38} {sent_per_sec:8.0f} {stats['fps']:9.0f} {fast_fps:8.0f} {ms(fast_p99, 1, 6, '')} "
+          f"{slow_columns}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-vest fan-out benchmark on the simulated transport')
+    parser.add_argument('--seconds', type=float, default=5.0, help='Measured seconds per scenario')
+    parser.add_argument('--warmup', type=float, default=1.5, help='Seconds for startup before measuring')
+    parser.add_argument('--framing', choices=['legacy', 'cobs'], default='legacy')
+    parser.add_argument('--output-framing', choices=['legacy', 'cobs', 'delta'], default=None)
+    parser.add_argument('--vest-rate', type=float, default=None, help='Per-vest frame rate cap')
+    parser.add_argument('--scenario', action='append', help='Transport spec to run (repeatable); default set if omitted')
+    args = parser.parse_args()
+
+    print(f"framing {args.framing} -> {args.output_framing or args.framing}, "
+          f"vest rate cap {args.vest_rate or 'none'}")
+    print(f"{'scenario':<38} {'sent/s':>8} {'total/s':>9} {'min fast':>8} {'p99 ms':>6} {'slow/s':>8} {'p50 ms':>6}")
+    for spec in args.scenario or SCENARIOS:
+        asyncio.run(run_scenario(spec, args.framing, args.output_framing, args.vest_rate, args.seconds,
+                                 args.warmup))
+
+
+if __name__ == "__main__":
+    main()
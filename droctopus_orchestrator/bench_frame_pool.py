@@ -0,0 +1,106 @@
+"""
+Frames/sec of a heavy mapping computed on the event loop versus in a
+frame_pool.FramePipeline with more and more worker processes.
+
+The mapping renders a travelling wave as a field over a fine spatial.py grid
+and samples it at the motors, so each frame costs a fraction of a
+millisecond of NumPy work, like the spatial and audio mappings. Frames are
+put() in batches and read back through frames() as the orchestrator would;
+throughput should grow with the workers up to the number of cores.
+
+    python bench_frame_pool.py --frames 4000 --workers 1 2 4
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from frame_pool import FramePipeline
+
+
+def wave_field(grid=160, wavelength=0.5):
+    """Kernel: (N, 1) wave phases in cycles -> (N, 10) motor values sampled from the wave's field."""
+    from spatial import SpatialRenderer, load_layout
+
+    renderer = SpatialRenderer(load_layout(), grid=grid)
+    rows, columns = renderer.shape
+    x = np.linspace(0.0, 1.0, columns)[None, :]
+    y = np.linspace(0.0, renderer.height, rows)[:, None]
+    distance = np.hypot(x - 0.5, y - renderer.height / 2) / wavelength
+
+    def kernel(phases):
+        values = np.empty((len(phases), 10), dtype=np.uint8)
+        for row, phase in enumerate(phases[:, 0]):
+            field = 127.5 + 127.5 * np.sin(2 * np.pi * (distance - phase))
+            values[row] = np.frombuffer(renderer.render_field(field), dtype=np.uint8)
+        return values
+
+    return kernel
+
+
+async def run_inline(phases, batch, options):
+    kernel = wave_field(**options)
+    frames = np.empty((len(phases), 10), dtype=np.uint8)
+    started = time.perf_counter()
+    for start in range(0, len(phases), batch):
+        frames[start:start + batch] = kernel(phases[start:start + batch])
+        await asyncio.sleep(0)
+    return time.perf_counter() - started, frames
+
+
+async def run_pool(phases, batch, options, workers):
+    pipeline = FramePipeline("bench_frame_pool:wave_field", options, workers=workers, slots=max(4 * batch, 64),
+                             width=1).start()
+    try:
+        await pipeline.warm_up()
+        started = time.perf_counter()
+
+        async def produce():
+            for start in range(0, len(phases), batch):
+                await pipeline.put(phases[start:start + batch])
+
+        producer = asyncio.create_task(produce())
+        frames = np.empty((len(phases), 10), dtype=np.uint8)
+        read = 0
+        async for motor_values, _ in pipeline.frames():
+            frames[read] = motor_values  # copied out before the slot is reused
+            read += 1
+            if read == len(phases):
+                break
+        await producer
+        return time.perf_counter() - started, frames
+    finally:
+        pipeline.close()
+
+
+async def run(args):
+    phases = (np.arange(args.frames) / 100.0).reshape(-1, 1)  # 1 cycle per second at 100 frames/s
+    options = {"grid": args.grid}
+    print(f"{args.frames} frames, grid {args.grid}, batches of {args.batch}, {os.cpu_count()} cores")
+    print(f"{'':<12} {'frames/s':>10} {'speedup':>8}")
+
+    seconds, expected = await run_inline(phases, args.batch, options)
+    baseline = args.frames / seconds
+    print(f"{'inline':<12} {baseline:10.0f} {1.0:7.2f}x")
+    for workers in args.workers:
+        seconds, frames = await run_pool(phases, args.batch, options, workers)
+        if not np.array_equal(frames, expected):
+            raise RuntimeError(f"{workers} workers computed different frames than the inline mapping")
+        fps = args.frames / seconds
+        print(f"{f'{workers} workers':<12} {fps:10.0f} {fps / baseline:7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Frame generation throughput by worker process count')
+    parser.add_argument('--frames', type=int, default=4000)
+    parser.add_argument('--batch', type=int, default=16, help='Frames per put()')
+    parser.add_argument('--grid', type=int, default=160, help='Field nodes across; more makes each frame heavier')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+End-to-end frames/sec through the relay orchestrator on the simulated transport.
+
+Runs orchestrator.main() against `--transport sim:...` for each scenario:
+the sender streams numbered payloads, the relay forwards them, and the
+simulated receiver decodes them. Reports delivered frames/s and
+sender-to-receiver latency. No Bluetooth adapter or serial port is needed,
+so it also runs on a CI box.
+
+    python bench_pipeline.py --seconds 5
+    python bench_pipeline.py --scenario "sim:rate=1000,airtime=0.0075" --framing cobs
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+
+import orchestrator
+from latency import ms
+
+SCENARIOS = [
+    "sim:rate=100,latency=0,jitter=0",
+    "sim:rate=100",
+    "sim:rate=1000",
+    "sim:rate=5000,latency=0,jitter=0",
+    "sim:rate=1000,airtime=0.0075",
+    "sim:rate=100,loss=0.05",
+]
+
+
+async def run_scenario(spec, framing, output_framing, seconds, warmup):
+    sys.argv = ["orchestrator.py", "--transport", spec, "--framing", framing]
+    if output_framing:
+        sys.argv += ["--output-framing", output_framing]
+
+    # The relay prints every frame; keep that out of the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        task = asyncio.create_task(orchestrator.main())
+        await asyncio.sleep(warmup)
+        if task.done():
+            task.result()
+        orchestrator.transport.reset_stats()
+        await asyncio.sleep(seconds)
+        stats = orchestrator.transport.stats()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    delivered = stats["received"] / stats["sent"] if stats["sent"] else 0.0
+    print(f"{spec:<38} {stats['sent'] / stats['seconds']:8.0f} {stats['fps']:8.0f} {delivered:8.1%} "
+          f"{ms(stats['latency_p50'], 1, 6, '')} {ms(stats['latency_p99'], 1, 6, '')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end relay benchmark on the simulated transport')
+    parser.add_argument('--seconds', type=float, default=5.0, help='Measured seconds per scenario')
+    parser.add_argument('--warmup', type=float, default=1.0, help='Seconds for startup before measuring')
+    parser.add_argument('--framing', choices=['legacy', 'cobs'], default='legacy')
+    parser.add_argument('--output-framing', choices=['legacy', 'cobs', 'delta'], default=None)
+    parser.add_argument('--scenario', action='append', help='Transport spec to run (repeatable); default set if omitted')
+    args = parser.parse_args()
+
+    print(f"framing {args.framing} -> {args.output_framing or args.framing}")
+    print(f"{'scenario':<38} {'sent/s':>8} {'recv/s':>8} {'deliv.':>8} {'p50 ms':>6} {'p99 ms':>6}")
+    for spec in args.scenario or SCENARIOS:
+        asyncio.run(run_scenario(spec, args.framing, args.output_framing, args.seconds, args.warmup))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Link-loss soak test for the reconnect supervisor on the fake BLE backend.
+
+Runs the relay path (sender notifications -> FrameWriter -> receiver) at a
+fixed rate while randomly dropping either ESP32 and keeping it off the air
+for a while. Reports reconnects, downtime, how soon after each receiver
+reconnect a frame reached it, and whether that frame was the latest state.
+
+    python bench_reconnect.py --seconds 20 --rate 100
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from ble_supervisor import LinkSupervisor
+from ble_writer import FrameWriter
+from fake_ble import FakeBle
+
+CHARACTERISTIC_UUID_1 = "abcdefab-1234-5678-1234-abcdefabcdef"
+CHARACTERISTIC_UUID_2 = "fedcbafe-4321-8765-4321-fedcbafedcba"
+SENDER = "ESP32_Sender"
+RECEIVER = "ESP32_Receiver"
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    ble = FakeBle()
+    sender = ble.add(SENDER, "AA:00:00:00:00:01", {CHARACTERISTIC_UUID_1: ["notify"]})
+    receiver = ble.add(RECEIVER, "AA:00:00:00:00:02", {CHARACTERISTIC_UUID_2: ["write-without-response"]})
+
+    cache_path = os.path.join(tempfile.mkdtemp(), "ble_cache.json")
+    supervisor = LinkSupervisor([SENDER, RECEIVER], cache_path=cache_path, min_backoff=args.backoff,
+                                max_backoff=2.0, scan_timeout=1.0, connect_timeout=1.0,
+                                client_factory=ble.client, scanner_factory=ble.scanner)
+    if not await supervisor.start():
+        raise SystemExit("fake devices did not connect")
+
+    writer = FrameWriter(supervisor[RECEIVER].client, CHARACTERISTIC_UUID_2, name=RECEIVER).start()
+    supervisor[RECEIVER].attach_writer(writer)
+
+    async def handle_notify(sender_handle, data):
+        writer.submit(data)
+
+    await supervisor[SENDER].subscribe(CHARACTERISTIC_UUID_1, handle_notify)
+
+    # After each receiver reconnect, note when the next frame lands and whether it is current
+    resumed = []
+    supervisor[RECEIVER].on_up(
+        lambda client: resumed.append((time.monotonic(), len(receiver.writes), writer.last_frame)))
+
+    async def stream():
+        tick = 0
+        while True:
+            payload = bytes((tick + i) & 0xFF for i in range(10))
+            sender.notify(CHARACTERISTIC_UUID_1, payload)
+            tick += 1
+            await asyncio.sleep(1 / args.rate)
+
+    drops = {SENDER: 0, RECEIVER: 0}
+
+    async def chaos():
+        while True:
+            await asyncio.sleep(rng.uniform(0.5, args.drop_every * 2 - 0.5))
+            peripheral = rng.choice((sender, receiver))
+            peripheral.drop(offline_for=rng.uniform(0.0, args.max_offline))
+            drops[peripheral.name] += 1
+
+    tasks = [asyncio.create_task(stream()), asyncio.create_task(chaos())]
+    await asyncio.sleep(args.seconds)
+    for task in tasks:
+        task.cancel()
+    await asyncio.sleep(args.backoff + 1.0)  # let outstanding reconnects settle
+
+    print(f"\n{args.seconds:.0f} s at {args.rate:.0f} Hz, drops: {drops}")
+    supervisor.report()
+
+    gaps = []
+    current = 0
+    for at, index, expected in resumed:
+        if index < len(receiver.writes):
+            written_at, _, data = receiver.writes[index]
+            gaps.append(written_at - at)
+            current += data == expected
+    if gaps:
+        print(f"first frame after a receiver reconnect: mean {sum(gaps) / len(gaps) * 1000:.1f} ms, "
+              f"max {max(gaps) * 1000:.1f} ms, latest state replayed {current}/{len(resumed)}")
+    print(f"writer: {writer.stats()}")
+
+    await writer.stop()
+    await supervisor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconnect soak test on the fake BLE backend')
+    parser.add_argument('--seconds', type=float, default=20.0)
+    parser.add_argument('--rate', type=float, default=100.0, help='Sender notifications per second')
+    parser.add_argument('--drop-every', type=float, default=2.0, help='Mean seconds between link drops')
+    parser.add_argument('--max-offline', type=float, default=1.5, help='Longest time a dropped device stays away')
+    parser.add_argument('--backoff', type=float, default=0.2, help='First reconnect backoff in seconds')
+    parser.add_argument('--seed', type=int, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Microbenchmark for the ESP32_Sender -> ESP32_Receiver relay path.
+
+Pushes notifications through the original bytearray slicing approach from
+handle_notify and through FrameRing, with the BLE write replaced by a sink
+that only touches the frame. Bursts simulate notifications piling up while a
+write is in flight, which is where the slicing approach goes quadratic.
+
+    python bench_relay.py --notifications 1000000 --burst 1 --burst 64
+"""
+import argparse
+import time
+
+from ring_buffer import FrameRing
+
+
+def make_notifications(count, size):
+    """Build `count` fake sender notifications of `size` bytes each."""
+    payloads = [bytearray((i + j) & 0xFF for j in range(size)) for i in range(256)]
+    return [payloads[i & 0xFF] for i in range(count)]
+
+
+def relay_slicing(notifications, burst):
+    """Original handle_notify buffering: slice the head off and prepend 0xAA."""
+    data_buffer = bytearray()
+    sent = 0
+    for i, data in enumerate(notifications, 1):
+        data_buffer.extend(data)
+        if i % burst:
+            continue
+        while len(data_buffer) >= 10:
+            chunk = data_buffer[:10]
+            data_buffer = data_buffer[10:]
+            framed_data = bytes([0xAA]) + chunk
+            sent += framed_data[0]
+    return sent // 0xAA
+
+
+def relay_ring(notifications, burst):
+    """FrameRing buffering: write into pre-framed slots, pop memoryviews."""
+    ring = FrameRing(slots=max(64, burst * 4))
+    sent = 0
+    for i, data in enumerate(notifications, 1):
+        ring.write(data)
+        if i % burst:
+            continue
+        for framed_data in ring.frames():
+            sent += framed_data[0]
+    return sent // 0xAA
+
+
+def run(name, relay, notifications, burst):
+    start = time.perf_counter()
+    frames = relay(notifications, burst)
+    elapsed = time.perf_counter() - start
+    print(f"{name:>8}  burst={burst:<5} frames={frames:<9} "
+          f"{elapsed:8.3f} s  {len(notifications) / elapsed / 1e6:6.2f} M notifications/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the BLE relay buffering')
+    parser.add_argument('--notifications', type=int, default=1_000_000, help='Number of notifications to push')
+    parser.add_argument('--size', type=int, default=10, help='Bytes per notification')
+    parser.add_argument('--burst', type=int, action='append', help='Notifications queued before draining (repeatable)')
+    args = parser.parse_args()
+
+    notifications = make_notifications(args.notifications, args.size)
+    for burst in args.burst or [1, 16, 256]:
+        slicing = run("slicing", relay_slicing, notifications, burst)
+        ring = run("ring", relay_ring, notifications, burst)
+        print(f"{'':>8}  speedup x{slicing / ring:.2f}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Per-frame render time of the old clear-and-rebuild draw_combined_visual versus
+the blitted HapticRenderer.
+
+Runs headless on Agg by default; pass --backend TkAgg (or QtAgg, ...) to
+measure with a real window.
+
+    python bench_render.py --frames 300
+"""
+import argparse
+import time
+
+import matplotlib
+
+
+def legacy_draw(fig, ax_row1, ax_haptics, joint_angles_rad, motor_values, colors):
+    """draw_combined_visual as it was: clear every axis and rebuild all artists."""
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    for i, (ax, angle) in enumerate(zip(ax_row1, joint_angles_rad)):
+        ax.clear()
+        ax.set_theta_zero_location('N')
+        ax.set_theta_direction(-1)
+        ax.set_rticks([])
+        ax.set_xticks(np.linspace(-np.pi, np.pi, 5))
+        ax.set_xticklabels([r"$-\pi$", r"$-\frac{\pi}{2}$", "0", r"$\frac{\pi}{2}$", r"$\pi$"])
+        ax.bar(np.linspace(-np.pi, np.pi, 100), [1]*100, width=0.06, color='#eee', alpha=0.3)
+        ax.bar([angle], [1], width=0.15, color='C0')
+        ax.set_title(f"Joint {i+1}\n{angle:.2f} rad", va='bottom')
+
+    ax_haptics.clear()
+    ax_haptics.set_xlim(0, 10)
+    ax_haptics.set_ylim(0, 1)
+    ax_haptics.axis('off')
+    ax_haptics.set_title("Haptic Motor Feedback", fontsize=14)
+    for i, (val, color) in enumerate(zip(motor_values, colors)):
+        radius = 0.1 + (val / 255.0) * 0.3
+        ax_haptics.add_patch(plt.Circle((i + 0.5, 0.5), radius, color=color))
+        ax_haptics.text(i + 0.5, 0.05, f"{val}", ha='center', va='center', fontsize=9)
+
+    fig.canvas.draw()
+    fig.canvas.flush_events()
+
+
+def make_frames(count):
+    import numpy as np
+
+    t = np.linspace(0, 4 * np.pi, count)
+    angles = np.stack([np.sin(t + k) * 3.0 for k in range(4)], axis=1)
+    motors = ((np.sin(t[:, None] + np.arange(10)) + 1) * 127).astype(int)
+    return angles.tolist(), motors.tolist()
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    mean = sum(timings) / len(timings)
+    p50 = timings[len(timings) // 2]
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{name:>8}: mean {mean * 1e3:7.2f} ms  p50 {p50 * 1e3:7.2f} ms  "
+          f"p99 {p99 * 1e3:7.2f} ms  -> {1 / mean:7.1f} FPS")
+    return mean
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark draw_combined_visual rendering')
+    parser.add_argument('--frames', type=int, default=200, help='Frames to render per variant')
+    parser.add_argument('--backend', default='Agg', help='Matplotlib backend to render with')
+    args = parser.parse_args()
+
+    matplotlib.use(args.backend)
+    import matplotlib.pyplot as plt
+    from haptic_renderer import COLORS, HapticRenderer
+
+    angles, motors = make_frames(args.frames)
+
+    fig = plt.figure(figsize=(14, 7))
+    gs = fig.add_gridspec(2, 4, height_ratios=[2, 1])
+    ax_row1 = [fig.add_subplot(gs[0, i], projection='polar') for i in range(4)]
+    ax_haptics = fig.add_subplot(gs[1, :])
+    legacy = []
+    for joint_angles, motor_values in zip(angles, motors):
+        start = time.perf_counter()
+        legacy_draw(fig, ax_row1, ax_haptics, joint_angles, motor_values, COLORS)
+        legacy.append(time.perf_counter() - start)
+    plt.close(fig)
+
+    renderer = HapticRenderer()
+    renderer.update(angles[0], motors[0])  # first frame does the one-off full draw
+    blitted = []
+    for joint_angles, motor_values in zip(angles, motors):
+        start = time.perf_counter()
+        renderer.update(joint_angles, motor_values, status="benchmark")
+        blitted.append(time.perf_counter() - start)
+
+    print(f"backend {matplotlib.get_backend()}, {args.frames} frames")
+    before = report("before", legacy)
+    after = report("after", blitted)
+    print(f"{'':>8}  speedup x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Finding and connecting to the ESP32s by advertised name.
+
+A full `BleakScanner.discover()` always waits out its timeout even when the
+devices answered in the first few hundred milliseconds. The scanner here
+uses a detection callback and stops as soon as every wanted name has been
+seen. The addresses it finds are kept in a small JSON cache, so the next
+start connects straight to the last-known address and only scans when that
+fails (device moved, address rotated, not advertising yet).
+
+    clients = await connect_devices(["ESP32_Sender", "ESP32_Receiver"])
+
+Every vest advertises the same name, so several receivers are told apart by
+address instead: `scan_matching` finds all devices whose name matches a
+pattern (see fanout.py).
+"""
+import asyncio
+import fnmatch
+import json
+import os
+import time
+
+from bleak import BleakClient, BleakScanner
+from bleak.exc import BleakError
+
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".droctopus_ble_cache.json")
+
+SCAN_TIMEOUT = 10.0
+CONNECT_TIMEOUT = 10.0
+# A cached address that doesn't answer quickly is probably stale; scan instead
+CACHED_CONNECT_TIMEOUT = 4.0
+
+
+def load_cache(path=CACHE_PATH):
+    """Return the cached {name: address} map, empty if there is none or it is unreadable."""
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_cache(addresses, path=CACHE_PATH):
+    """Merge {name: address} into the cache; names mapped to None are forgotten."""
+    cache = load_cache(path)
+    for name, address in addresses.items():
+        if address is None:
+            cache.pop(name, None)
+        else:
+            cache[name] = address
+    try:
+        with open(path, "w") as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        print(f"Could not write BLE address cache {path}: {e}")
+
+
+async def scan(names, timeout=SCAN_TIMEOUT, scanner_factory=BleakScanner):
+    """
+    Scan until every name in `names` has advertised, or until `timeout`.
+
+    `scanner_factory` stands in for BleakScanner, e.g. to scan a fake backend.
+
+    Returns:
+        dict: {name: BLEDevice} for the names that were seen.
+    """
+    wanted = set(names)
+    found = {}
+    done = asyncio.Event()
+
+    def on_detect(device, advertisement_data):
+        name = advertisement_data.local_name or device.name
+        if name in wanted and name not in found:
+            found[name] = device
+            if len(found) == len(wanted):
+                done.set()
+
+    async with scanner_factory(detection_callback=on_detect):
+        try:
+            await asyncio.wait_for(done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+    return found
+
+
+async def scan_matching(pattern, timeout=SCAN_TIMEOUT, count=None, exclude=(), scanner_factory=BleakScanner):
+    """
+    Scan for every device whose advertised name matches a glob pattern.
+
+    Without `count` the scan runs for the whole timeout, since there is no
+    telling how many devices are out there; with it, the scan stops as soon
+    as that many have been seen.
+
+    Args:
+        pattern (str): fnmatch-style pattern, e.g. "ESP32_Receiver*".
+        timeout (float): give up scanning after this many seconds.
+        count (int): stop after this many matching devices, None to scan until the timeout.
+        exclude (iterable): addresses to ignore, e.g. devices already connected.
+
+    Returns:
+        dict: {address: BLEDevice} for the matching devices that were seen.
+    """
+    exclude = set(exclude)
+    found = {}
+    done = asyncio.Event()
+
+    def on_detect(device, advertisement_data):
+        name = advertisement_data.local_name or device.name
+        if name is None or device.address in exclude or device.address in found:
+            return
+        if fnmatch.fnmatchcase(name, pattern):
+            found[device.address] = device
+            if count is not None and len(found) >= count:
+                done.set()
+
+    async with scanner_factory(detection_callback=on_detect):
+        try:
+            await asyncio.wait_for(done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+    return found
+
+
+async def timed(stage, awaitable, timings, timeout=None):
+    """Await with an optional timeout, recording the elapsed seconds in timings[stage]."""
+    started = time.monotonic()
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    finally:
+        timings[stage] = time.monotonic() - started
+
+
+def format_timings(timings):
+    return ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in timings.items())
+
+
+async def connect_target(target, timeout, client_factory=BleakClient, disconnected_callback=None):
+    """Connect to an address or BLEDevice; returns the client, or None on failure."""
+    client = client_factory(target, disconnected_callback=disconnected_callback, timeout=timeout)
+    try:
+        await asyncio.wait_for(client.connect(), timeout)
+    except (BleakError, asyncio.TimeoutError, OSError) as e:
+        print(f"Could not connect to {getattr(target, 'address', target)}: {e}")
+        return None
+    return client
+
+
+async def connect_devices(names, scan_timeout=SCAN_TIMEOUT, connect_timeout=CONNECT_TIMEOUT,
+                          cached_connect_timeout=CACHED_CONNECT_TIMEOUT, use_cache=True, cache_path=CACHE_PATH,
+                          timings=None, disconnected_callback=None, client_factory=BleakClient,
+                          scanner_factory=BleakScanner):
+    """
+    Connect to every device in `names`, from the cache where possible.
+
+    Cached addresses are tried first (concurrently); whatever is left is found
+    with a single early-exit scan and then connected. Successful addresses are
+    written back to the cache, stale ones are removed from it.
+
+    Args:
+        names (list): advertised device names.
+        scan_timeout (float): give up scanning after this many seconds.
+        connect_timeout (float): per-connection timeout after a scan.
+        cached_connect_timeout (float): per-connection timeout for cached addresses.
+        use_cache (bool): ignore cached addresses and always scan when False;
+            the cache is still refreshed with what the scan found.
+        cache_path (str): location of the JSON address cache.
+        timings (dict): if given, filled with seconds spent per stage
+            ("ble cached connect", "ble scan", "ble connect").
+        disconnected_callback (callable): passed to every BleakClient created.
+        client_factory, scanner_factory: BleakClient and BleakScanner, or
+            stand-ins with the same interface (see fake_ble.py).
+
+    Returns:
+        dict: {name: connected BleakClient}; names that could not be reached
+        are missing, and the caller disconnects the clients it got.
+    """
+    clients = {}
+    timings = {} if timings is None else timings
+    cache = load_cache(cache_path) if use_cache else {}
+    updates = {}
+
+    cached = [name for name in names if name in cache]
+    if cached:
+        print(f"Connecting to cached addresses: {', '.join(f'{n} at {cache[n]}' for n in cached)}")
+        attempts = [connect_target(cache[name], cached_connect_timeout, client_factory, disconnected_callback)
+                    for name in cached]
+        results = await timed("ble cached connect", asyncio.gather(*attempts), timings)
+        for name, client in zip(cached, results):
+            if client is not None:
+                clients[name] = client
+            else:
+                updates[name] = None
+
+    missing = [name for name in names if name not in clients]
+    if missing:
+        print(f"Scanning for {', '.join(missing)}...")
+        devices = await timed("ble scan", scan(missing, scan_timeout, scanner_factory), timings)
+        print(f"Scan finished in {timings['ble scan']:.2f} s, found {sorted(devices) or 'nothing'}")
+        found = [name for name in missing if name in devices]
+        attempts = [connect_target(devices[name], connect_timeout, client_factory, disconnected_callback)
+                    for name in found]
+        results = await timed("ble connect", asyncio.gather(*attempts), timings)
+        for name, client in zip(found, results):
+            if client is not None:
+                clients[name] = client
+
+    for name, client in clients.items():
+        updates[name] = client.address
+    if updates:
+        save_cache(updates, cache_path)
+    return clients
+
+
+async def disconnect_all(clients):
+    """Disconnect every client in a {name: client} map, ignoring ones already gone."""
+    await asyncio.gather(*(client.disconnect() for client in clients.values()), return_exceptions=True)
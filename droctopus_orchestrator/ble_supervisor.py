@@ -0,0 +1,275 @@
+"""
+Keeps the ESP32 BLE links up for the whole session.
+
+bleak reports a dropped connection through the client's disconnected
+callback. The supervisor then reconnects in the background with
+exponential backoff. Each attempt goes through ble_discovery, so it tries
+the cached address first and falls back to a scan. Once a link is back,
+the supervisor restores its notification subscriptions and runs its
+resume hooks. That is where a FrameWriter swaps in the new client and
+replays the latest motor frame.
+
+    supervisor = LinkSupervisor(["ESP32_Sender", "ESP32_Receiver"])
+    await supervisor.start()
+    await supervisor["ESP32_Sender"].subscribe(CHARACTERISTIC_UUID_1, handle_notify)
+    supervisor["ESP32_Receiver"].attach_writer(writer2)
+
+Several vests that all advertise as ESP32_Receiver are added with
+`add_matching`; each becomes a link named by its address and reconnects
+straight to that address.
+"""
+import asyncio
+import time
+
+from bleak import BleakClient, BleakScanner
+
+from ble_discovery import (CACHE_PATH, CACHED_CONNECT_TIMEOUT, CONNECT_TIMEOUT, SCAN_TIMEOUT, connect_devices,
+                           connect_target, disconnect_all, load_cache, save_cache, scan_matching, timed)
+
+
+class Link:
+    """One supervised connection; `client` is None while it is down."""
+
+    def __init__(self, name):
+        self.name = name
+        self.client = None
+        self.up = asyncio.Event()
+        self.reconnects = 0
+        self.downtime = 0.0  # seconds spent disconnected, finished outages only
+        self.down_since = None
+        self._subscriptions = []
+        self._down_hooks = []
+        self._up_hooks = []
+
+    @property
+    def address(self):
+        return self.client.address if self.client is not None else None
+
+    def current_downtime(self):
+        """Total downtime including an outage that is still going on."""
+        if self.down_since is None:
+            return self.downtime
+        return self.downtime + time.monotonic() - self.down_since
+
+    async def subscribe(self, char_uuid, callback):
+        """start_notify now, and again after every reconnect."""
+        self._subscriptions.append((char_uuid, callback))
+        if self.client is not None:
+            await self.client.start_notify(char_uuid, callback)
+
+    def on_down(self, hook):
+        """Call hook() as soon as the link drops."""
+        self._down_hooks.append(hook)
+
+    def on_up(self, hook):
+        """Call hook(client) after a reconnect, once subscriptions are restored."""
+        self._up_hooks.append(hook)
+
+    def attach_writer(self, writer):
+        """Pause a FrameWriter while down; resume it on the new client and replay its last frame."""
+        self.on_down(writer.pause)
+        self.on_up(writer.resume)
+
+
+class LinkSupervisor:
+    """Connects a set of named devices and reconnects any of them that drop."""
+
+    def __init__(self, names, use_cache=True, cache_path=CACHE_PATH, min_backoff=0.5, max_backoff=10.0,
+                 scan_timeout=SCAN_TIMEOUT, connect_timeout=CONNECT_TIMEOUT,
+                 client_factory=BleakClient, scanner_factory=BleakScanner):
+        """
+        Args:
+            names (list): advertised names of the devices to keep connected.
+            use_cache (bool): try cached addresses before scanning, at startup only;
+                reconnects always start from the cache.
+            cache_path (str): location of the JSON address cache.
+            min_backoff, max_backoff (float): seconds between reconnect attempts,
+                doubling from min to max while a device stays away.
+            scan_timeout, connect_timeout (float): passed on to connect_devices.
+            client_factory, scanner_factory: BleakClient and BleakScanner, or a
+                fake backend (see fake_ble.py).
+        """
+        self.links = {name: Link(name) for name in names}
+        self.addresses = {}  # link name -> fixed address, for links added by add_matching
+        self.use_cache = use_cache
+        self.cache_path = cache_path
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.scan_timeout = scan_timeout
+        self.connect_timeout = connect_timeout
+        self.client_factory = client_factory
+        self.scanner_factory = scanner_factory
+
+        self._loop = None
+        self._tasks = {}
+        self._closing = False
+
+    def __getitem__(self, name):
+        return self.links[name]
+
+    @property
+    def connected(self):
+        return all(link.client is not None for link in self.links.values())
+
+    def clients(self):
+        return {name: link.client for name, link in self.links.items() if link.client is not None}
+
+    def _connect_options(self, use_cache, timings=None):
+        return dict(scan_timeout=self.scan_timeout, connect_timeout=self.connect_timeout, use_cache=use_cache,
+                    cache_path=self.cache_path, timings=timings, disconnected_callback=self._on_disconnect,
+                    client_factory=self.client_factory, scanner_factory=self.scanner_factory)
+
+    async def start(self, timings=None):
+        """Connect every device once; returns True if all of them came up."""
+        self._loop = asyncio.get_running_loop()
+        clients = await connect_devices(list(self.links), **self._connect_options(self.use_cache, timings))
+        for name, client in clients.items():
+            link = self.links[name]
+            link.client = client
+            link.up.set()
+        return self.connected
+
+    async def add_matching(self, pattern, count=None, timings=None):
+        """
+        Connect every device whose name matches `pattern`, each as its own link.
+
+        The links are named by address, since all vests advertise the same
+        name. Addresses found last time are tried first; a scan then looks for
+        the rest, stopping early once `count` devices are connected. The
+        addresses are cached under the pattern for the next start.
+
+        Args:
+            pattern (str): fnmatch-style name pattern, e.g. "ESP32_Receiver*".
+            count (int): how many devices to expect, None to scan for the whole scan timeout.
+            timings (dict): if given, filled with "vests cached connect", "vests scan" and "vests connect".
+
+        Returns:
+            list: the new Links, in the order they connected.
+        """
+        self._loop = asyncio.get_running_loop()
+        timings = {} if timings is None else timings
+        known = {link.address for link in self.links.values()} | set(self.addresses.values())
+        clients = {}
+
+        async def connect_all(targets, timeout, stage):
+            attempts = [connect_target(target, timeout, self.client_factory, self._on_disconnect)
+                        for target in targets.values()]
+            results = await timed(stage, asyncio.gather(*attempts), timings)
+            for address, client in zip(targets, results):
+                if client is not None:
+                    clients[address] = client
+
+        cache_key = f"match:{pattern}"
+        cached = load_cache(self.cache_path).get(cache_key, []) if self.use_cache else []
+        cached = [address for address in cached if address not in known]
+        if cached:
+            print(f"Connecting to cached {pattern} addresses: {', '.join(cached)}")
+            await connect_all({address: address for address in cached}, CACHED_CONNECT_TIMEOUT, "vests cached connect")
+
+        if count is None or len(clients) < count:
+            wanted = None if count is None else count - len(clients)
+            print(f"Scanning for {pattern}...")
+            devices = await timed("vests scan", scan_matching(pattern, self.scan_timeout, wanted, known | set(clients),
+                                                            self.scanner_factory), timings)
+            print(f"Scan finished in {timings['vests scan']:.2f} s, found {sorted(devices) or 'nothing'}")
+            await connect_all(devices, self.connect_timeout, "vests connect")
+
+        links = []
+        for address, client in clients.items():
+            link = Link(address)
+            link.client = client
+            link.up.set()
+            self.links[address] = link
+            self.addresses[address] = address
+            links.append(link)
+        if clients:
+            save_cache({cache_key: sorted(set(self.addresses.values()))}, self.cache_path)
+        return links
+
+    def _on_disconnect(self, client):
+        for link in self.links.values():
+            if link.client is client:
+                break
+        else:
+            return  # a client being torn down during a reconnect attempt
+        if self._closing:
+            return
+
+        link.client = None
+        link.up.clear()
+        if link.down_since is None:
+            link.down_since = time.monotonic()
+        print(f"[{link.name}] disconnected, reconnecting...")
+        for hook in link._down_hooks:
+            hook()
+
+        task = self._tasks.get(link.name)
+        if task is None or task.done():
+            self._tasks[link.name] = self._loop.create_task(self._reconnect(link))
+
+    async def _connect_once(self, link):
+        """One attempt: connect and restore subscriptions; returns the client or None."""
+        if link.name in self.addresses:
+            client = await connect_target(self.addresses[link.name], self.connect_timeout, self.client_factory,
+                                          self._on_disconnect)
+        else:
+            clients = await connect_devices([link.name], **self._connect_options(True))
+            client = clients.get(link.name)
+        if client is None:
+            return None
+        link.client = client
+        try:
+            for char_uuid, callback in link._subscriptions:
+                await client.start_notify(char_uuid, callback)
+        except Exception as e:
+            print(f"[{link.name}] could not restore notifications: {e}")
+            link.client = None
+            await disconnect_all({link.name: client})
+            return None
+        if link.client is not client:
+            return None  # dropped again straight away
+        return client
+
+    async def _reconnect(self, link):
+        delay = self.min_backoff
+        while not self._closing:
+            client = await self._connect_once(link)
+            if client is None:
+                print(f"[{link.name}] reconnect failed, retrying in {delay:.1f} s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+                continue
+
+            outage = time.monotonic() - link.down_since
+            link.downtime += outage
+            link.down_since = None
+            link.reconnects += 1
+            link.up.set()
+            print(f"[{link.name}] reconnected after {outage:.2f} s "
+                  f"({link.reconnects} reconnects, {link.downtime:.1f} s down in total)")
+            for hook in link._up_hooks:
+                result = hook(client)
+                if asyncio.iscoroutine(result):
+                    await result
+            if link.client is not None:
+                return
+            delay = self.min_backoff  # dropped again while the hooks ran
+
+    def stats(self):
+        """{name: {"connected", "reconnects", "downtime"}} for every link."""
+        return {name: {"connected": link.client is not None,
+                       "reconnects": link.reconnects,
+                       "downtime": link.current_downtime()}
+                for name, link in self.links.items()}
+
+    def report(self):
+        for name, link in self.links.items():
+            print(f"[{name}] {link.reconnects} reconnects, {link.current_downtime():.1f} s down")
+
+    async def close(self):
+        """Stop reconnecting and disconnect everything."""
+        self._closing = True
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        await disconnect_all(self.clients())
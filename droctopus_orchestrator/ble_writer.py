@@ -0,0 +1,276 @@
+"""
+Background GATT writer for the ESP32_Receiver motor characteristic.
+
+Senders call `submit(frame)` and return immediately; a single task owns the
+characteristic and pushes frames out as fast as the link allows. When the
+link falls behind, stale intermediate frames are dropped because only the
+latest motor state matters to the vest.
+
+While the link is down (see ble_supervisor.py) the writer is paused and keeps
+only the newest frame; on resume it writes that, or replays the last frame
+it was given, so the vest never sits on a stale state after a reconnect.
+
+`max_rate` caps the frames per second written to one vest; frames submitted
+faster than that are coalesced like frames that arrive while the link is busy.
+
+Every frame carries time.monotonic_ns() from submit(), and optionally an
+earlier origin timestamp (e.g. the BLE notification or keypress it came
+from); when it is written, write_latency and origin_latency (latency.py
+histograms) record how long that took.
+"""
+import asyncio
+import time
+from collections import deque
+
+from latency import LatencyHistogram, seconds
+
+
+class FrameWriter:
+    """Owns one writable characteristic and drains a bounded frame queue into it."""
+
+    def __init__(self, client, char_uuid, maxsize=8, coalesce=True, report_interval=None, name="ESP32_Receiver",
+                 encode=None, started_at=None, max_rate=None):
+        """
+        Args:
+            client (BleakClient): connected client for the receiver.
+            char_uuid (str): characteristic the frames are written to.
+            maxsize (int): frames kept queued before the oldest is dropped.
+            coalesce (bool): when several frames are queued, only write the newest.
+            report_interval (float): seconds between printed stats, None to stay quiet.
+            name (str): label used in the printed stats.
+            encode (callable): optional payload -> wire bytes (or None to skip) applied
+                when a frame is actually written, so stateful encoders such as
+                delta compression only ever see frames that reach the link.
+            started_at (float): time.monotonic() when the program started; the
+                startup-to-first-frame delay is printed and kept in first_frame_latency.
+            max_rate (float): most frames per second written, None for as fast as the link allows.
+        """
+        self.client = client
+        self.char_uuid = char_uuid
+        self.coalesce = coalesce
+        self.report_interval = report_interval
+        self.name = name
+        self.encode = encode
+        self.started_at = started_at
+        self.first_frame_latency = None
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+
+        self._queue = deque(maxlen=maxsize)  # (frame, monotonic_ns when submitted, origin monotonic_ns or None)
+        self._ready = asyncio.Event()
+        self._room = asyncio.Event()  # set whenever frames leave the queue or the writer stops making progress
+        self._idle = asyncio.Event()  # set whenever the writer runs out of frames or stops making progress
+        self._task = None
+        self._response = True
+        self._writing = False
+        self._online = asyncio.Event()
+        self._online.set()
+        self.last_frame = None  # newest frame submitted, replayed on resume
+
+        self.sent = 0
+        self.dropped = 0
+        self.skipped = 0  # frames the encoder decided not to send
+        self.errors = 0  # writes that failed, e.g. because the link dropped
+        self.bytes_sent = 0
+        self.fps = 0.0
+        self.bytes_per_sec = 0.0
+        self.write_latency = LatencyHistogram()  # ns from submit() until the write returned
+        self.origin_latency = LatencyHistogram()  # ns from the origin passed to submit() until the write returned
+        self._window_start = time.monotonic()
+        self._window_sent = 0
+        self._window_bytes = 0
+
+    @property
+    def depth(self):
+        """Frames currently waiting to be written."""
+        return len(self._queue)
+
+    @property
+    def online(self):
+        return self._online.is_set()
+
+    def _detect_write_mode(self):
+        char = self.client.services.get_characteristic(self.char_uuid)
+        self._response = not (char is not None and "write-without-response" in char.properties)
+
+    def start(self):
+        """Pick the write mode from the characteristic properties and start the writer task."""
+        self._detect_write_mode()
+        self._window_start = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(self._stopped)
+        return self
+
+    def _stopped(self, task):
+        self._room.set()
+        self._idle.set()
+
+    def pause(self):
+        """Stop writing until resume(); submitted frames are still coalesced meanwhile."""
+        self._online.clear()
+        self._room.set()
+        self._idle.set()
+
+    def resume(self, client=None, replay=True):
+        """
+        Continue writing, optionally through a new client after a reconnect.
+
+        Args:
+            client (BleakClient): the reconnected client, None to keep the old one.
+            replay (bool): re-send the last frame if nothing newer is queued.
+        """
+        if client is not None:
+            self.client = client
+            self._detect_write_mode()
+        if replay and not self._queue and self.last_frame is not None:
+            self._queue.append((self.last_frame, time.monotonic_ns(), None))
+        self._online.set()
+        self._ready.set()
+
+    async def stop(self):
+        """Cancel the writer task, dropping anything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def submit(self, frame, origin_ns=None):
+        """
+        Queue a frame for writing without waiting for the link.
+
+        The frame is copied, so callers may pass a view into a buffer they are
+        about to reuse. If the writer task has died, its exception is raised here.
+
+        Args:
+            frame (bytes-like): payload, encoded on write if the writer has an encoder.
+            origin_ns (int): time.monotonic_ns() of the event this frame answers;
+                the origin-to-write time goes into origin_latency.
+        """
+        if self._task is not None and self._task.done():
+            self._task.result()
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        frame = bytes(frame)
+        self.last_frame = frame
+        self._queue.append((frame, time.monotonic_ns(), origin_ns))
+        self._ready.set()
+
+    async def wait_for_room(self, limit=1):
+        """
+        Wait until fewer than `limit` frames are queued, or until the writer is offline or stopped.
+
+        With the default limit this waits for the queue to empty, so the next submit() cannot
+        coalesce the previous frame away.
+        """
+        while len(self._queue) >= limit and self.online and self._task is not None and not self._task.done():
+            self._room.clear()
+            await self._room.wait()
+
+    async def flush(self):
+        """Wait until every queued frame has been written or dropped."""
+        while (self._queue or self._writing) and self.online and self._task is not None and not self._task.done():
+            self._idle.clear()
+            await self._idle.wait()
+
+    def latency_percentile(self, p):
+        """Submit-to-write latency in seconds at percentile p (0..1), None before any frame."""
+        return seconds(self.write_latency.percentile(p))
+
+    def publish_latency(self, metrics, stage="ble write", origin_stage=None):
+        """Add write_latency (and origin_latency) to a latency.LatencyStats under the given stage names."""
+        metrics.add(stage, self.write_latency)
+        if origin_stage:
+            metrics.add(origin_stage, self.origin_latency)
+
+    def stats(self):
+        """Snapshot of the writer counters."""
+        return {
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "depth": self.depth,
+            "fps": self.fps,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "online": self.online,
+            "bytes_sent": self.bytes_sent,
+            "bytes_per_sec": self.bytes_per_sec,
+            "first_frame_latency": self.first_frame_latency,
+            "latency_p50": self.latency_percentile(0.5),
+            "latency_p99": self.latency_percentile(0.99),
+        }
+
+    def _update_rate(self):
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < (self.report_interval or 1.0):
+            return
+        self.fps = self._window_sent / elapsed
+        self.bytes_per_sec = self._window_bytes / elapsed
+        self._window_start = now
+        self._window_sent = 0
+        self._window_bytes = 0
+        if self.report_interval:
+            print(f"[{self.name}] {self.fps:.1f} frames/s, {self.bytes_per_sec:.0f} B/s, queue {self.depth}, "
+                  f"sent {self.sent}, dropped {self.dropped}, skipped {self.skipped}")
+
+    async def _run(self):
+        queue = self._queue
+        next_write = 0.0
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            await self._online.wait()
+
+            while queue and self.online:
+                delay = next_write - time.monotonic()
+                if delay > 0:
+                    # Rate limited; whatever is submitted meanwhile gets coalesced below
+                    await asyncio.sleep(delay)
+                    if not self.online:
+                        break
+
+                if self.coalesce and len(queue) > 1:
+                    self.dropped += len(queue) - 1
+                    frame, submitted_ns, origin_ns = queue.pop()
+                    queue.clear()
+                else:
+                    frame, submitted_ns, origin_ns = queue.popleft()
+                self._room.set()
+
+                if self.encode is not None:
+                    frame = self.encode(frame)
+                    if frame is None:
+                        self.skipped += 1
+                        continue
+
+                self._writing = True
+                try:
+                    await self.client.write_gatt_char(self.char_uuid, frame, response=self._response)
+                except Exception as e:
+                    self.errors += 1
+                    if self.client.is_connected:
+                        raise
+                    # The link went away mid-write; wait for the supervisor to resume us
+                    print(f"[{self.name}] write failed, link down: {e}")
+                    self._online.clear()
+                    self._room.set()
+                    continue
+                finally:
+                    self._writing = False
+                now_ns = time.monotonic_ns()
+                next_write = now_ns / 1e9 + self.min_interval
+                self.write_latency.record(now_ns - submitted_ns)
+                if origin_ns is not None:
+                    self.origin_latency.record(now_ns - origin_ns)
+                if not self.sent and self.started_at is not None:
+                    self.first_frame_latency = time.monotonic() - self.started_at
+                    print(f"[{self.name}] first frame {self.first_frame_latency * 1000:.0f} ms after startup")
+                self.sent += 1
+                self.bytes_sent += len(frame)
+                self._window_sent += 1
+                self._window_bytes += len(frame)
+                self._update_rate()
+            # Out of frames, or offline until resume()
+            self._idle.set()
@@ -0,0 +1,233 @@
+"""
+Operator input for the vest that never blocks the event loop.
+
+A LineReader reads stdin (or a file) on its own thread and hands lines to
+the event loop in batches, so BLE keepalives and notifications carry on
+while the operator thinks, and a file piped in is read no faster than the
+vest takes it.
+
+Each line holds one or more commands separated by ";":
+
+    0 0 255 0 0 0 0 0 0 0               a frame: 10 motor values 0-255
+    255 0 0 0 0 0 0 0 0 0 @200ms         a frame held for 200 ms before the next command
+    all 128 @1s                          every motor at 128
+    off                                  every motor at 0
+    wait 500ms                           a pause; durations are 250ms, 0.25s or 0.25
+    repeat 3: all 255 @100ms; off @100ms the rest of the line, three times
+    # comment
+
+Frames without a duration go out back to back at the rate the link takes
+them; held frames and waits are timed against absolute deadlines, so a long
+script does not drift.
+
+    player = CommandPlayer(send, ready)
+    async for line in LineReader(prompt="> ").lines():
+        await player.run(parse_line(line))
+"""
+import asyncio
+import math
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+from haptic_mapping import NUM_MOTORS
+
+# Falling further behind a deadline than this (e.g. while waiting for the operator) starts a new timeline
+RESYNC_AFTER = 0.1
+
+
+class Frame(NamedTuple):
+    values: bytes  # NUM_MOTORS motor values
+    hold: float  # seconds before the next command, 0 to go straight on
+
+
+class Wait(NamedTuple):
+    seconds: float
+
+
+class Repeat(NamedTuple):
+    count: int
+    commands: tuple  # Frame/Wait, played `count` times without being copied
+
+
+def parse_duration(text):
+    """Seconds in "250ms", "0.25s" or "0.25"."""
+    text = text.strip().lower()
+    try:
+        if text.endswith("ms"):
+            seconds = float(text[:-2]) / 1000
+        elif text.endswith("s"):
+            seconds = float(text[:-1])
+        else:
+            seconds = float(text)
+    except ValueError:
+        raise ValueError(f"Bad duration {text!r}, use e.g. 250ms or 0.25s") from None
+    if not math.isfinite(seconds) or seconds < 0:
+        raise ValueError(f"Bad duration {text!r}, use e.g. 250ms or 0.25s")
+    return seconds
+
+
+def _motor_value(word):
+    try:
+        value = int(word)
+    except ValueError:
+        raise ValueError("Please enter only valid integers.") from None
+    if not 0 <= value <= 255:
+        raise ValueError("Integers must be between 0 and 255.")
+    return value
+
+
+def parse_command(text):
+    """One command (no ";"), as a Frame or a Wait."""
+    text, at, duration = text.partition("@")
+    hold = parse_duration(duration) if at else 0.0
+    words = text.split()
+    keyword = words[0].lower() if words else ""
+
+    if keyword == "wait":
+        if len(words) != 2 or at:
+            raise ValueError("Use wait <duration>, e.g. wait 500ms")
+        return Wait(parse_duration(words[1]))
+    if keyword == "off":
+        if len(words) != 1:
+            raise ValueError("off takes no values")
+        return Frame(bytes(NUM_MOTORS), hold)
+    if keyword == "all":
+        if len(words) != 2:
+            raise ValueError("Use all <value>, e.g. all 128")
+        return Frame(bytes((_motor_value(words[1]),) * NUM_MOTORS), hold)
+    if len(words) != NUM_MOTORS:
+        raise ValueError(f"You must enter exactly {NUM_MOTORS} integers.")
+    return Frame(bytes([_motor_value(word) for word in words]), hold)
+
+
+def parse_line(line):
+    """
+    Parse a line of ";"-separated commands.
+
+    Returns:
+        list of Frame/Wait, or a single Repeat; empty for blank and comment lines.
+
+    Raises:
+        ValueError: with a message for the operator if anything on the line is invalid.
+    """
+    line = line.split("#", 1)[0].strip()
+    if not line:
+        return []
+    count = None
+    if line[:6].lower() == "repeat":
+        head, colon, line = line.partition(":")
+        words = head.split()
+        if not colon or len(words) != 2 or not words[1].isdigit():
+            raise ValueError("Use repeat <count>: <commands>, e.g. repeat 3: all 255 @100ms; off @100ms")
+        count = int(words[1])
+    commands = [parse_command(part) for part in line.split(";") if part.strip()]
+    if count is None:
+        return commands
+    return [Repeat(count, tuple(commands))] if count and commands else []
+
+
+class LineReader:
+    """Reads lines from a text stream on a daemon thread and delivers them on the event loop."""
+
+    def __init__(self, stream=None, prompt=None, batch_bytes=16384, max_batches=4):
+        """
+        Args:
+            stream (file): text stream to read, stdin by default.
+            prompt (str): shown before each line when the stream is a terminal.
+            batch_bytes (int): roughly how much a non-interactive stream is read at a time.
+            max_batches (int): batches read ahead before the thread waits for the loop to catch up.
+        """
+        self.stream = stream if stream is not None else sys.stdin
+        self.prompt = prompt if self.stream.isatty() else None
+        self.batch_bytes = batch_bytes
+        self.max_batches = max_batches
+        self.lines_read = 0
+
+    async def batches(self):
+        """Async iterator over lists of lines, until the end of the stream."""
+        loop = asyncio.get_running_loop()
+        batches = asyncio.Queue(self.max_batches)
+
+        def hand_over(batch):
+            # Blocks this thread while the queue is full, so a piped file is only read as fast as it is used
+            try:
+                asyncio.run_coroutine_threadsafe(batches.put(batch), loop).result()
+            except RuntimeError:
+                return False  # the loop has gone away
+            return True
+
+        def read():
+            # A daemon thread rather than asyncio.to_thread: a pending readline() must not hold up shutdown
+            try:
+                while True:
+                    if self.prompt is not None:
+                        line = self.stream.readline()
+                        batch = [line] if line else []
+                    else:
+                        batch = self.stream.readlines(self.batch_bytes)
+                    if not batch or not hand_over(batch):
+                        break
+            except (OSError, ValueError) as e:
+                print(f"Stopped reading input: {e}")
+            finally:
+                hand_over(None)
+
+        threading.Thread(target=read, daemon=True, name="LineReader").start()
+        while True:
+            if self.prompt is not None:
+                # Shown from here, once the previous line has been dealt with and its output printed
+                print(self.prompt, end="", flush=True)
+            batch = await batches.get()
+            if batch is None:
+                return
+            self.lines_read += len(batch)
+            yield batch
+
+    async def lines(self):
+        """Async iterator over lines (without the newline), until the end of the stream."""
+        async for batch in self.batches():
+            for line in batch:
+                yield line.rstrip("\r\n")
+
+
+class CommandPlayer:
+    """Runs parsed commands against a send callback, keeping one timeline across calls."""
+
+    def __init__(self, send, ready=None):
+        """
+        Args:
+            send (callable): called with the NUM_MOTORS motor values (bytes) of every frame.
+            ready (coroutine function): awaited before every frame, until the link can take
+                another one without coalescing the previous frame away.
+        """
+        self.send = send
+        self.ready = ready
+        self.frames = 0
+        self._deadline = None
+
+    async def run(self, commands):
+        for command in commands:
+            if isinstance(command, Repeat):
+                for _ in range(command.count):
+                    await self.run(command.commands)
+                    await asyncio.sleep(0)  # even a repeat of zero-length waits lets the loop run
+                continue
+            now = time.monotonic()
+            if self._deadline is None or now - self._deadline > RESYNC_AFTER:
+                self._deadline = now
+            elif self._deadline > now:
+                await asyncio.sleep(self._deadline - now)
+
+            if isinstance(command, Wait):
+                self._deadline += command.seconds
+                continue
+            if self.ready is not None:
+                await self.ready()
+            self.send(command.values)
+            self.frames += 1
+            if command.hold:
+                self._deadline += command.hold
+            else:
+                self._deadline = time.monotonic()
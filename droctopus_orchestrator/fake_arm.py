@@ -0,0 +1,207 @@
+"""
+Pty-based stand-in for the RoArm-M2-S, for exercising ArmSerial without hardware.
+
+The fake arm opens a pseudo-terminal and answers on its master side; open
+`fake.port` with pyserial exactly like the real /dev/ttyUSB0. It understands
+T:102 (all angle control, joints slew towards the targets at a fixed speed),
+T:105 (one feedback line) and T:131 (continuous feedback on/off), and answers
+with T:1051 feedback lines.
+
+    python fake_arm.py            # prints the port to pass to the orchestrators
+
+FakeArmSerial runs the same simulated arm behind an in-memory pyserial
+look-alike instead, for platforms without ptys and for the simulated
+transport in transport.py.
+"""
+import json
+import os
+import select
+import threading
+import time
+
+from arm_commands import CMD_ALL_ANGLES, CMD_FEEDBACK, CMD_FEEDBACK_FLOW, FEEDBACK
+
+JOINTS = ("base", "shoulder", "elbow", "hand")
+FEEDBACK_KEYS = ("b", "s", "e", "t")
+LOAD_KEYS = ("torB", "torS", "torE", "torH")
+
+
+class FakeArm:
+    """Simulated arm behind a pty."""
+
+    def __init__(self, speed=3.0, tick=0.02, feedback_interval=0.05, initial=(0.0, 0.0, 1.57, 3.14)):
+        """
+        Args:
+            speed (float): joint slew rate in rad/s.
+            tick (float): simulation step in seconds.
+            feedback_interval (float): seconds between lines while feedback flow is on.
+            initial (tuple): starting (base, shoulder, elbow, hand) angles.
+        """
+        self.speed = speed
+        self.tick = tick
+        self.feedback_interval = feedback_interval
+        self.positions = list(initial)
+        self.targets = list(initial)
+        self.flow = False
+        self.commands = []  # every command dict received, in order
+
+        self._master = None
+        self._slave = None
+        self._thread = None
+        self._stop = threading.Event()
+        self.port = None
+
+    def start(self):
+        import tty  # POSIX only; FakeArmSerial works everywhere
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def feedback_line(self):
+        data = {"T": FEEDBACK}
+        for key, position in zip(FEEDBACK_KEYS, self.positions):
+            data[key] = round(position, 4)
+        for key, position, target in zip(LOAD_KEYS, self.positions, self.targets):
+            # Moving joints report load proportional to the remaining error
+            data[key] = round(min(abs(target - position), 1.0) * 500)
+        return (json.dumps(data) + "\n").encode()
+
+    def _handle(self, line):
+        try:
+            command = json.loads(line)
+        except ValueError:
+            return
+        self.commands.append(command)
+        kind = command.get("T")
+        if kind == CMD_ALL_ANGLES:
+            self.targets = [float(command.get(name, target)) for name, target in zip(JOINTS, self.targets)]
+        elif kind == CMD_FEEDBACK:
+            self._output(self.feedback_line())
+        elif kind == CMD_FEEDBACK_FLOW:
+            self.flow = bool(command.get("cmd"))
+
+    def _output(self, data):
+        os.write(self._master, data)
+
+    def _receive(self, buffer, data):
+        """Append data to the line buffer and handle every complete command; returns the rest."""
+        buffer.extend(data)
+        while b"\n" in buffer:
+            line, _, rest = buffer.partition(b"\n")
+            buffer = bytearray(rest)
+            self._handle(line)
+        return buffer
+
+    def _advance(self, state):
+        """One simulation tick; `state` carries the last step and next feedback times."""
+        now = time.monotonic()
+        self._step(now - state["last"])
+        state["last"] = now
+        if self.flow and now >= state["next_feedback"]:
+            self._output(self.feedback_line())
+            state["next_feedback"] = now + self.feedback_interval
+
+    def _step(self, dt):
+        max_step = self.speed * dt
+        for i, (position, target) in enumerate(zip(self.positions, self.targets)):
+            self.positions[i] = position + max(-max_step, min(max_step, target - position))
+
+    def _run(self):
+        buffer = bytearray()
+        state = {"last": time.monotonic(), "next_feedback": time.monotonic()}
+        while not self._stop.is_set():
+            readable, _, _ = select.select([self._master], [], [], self.tick)
+            if readable:
+                try:
+                    data = os.read(self._master, 4096)
+                except OSError:
+                    break
+                buffer = self._receive(buffer, data)
+            self._advance(state)
+
+
+class FakeArmSerial(FakeArm):
+    """
+    The simulated arm behind a pyserial look-alike, no pty involved.
+
+    Supports what ArmSerial uses: write(), read(), in_waiting and close().
+    """
+
+    def __init__(self, *args, timeout=0.1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timeout = timeout
+        self.port = "sim"
+        self._rx = bytearray()  # arm -> host
+        self._tx = bytearray()  # host -> arm, partial line
+        self._cond = threading.Condition()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(1.0)
+
+    close = stop
+
+    @property
+    def in_waiting(self):
+        return len(self._rx)
+
+    def write(self, data):
+        with self._cond:
+            self._tx = self._receive(self._tx, data)
+        return len(data)
+
+    def read(self, size=1):
+        with self._cond:
+            if not self._rx and not self._stop.is_set():
+                self._cond.wait(self.timeout)
+            data = bytes(self._rx[:size])
+            del self._rx[:size]
+        return data
+
+    def _output(self, data):
+        with self._cond:
+            self._rx.extend(data)
+            self._cond.notify_all()
+
+    def _run(self):
+        state = {"last": time.monotonic(), "next_feedback": time.monotonic()}
+        while not self._stop.wait(self.tick):
+            with self._cond:
+                self._advance(state)
+
+
+if __name__ == "__main__":
+    with FakeArm() as arm:
+        print(f"Fake RoArm-M2-S listening on {arm.port} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+                print(f"positions {[round(p, 2) for p in arm.positions]}  feedback flow {'on' if arm.flow else 'off'}")
+        except KeyboardInterrupt:
+            pass
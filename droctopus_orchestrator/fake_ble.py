@@ -0,0 +1,342 @@
+"""
+In-process stand-in for bleak, for exercising discovery, the supervisor and
+the writers without ESP32s or a Bluetooth adapter.
+
+A FakeBle holds simulated peripherals. Its `client` and `scanner` methods
+take the place of BleakClient and BleakScanner wherever a client_factory or
+scanner_factory is accepted (ble_discovery, ble_supervisor). Peripherals can
+be dropped and taken off the air to simulate link loss:
+
+    ble = FakeBle()
+    receiver = ble.add("ESP32_Receiver", "AA:00:00:00:00:02")
+    supervisor = LinkSupervisor(["ESP32_Receiver"], client_factory=ble.client, scanner_factory=ble.scanner)
+    ...
+    receiver.drop(offline_for=1.0)    # disconnect and stop advertising for a second
+
+The radio can be made imperfect with per-packet latency and jitter, an ATT
+MTU (oversized writes fail like on real hardware), random loss of
+unacknowledged packets and a minimum airtime per packet, which caps the
+link's packet rate. Jitter varies each packet's delay, but as on a real
+link the packets of one connection still arrive in order. A single
+peripheral can also be given its own packet interval, e.g. a vest on a long
+connection interval that accepts fewer writes per second than the others.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+
+from bleak.exc import BleakError
+
+
+class FakeCharacteristic:
+    def __init__(self, uuid, properties):
+        self.uuid = uuid
+        self.properties = properties
+
+
+class FakeServices:
+    def __init__(self, characteristics):
+        self._characteristics = characteristics
+
+    def get_characteristic(self, uuid):
+        return self._characteristics.get(uuid)
+
+
+class FakeDevice:
+    """What a scan reports, like bleak's BLEDevice."""
+
+    def __init__(self, name, address):
+        self.name = name
+        self.address = address
+
+
+class FakeAdvertisement:
+    def __init__(self, local_name):
+        self.local_name = local_name
+
+
+class FakePeripheral:
+    """One simulated ESP32: advertises, accepts a connection, records writes, sends notifications."""
+
+    def __init__(self, ble, name, address, characteristics=None, connect_delay=0.05, interval=0.0):
+        self.ble = ble
+        self.name = name
+        self.address = address
+        self.connect_delay = connect_delay
+        self.interval = interval  # seconds between writes this peripheral accepts, 0 for no limit
+        self.characteristics = {
+            uuid: FakeCharacteristic(uuid, properties)
+            for uuid, properties in (characteristics or {}).items()
+        }
+        self.client = None  # the connected FakeClient, if any
+        self.writes = []  # (time.monotonic(), uuid, data) for every write received
+        self.on_write = None  # optional callback(uuid, data) on every write received
+        self._offline_until = 0.0
+        self._link_free = 0.0
+        self._streams = {}  # uuid -> (rate, source) started when a client subscribes
+        self._stream_tasks = []
+
+    @property
+    def available(self):
+        return time.monotonic() >= self._offline_until
+
+    def drop(self, offline_for=0.0):
+        """Break the connection as if the radio link failed; stay unreachable for `offline_for` seconds."""
+        self._offline_until = time.monotonic() + offline_for
+        client = self.client
+        if client is not None:
+            client._lost()
+
+    def notify(self, char_uuid, data):
+        """Send a notification to the connected client, if it subscribed."""
+        if self.client is not None:
+            self.client._notify(char_uuid, bytearray(data))
+
+    def stream(self, char_uuid, rate, source):
+        """Notify `source()` on char_uuid `rate` times a second whenever a client is subscribed."""
+        self._streams[char_uuid] = (rate, source)
+
+    def _subscribed(self, char_uuid):
+        if char_uuid in self._streams:
+            rate, source = self._streams[char_uuid]
+            task = asyncio.get_running_loop().create_task(self._run_stream(char_uuid, rate, source))
+            self._stream_tasks.append(task)
+
+    def _unsubscribed(self):
+        for task in self._stream_tasks:
+            task.cancel()
+        self._stream_tasks = []
+
+    async def _run_stream(self, char_uuid, rate, source):
+        period = 1.0 / rate
+        next_time = time.monotonic()
+        while True:
+            self.notify(char_uuid, source())
+            next_time += period
+            await asyncio.sleep(max(0.0, next_time - time.monotonic()))
+
+    async def _link_slot(self):
+        """Wait for this link's next packet slot."""
+        if not self.interval:
+            return
+        now = time.monotonic()
+        start = max(now, self._link_free)
+        self._link_free = start + self.interval
+        await asyncio.sleep(self._link_free - now)
+
+    def _received(self, char_uuid, data):
+        self.writes.append((time.monotonic(), char_uuid, data))
+        if self.on_write is not None:
+            self.on_write(char_uuid, data)
+
+
+class FakeChannel:
+    """One direction of a link: each packet arrives after its own delay, but never before an earlier one."""
+
+    def __init__(self):
+        self._packets = deque()  # (deliver, args) in send order
+        self._next_delivery = 0.0  # loop time the last packet sent arrives
+
+    @property
+    def idle(self):
+        return not self._packets
+
+    def send(self, delay, deliver, *args):
+        loop = asyncio.get_running_loop()
+        at = max(self._next_delivery, loop.time() + delay)
+        self._next_delivery = at
+        self._packets.append((deliver, args))
+        loop.call_at(at, self._arrive)
+
+    def _arrive(self):
+        # Timers due at the same time may fire in any order; the packets still leave in send order
+        deliver, args = self._packets.popleft()
+        deliver(*args)
+
+
+class FakeClient:
+    """BleakClient look-alike bound to a FakeBle."""
+
+    def __init__(self, ble, target, disconnected_callback=None, timeout=10.0):
+        self.ble = ble
+        self.address = getattr(target, "address", target)
+        self.disconnected_callback = disconnected_callback
+        self.timeout = timeout
+        self.services = FakeServices({})
+        self._peripheral = None
+        self._callbacks = {}
+        self._writes = FakeChannel()
+        self._notifications = FakeChannel()
+
+    @property
+    def is_connected(self):
+        return self._peripheral is not None
+
+    async def connect(self):
+        peripheral = self.ble.peripherals.get(self.address)
+        if peripheral is not None:
+            await asyncio.sleep(peripheral.connect_delay)
+        if peripheral is None or not peripheral.available or peripheral.client is not None:
+            raise BleakError(f"Device with address {self.address} was not found")
+        peripheral.client = self
+        self._peripheral = peripheral
+        self.services = FakeServices(peripheral.characteristics)
+        return True
+
+    async def disconnect(self):
+        if self._peripheral is not None:
+            self._lost()
+        return True
+
+    async def start_notify(self, char_uuid, callback):
+        if self._peripheral is None:
+            raise BleakError("Not connected")
+        self._callbacks[char_uuid] = callback
+        self._peripheral._subscribed(char_uuid)
+
+    async def write_gatt_char(self, char_uuid, data, response=None):
+        peripheral = self._peripheral
+        if peripheral is None:
+            raise BleakError("Not connected")
+        data = bytes(data)
+        ble = self.ble
+        if len(data) > ble.mtu - 3:
+            raise BleakError(f"Write of {len(data)} bytes exceeds the ATT MTU of {ble.mtu}")
+
+        await peripheral._link_slot()
+        await ble._airtime()
+        if response:
+            # Acknowledged: never lost, but the round trip is waited for
+            delivered = asyncio.get_running_loop().create_future()
+            self._writes.send(ble._delay(), self._deliver_write, peripheral, char_uuid, data, delivered)
+            await delivered
+            await asyncio.sleep(ble._delay())
+            if not delivered.result() or self._peripheral is not peripheral:
+                raise BleakError("Disconnected during write")
+        elif not ble._lost():
+            self._writes.send(ble._delay(), self._deliver_write, peripheral, char_uuid, data)
+
+    def _deliver_write(self, peripheral, char_uuid, data, delivered=None):
+        arrived = self._peripheral is peripheral
+        if arrived:
+            peripheral._received(char_uuid, data)
+        if delivered is not None:
+            delivered.set_result(arrived)
+
+    def _notify(self, char_uuid, data):
+        ble = self.ble
+        if len(data) > ble.mtu - 3:
+            raise ValueError(f"Notification of {len(data)} bytes exceeds the ATT MTU of {ble.mtu}")
+        if char_uuid not in self._callbacks or ble._lost():
+            return
+        delay = ble._delay()
+        if delay or not self._notifications.idle:
+            self._notifications.send(delay, self._deliver_notify, char_uuid, data)
+        else:
+            self._deliver_notify(char_uuid, data)
+
+    def _deliver_notify(self, char_uuid, data):
+        callback = self._callbacks.get(char_uuid)
+        if callback is None:
+            return
+        result = callback(None, data)
+        if asyncio.iscoroutine(result):
+            asyncio.get_running_loop().create_task(result)
+
+    def _lost(self):
+        peripheral = self._peripheral
+        self._peripheral = None
+        self._callbacks = {}
+        if peripheral is not None and peripheral.client is self:
+            peripheral.client = None
+            peripheral._unsubscribed()
+        if self.disconnected_callback is not None:
+            self.disconnected_callback(self)
+
+
+class FakeScanner:
+    """BleakScanner look-alike: reports every available peripheral once per advertising interval."""
+
+    def __init__(self, ble, detection_callback):
+        self.ble = ble
+        self.detection_callback = detection_callback
+        self._task = None
+
+    async def _advertise(self):
+        while True:
+            await asyncio.sleep(self.ble.advertising_interval)
+            for peripheral in list(self.ble.peripherals.values()):
+                if peripheral.available and peripheral.client is None:
+                    self.detection_callback(FakeDevice(peripheral.name, peripheral.address),
+                                            FakeAdvertisement(peripheral.name))
+
+    async def __aenter__(self):
+        self._task = asyncio.get_running_loop().create_task(self._advertise())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+class FakeBle:
+    """A set of fake peripherals plus client/scanner factories that reach them."""
+
+    def __init__(self, advertising_interval=0.1, latency=0.0, jitter=0.0, mtu=247, loss=0.0, airtime=0.0,
+                 seed=None):
+        """
+        Args:
+            advertising_interval (float): seconds between advertisements seen by a scan.
+            latency, jitter (float): one-way packet delay in seconds, uniformly +/- jitter.
+            mtu (int): ATT MTU; writes and notifications must fit in mtu - 3 bytes.
+            loss (float): probability that a notification or unacknowledged write is lost.
+            airtime (float): seconds each packet occupies the radio, shared by all links.
+            seed (int): seed for the jitter and loss random numbers.
+        """
+        self.advertising_interval = advertising_interval
+        self.latency = latency
+        self.jitter = jitter
+        self.mtu = mtu
+        self.loss = loss
+        self.airtime = airtime
+        self.rng = random.Random(seed)
+        self.peripherals = {}  # address -> FakePeripheral
+        self._air_free = 0.0
+
+    def _delay(self):
+        if not self.jitter:
+            return self.latency
+        return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+    def _lost(self):
+        return self.loss and self.rng.random() < self.loss
+
+    async def _airtime(self):
+        """Wait for the radio to be free, then occupy it for one packet."""
+        if not self.airtime:
+            await asyncio.sleep(0)
+            return
+        now = time.monotonic()
+        start = max(now, self._air_free)
+        self._air_free = start + self.airtime
+        await asyncio.sleep(self._air_free - now)
+
+    def add(self, name, address, characteristics=None, connect_delay=0.05, interval=0.0):
+        """
+        Args:
+            characteristics (dict): {uuid: ["write", "write-without-response", "notify", ...]}.
+            interval (float): minimum seconds between writes to this peripheral.
+        """
+        peripheral = FakePeripheral(self, name, address, characteristics, connect_delay, interval)
+        self.peripherals[address] = peripheral
+        return peripheral
+
+    def client(self, target, disconnected_callback=None, timeout=10.0):
+        return FakeClient(self, target, disconnected_callback, timeout)
+
+    def scanner(self, detection_callback):
+        return FakeScanner(self, detection_callback)
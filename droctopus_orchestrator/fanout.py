@@ -0,0 +1,117 @@
+"""
+Drive several vests from one orchestrator.
+
+Every vest advertises as ESP32_Receiver, so the supervisor finds them with a
+name pattern and keeps one link per address (LinkSupervisor.add_matching).
+A Fanout gives each of those links its own FrameWriter: frames are queued
+per vest and each writer drains its queue at its own pace, so a vest on a
+slow link only coalesces its own frames and never holds up the others.
+
+    links = await supervisor.add_matching("ESP32_Receiver*", count=4)
+    vests = Fanout(links, CHARACTERISTIC_UUID_2, max_rate=50)
+    vests.submit(frame)            # every vest
+    vests.route(0, frame)          # one vest, by index or address
+
+Fanout has the same submit()/stats()/stop() calls as a FrameWriter, so the
+orchestrators use it in place of their single writer.
+"""
+import asyncio
+
+from ble_writer import FrameWriter
+from latency import ms
+
+
+class Fanout:
+    """One FrameWriter per receiver link, with broadcast and per-vest routing."""
+
+    def __init__(self, links, char_uuid, max_rate=None, encoder_factory=None, report_interval=None,
+                 started_at=None):
+        """
+        Args:
+            links (list): supervised receiver Links (see ble_supervisor.py).
+            char_uuid (str): characteristic the frames are written to.
+            max_rate (float): most frames per second written to any one vest, None for no limit.
+            encoder_factory (callable): returns a fresh encoder per vest for stateful
+                framing such as delta; its encode() runs when a frame is written and
+                force_keyframe(), if it has one, after every reconnect.
+            report_interval (float): seconds between printed totals, None to stay quiet.
+            started_at (float): time.monotonic() at program start, for the first-frame delay.
+        """
+        self.links = list(links)
+        self.report_interval = report_interval
+        self.writers = {}
+        for link in self.links:
+            encoder = encoder_factory() if encoder_factory is not None else None
+            writer = FrameWriter(link.client, char_uuid, name=link.name,
+                                 encode=encoder.encode if encoder is not None else None,
+                                 started_at=started_at, max_rate=max_rate)
+            if hasattr(encoder, "force_keyframe"):
+                # This vest lost its delta state with the connection; start over from a keyframe
+                link.on_up(lambda client, encoder=encoder: encoder.force_keyframe())
+            link.attach_writer(writer)
+            self.writers[link.name] = writer
+        self.keys = list(self.writers)
+        self._report_task = None
+
+    def __len__(self):
+        return len(self.writers)
+
+    def start(self):
+        for writer in self.writers.values():
+            writer.start()
+        if self.report_interval:
+            self._report_task = asyncio.create_task(self._report_loop())
+        return self
+
+    async def stop(self):
+        if self._report_task is not None:
+            self._report_task.cancel()
+            self._report_task = None
+        await asyncio.gather(*(writer.stop() for writer in self.writers.values()))
+
+    def submit(self, frame, origin_ns=None):
+        """Queue a frame for every vest."""
+        frame = bytes(frame)
+        for writer in self.writers.values():
+            writer.submit(frame, origin_ns)
+
+    def route(self, vest, frame, origin_ns=None):
+        """Queue a frame for one vest, given by its index or address."""
+        if isinstance(vest, int):
+            vest = self.keys[vest]
+        self.writers[vest].submit(frame, origin_ns)
+
+    def publish_latency(self, metrics, stage="ble write", origin_stage=None):
+        """Add every vest's write (and origin) histograms to a latency.LatencyStats, tagged with the address."""
+        for name, writer in self.writers.items():
+            metrics.add(f"{stage} [{name}]", writer.write_latency)
+            if origin_stage:
+                metrics.add(f"{origin_stage} [{name}]", writer.origin_latency)
+
+    async def flush(self):
+        await asyncio.gather(*(writer.flush() for writer in self.writers.values()))
+
+    def stats(self):
+        """Totals over all vests, plus every writer's own stats under "vests"."""
+        vests = {name: writer.stats() for name, writer in self.writers.items()}
+        return {
+            "vests": vests,
+            "online": sum(stats["online"] for stats in vests.values()),
+            "sent": sum(stats["sent"] for stats in vests.values()),
+            "dropped": sum(stats["dropped"] for stats in vests.values()),
+            "fps": sum(stats["fps"] for stats in vests.values()),
+            "bytes_per_sec": sum(stats["bytes_per_sec"] for stats in vests.values()),
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"[fanout] {stats['online']}/{len(self)} vests online, {stats['fps']:.1f} frames/s, "
+              f"{stats['bytes_per_sec']:.0f} B/s in total")
+        for name, vest in stats["vests"].items():
+            print(f"  [{name}] {vest['fps']:.1f} frames/s, latency p50 {ms(vest['latency_p50'], 1)} "
+                  f"p99 {ms(vest['latency_p99'], 1)}, sent {vest['sent']}, dropped {vest['dropped']}")
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.report()
@@ -0,0 +1,171 @@
+"""
+Keyframe + delta compression for the 10-motor haptic stream.
+
+Most ticks repeat the previous motor state, or change one joint's pair of
+motors. Instead of a full 10-byte payload every time, the encoder sends
+
+    KEY    0x00 v0 .. v9                       full state, periodically and after any doubt
+    PAIRS  0x01 i0 v0 i1 v1 ..                 only the motors that changed
+    SPAN   0x02 start count v_start .. v_end   a run of consecutive motors
+
+or nothing at all when the state is unchanged. Whichever of PAIRS/SPAN is
+shorter is used, and a KEY if neither beats it. The packets ride inside the
+COBS framing from framing.py, whose sequence numbers tell the decoder when a
+packet went missing; it then ignores deltas until the next keyframe. A packet
+older than one already applied arrived out of order and is dropped, since
+even a keyframe would roll the motors back to a stale state.
+
+The decoder is deliberately small so the receiver firmware can mirror it.
+"""
+import time
+
+from framing import PAYLOAD_SIZE, FrameDecoder, FrameEncoder
+
+KEY = 0x00
+PAIRS = 0x01
+SPAN = 0x02
+
+
+class DeltaEncoder:
+    """Turns successive 10-byte motor states into KEY/PAIRS/SPAN packets."""
+
+    def __init__(self, keyframe_interval=1.0, clock=time.monotonic):
+        """
+        Args:
+            keyframe_interval (float): seconds between forced keyframes; they double
+                as a keepalive and bound how long a lost packet is felt.
+            clock (callable): time source, replaceable for offline encoding.
+        """
+        self.keyframe_interval = keyframe_interval
+        self.clock = clock
+        self._state = None
+        self._next_key = 0.0
+
+    def force_keyframe(self):
+        """Make the next packet a keyframe (e.g. after a reconnect)."""
+        self._state = None
+
+    def encode(self, values):
+        """Return the packet for this state, or None if there is nothing to send."""
+        values = bytes(values)
+        now = self.clock()
+        previous = self._state
+
+        if previous is None or now >= self._next_key:
+            self._state = values
+            self._next_key = now + self.keyframe_interval
+            return bytes((KEY,)) + values
+        if values == previous:
+            return None
+
+        changed = [i for i in range(PAYLOAD_SIZE) if values[i] != previous[i]]
+        self._state = values
+        first, last = changed[0], changed[-1]
+        span_size = 3 + last - first + 1
+        pairs_size = 1 + 2 * len(changed)
+        if min(span_size, pairs_size) >= 1 + PAYLOAD_SIZE:
+            return bytes((KEY,)) + values
+        if span_size <= pairs_size:
+            return bytes((SPAN, first, last - first + 1)) + values[first:last + 1]
+        packet = bytearray((PAIRS,))
+        for i in changed:
+            packet += bytes((i, values[i]))
+        return bytes(packet)
+
+
+class DeltaDecoder:
+    """Rebuilds motor states from KEY/PAIRS/SPAN packets."""
+
+    def __init__(self):
+        self.state = None  # None until the first keyframe
+        self.skipped = 0  # deltas ignored while waiting for a keyframe
+
+    def resync(self):
+        """Forget the state; call when the framing layer reports a lost packet."""
+        self.state = None
+
+    def decode(self, packet):
+        """Apply one packet; returns the new 10-byte state, or None if not in sync."""
+        kind = packet[0]
+        if kind == KEY:
+            if len(packet) != 1 + PAYLOAD_SIZE:
+                return None
+            self.state = bytearray(packet[1:])
+            return bytes(self.state)
+        if self.state is None:
+            self.skipped += 1
+            return None
+
+        if kind == PAIRS:
+            for i in range(1, len(packet) - 1, 2):
+                if packet[i] < PAYLOAD_SIZE:
+                    self.state[packet[i]] = packet[i + 1]
+        elif kind == SPAN:
+            start, count = packet[1], packet[2]
+            if start + count > PAYLOAD_SIZE or len(packet) != 3 + count:
+                return None
+            self.state[start:start + count] = packet[3:]
+        else:
+            return None
+        return bytes(self.state)
+
+
+class DeltaFrameEncoder:
+    """
+    Delta compression inside COBS framing: encode() gives wire bytes or None.
+
+    Tracks raw vs on-the-wire byte counts so callers can report the saving
+    against sending full legacy 11-byte frames.
+    """
+
+    def __init__(self, keyframe_interval=1.0, clock=time.monotonic):
+        self.delta = DeltaEncoder(keyframe_interval, clock)
+        self.framing = FrameEncoder()
+        self.frames_in = 0
+        self.bytes_out = 0
+
+    @property
+    def legacy_bytes(self):
+        """What the same frames would have cost as 0xAA + 10 bytes."""
+        return self.frames_in * (1 + PAYLOAD_SIZE)
+
+    def force_keyframe(self):
+        self.delta.force_keyframe()
+
+    def encode(self, values):
+        self.frames_in += 1
+        packet = self.delta.encode(values)
+        if packet is None:
+            return None
+        data = self.framing.encode(packet)
+        self.bytes_out += len(data)
+        return data
+
+
+class DeltaFrameDecoder:
+    """Receiver side: COBS frames in, full motor states out."""
+
+    def __init__(self):
+        self.framing = FrameDecoder(payload_size=None)
+        self.delta = DeltaDecoder()
+        self._expected_seq = None
+        self.late = 0  # packets dropped for arriving after a newer one
+
+    def feed(self, data):
+        """Return the list of motor states completed by this chunk of wire bytes."""
+        states = []
+        for seq, packet in self.framing.feed(data):
+            if self._expected_seq is not None:
+                gap = (seq - self._expected_seq) & 0xFF
+                if gap >= 0x80:
+                    # Behind the sequence: overtaken by a newer packet, too late to apply
+                    self.late += 1
+                    continue
+                if gap:
+                    # A packet went missing; deltas are meaningless until the next keyframe
+                    self.delta.resync()
+            self._expected_seq = (seq + 1) & 0xFF
+            state = self.delta.decode(packet)
+            if state is not None:
+                states.append(state)
+        return states
@@ -0,0 +1,211 @@
+"""
+Haptic frames computed in worker processes.
+
+A mapping that costs more than the lookup tables (spatial fields, audio
+filterbanks, filtering) would otherwise run on the event loop's core and hold
+up the BLE writes. A FramePipeline moves it into a ProcessPoolExecutor:
+
+    put()     writes the input rows (e.g. joint angles) into a shared-memory
+              ring and hands a worker only the slot range to fill
+    workers   map the inputs in place into the ring's motor-value slots
+    frames()  yields the finished motor values, in put() order, as views
+              into the ring; the event loop never computes anything
+
+Only two integers per job cross the process boundary, so nothing is pickled
+per frame. The ring has a fixed number of slots; put() waits when every slot
+holds a frame that has not been read yet.
+
+The mapping is given as "module:function", called once in every worker
+with `options` to build the kernel: a callable from an (N, width) float64
+array of inputs to (N, 10) motor values.
+
+    pipeline = FramePipeline("haptic_mapping:batch_mapper", {"curve": "gamma:2"}, workers=2).start()
+    await pipeline.warm_up()
+    await pipeline.put([joint_angles], tag=origin_ns)
+    async for motor_values, origin_ns in pipeline.frames():
+        writer.submit(frame_encoder.encode(motor_values.tolist()), origin_ns)
+"""
+import asyncio
+import importlib
+import multiprocessing
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from haptic_mapping import NUM_JOINTS, NUM_MOTORS
+from latency import LatencyHistogram, ms, seconds
+
+# Set in each worker by _attach()
+_shm = None
+_inputs = None
+_outputs = None
+_kernel = None
+
+
+def _views(buf, slots, width):
+    """The ring's input rows (float64) followed by its motor-value rows (uint8)."""
+    inputs = np.ndarray((slots, width), dtype=np.float64, buffer=buf)
+    outputs = np.ndarray((slots, NUM_MOTORS), dtype=np.uint8, buffer=buf, offset=inputs.nbytes)
+    return inputs, outputs
+
+
+def _attach(name, slots, width, kernel, options):
+    global _shm, _inputs, _outputs, _kernel
+    # Ctrl+C reaches the whole process group; the parent decides when the workers stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _shm = shared_memory.SharedMemory(name=name)
+    _inputs, _outputs = _views(_shm.buf, slots, width)
+    module_name, func_name = kernel.split(":")
+    _kernel = getattr(importlib.import_module(module_name), func_name)(**options)
+
+
+def _ping():
+    return os.getpid()
+
+
+def _compute(start, count):
+    end = start + count
+    _outputs[start:end] = _kernel(_inputs[start:end])
+    return count
+
+
+class FramePipeline:
+    """Shared-memory ring of frame slots filled by a process pool."""
+
+    def __init__(self, kernel, options=None, workers=2, slots=256, width=NUM_JOINTS):
+        """
+        Args:
+            kernel (str): "module:function" returning the mapping callable; it is called in
+                every worker as function(**options).
+            options (dict): picklable keyword arguments for the kernel factory.
+            workers (int): worker processes.
+            slots (int): frames the ring holds between put() and frames().
+            width (int): input values per frame.
+        """
+        if slots < 2:
+            raise ValueError("FramePipeline needs at least 2 slots.")
+        self.kernel = kernel
+        self.options = options or {}
+        self.workers = workers
+        self.slots = slots
+        self.width = width
+
+        self._shm = None
+        self._executor = None
+        self._inputs = self._outputs = None
+        self._pending = deque()  # (future, first slot, count, tag, put() monotonic_ns) in put() order
+        self._added = asyncio.Event()
+        self._space = asyncio.Event()
+        self._head = 0  # next slot put() fills
+        self._used = 0  # slots holding frames not read yet, counted from the oldest
+
+        self.jobs = 0
+        self.frames_read = 0
+        self.compute_latency = LatencyHistogram()  # ns from put() until its frames were ready
+
+    def start(self):
+        """Create the shared ring and the process pool."""
+        size = self.slots * (self.width * 8 + NUM_MOTORS)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._inputs, self._outputs = _views(self._shm.buf, self.slots, self.width)
+        # spawn so the workers never inherit the parent's GUI or BLE state
+        self._executor = ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_attach,
+            initargs=(self._shm.name, self.slots, self.width, self.kernel, self.options),
+        )
+        return self
+
+    async def warm_up(self):
+        """Start every worker and build its kernel now rather than on the first frames."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _ping) for _ in range(self.workers)))
+
+    async def put(self, rows, tag=None):
+        """
+        Queue input rows for the workers, waiting while the ring is full.
+
+        Args:
+            rows (array-like): (N, width) inputs, or one row; N at most `slots`.
+            tag: passed back by frames() with each of these rows' motor values.
+        """
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, self.width)
+        count = len(rows)
+        if count > self.slots:
+            raise ValueError(f"Cannot put {count} rows into a ring of {self.slots} slots")
+        while self.slots - self._used < count:
+            self._space.clear()
+            await self._space.wait()
+
+        put_ns = time.monotonic_ns()
+        loop = asyncio.get_running_loop()
+        chunk = -(-count // self.workers)  # spread a batch over every worker
+        done = 0
+        while done < count:
+            start = self._head
+            take = min(chunk, count - done, self.slots - start)  # a job never wraps around the ring
+            self._inputs[start:start + take] = rows[done:done + take]
+            future = loop.run_in_executor(self._executor, _compute, start, take)
+            self._pending.append((future, start, take, tag, put_ns))
+            self._head = (start + take) % self.slots
+            self._used += take
+            self.jobs += 1
+            done += take
+        self._added.set()
+
+    async def frames(self):
+        """
+        Async iterator over (motor values, tag) in put() order.
+
+        The motor values are a uint8 view into the ring, valid until the next
+        frame is requested; copy them (bytes(), .tolist()) to keep them longer.
+        A worker's exception is raised here.
+        """
+        while True:
+            while not self._pending:
+                self._added.clear()
+                await self._added.wait()
+            future, start, count, tag, put_ns = self._pending[0]
+            await future
+            self._pending.popleft()
+            self.compute_latency.record(time.monotonic_ns() - put_ns)
+            for slot in range(start, start + count):
+                yield self._outputs[slot], tag
+                self._used -= 1
+                self.frames_read += 1
+                self._space.set()
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "jobs": self.jobs,
+            "frames": self.frames_read,
+            "in_flight": self._used,
+            "compute_p50": seconds(self.compute_latency.percentile(0.5)),
+            "compute_p99": seconds(self.compute_latency.percentile(0.99)),
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"[frame pool] {stats['workers']} workers, {stats['frames']} frames in {stats['jobs']} jobs, "
+              f"put to ready p50 {ms(stats['compute_p50'])} p99 {ms(stats['compute_p99'])}")
+
+    def close(self):
+        """Stop the workers and free the shared ring."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        for future, *_ in self._pending:
+            future.cancel()
+        self._pending.clear()
+        if self._shm is not None:
+            self._inputs = self._outputs = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
@@ -0,0 +1,177 @@
+"""
+Self-synchronizing framing for the 10-byte motor payloads.
+
+The legacy wire format is 0xAA followed by 10 raw bytes, which forces every
+payload byte of 0xAA to be rewritten and gives a receiver no way to find the
+next frame boundary after a lost or corrupted byte. This codec instead sends
+
+    COBS(seq, payload[0..9], crc8) 0x00
+
+COBS removes every 0x00 from the packet, so 0x00 only ever appears as the
+delimiter and a decoder resynchronizes at the next one whatever came before.
+The sequence number exposes dropped frames and the CRC-8 (poly 0x07, init 0)
+rejects corrupted ones. All payload values 0-255 are sent unchanged.
+
+Packets are short (12 bytes for a motor frame, always under 254), so each
+one is a single COBS block per run of non-zero bytes and encoding/decoding reduce to bytes.split
+and bytes.join, which run in C.
+"""
+
+FRAME_HEADER = 0xAA
+PAYLOAD_SIZE = 10
+DELIMITER = b"\x00"
+
+# Payloads must fit a single COBS block: seq + payload + crc < 254 bytes
+MAX_PAYLOAD_SIZE = 250
+
+
+def _crc8_table(poly=0x07):
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data, crc=0):
+    table = CRC8_TABLE
+    for byte in data:
+        crc = table[crc ^ byte]
+    return crc
+
+
+def cobs_encode(data):
+    """COBS-encode data shorter than 254 bytes (no delimiter appended)."""
+    return b"".join([bytes((len(segment) + 1,)) + segment for segment in bytes(data).split(b"\x00")])
+
+
+def cobs_decode(packet):
+    """Decode one COBS packet (without delimiter); returns None if it is malformed."""
+    out = []
+    index = 0
+    size = len(packet)
+    while index < size:
+        code = packet[index]
+        end = index + code
+        if code == 0 or end > size:
+            return None
+        out.append(packet[index + 1:end])
+        index = end
+    return b"\x00".join(out)
+
+
+def encode_frame(payload, seq):
+    """Encode one payload (normally 10 bytes) with sequence number `seq` (0-255), delimiter included."""
+    body = bytes((seq & 0xFF,)) + bytes(payload)
+    return cobs_encode(body + bytes((crc8(body),))) + DELIMITER
+
+
+def encode_frames(payloads, start_seq=0):
+    """Encode many payloads into one contiguous buffer, e.g. for a single bulk write."""
+    return b"".join([encode_frame(payload, start_seq + i) for i, payload in enumerate(payloads)])
+
+
+class FrameEncoder:
+    """Keeps the running sequence number for one outgoing stream."""
+
+    def __init__(self, seq=0):
+        self.seq = seq & 0xFF
+
+    def encode(self, payload):
+        frame = encode_frame(payload, self.seq)
+        self.seq = (self.seq + 1) & 0xFF
+        return frame
+
+    def encode_many(self, payloads):
+        data = encode_frames(payloads, self.seq)
+        self.seq = (self.seq + len(payloads)) & 0xFF
+        return data
+
+
+class LegacyEncoder:
+    """The original 0xAA + 10 raw bytes format, for receivers without the COBS decoder."""
+
+    def encode(self, payload):
+        return bytes((FRAME_HEADER,)) + bytes(payload)
+
+    def encode_many(self, payloads):
+        return b"".join([self.encode(payload) for payload in payloads])
+
+
+def make_encoder(framing):
+    """Encoder for a --framing choice: "legacy", "cobs" or "delta" (see frame_delta.py)."""
+    if framing == "legacy":
+        return LegacyEncoder()
+    if framing == "cobs":
+        return FrameEncoder()
+    if framing == "delta":
+        from frame_delta import DeltaFrameEncoder
+        return DeltaFrameEncoder()
+    raise ValueError(f"Unknown framing: {framing}")
+
+
+class FrameDecoder:
+    """
+    Incremental decoder; feed it arbitrary chunks, get back whole payloads.
+
+    Anything between two delimiters that fails COBS, length or CRC checks is
+    discarded and counted, and decoding carries on with the next packet.
+    """
+
+    def __init__(self, payload_size=PAYLOAD_SIZE):
+        """
+        Args:
+            payload_size (int): exact payload length to accept, or None for
+                variable-length payloads (e.g. delta packets) up to MAX_PAYLOAD_SIZE.
+        """
+        if payload_size is None:
+            self._min_packet, self._max_packet = 3, MAX_PAYLOAD_SIZE + 2
+        else:
+            self._min_packet = self._max_packet = payload_size + 2
+        self._max_encoded = self._max_packet + 1  # one COBS overhead byte
+        self._partial = b""
+        self._expected_seq = None
+        self.frames = 0
+        self.errors = 0  # malformed or CRC-failed packets skipped
+        self.lost = 0  # frames missing according to the sequence numbers
+
+    def feed(self, data):
+        """Return a list of (seq, payload) for every complete valid frame in data."""
+        chunks = (self._partial + bytes(data)).split(DELIMITER)
+        self._partial = chunks.pop()
+        if len(self._partial) > self._max_encoded:
+            # No delimiter in sight for longer than any packet: drop the junk now
+            self._partial = b""
+            self.errors += 1
+
+        frames = []
+        table = CRC8_TABLE
+        min_packet = self._min_packet
+        max_packet = self._max_packet
+        for chunk in chunks:
+            if not chunk:
+                continue
+            packet = cobs_decode(chunk) if len(chunk) <= self._max_encoded else None
+            if packet is None or not min_packet <= len(packet) <= max_packet:
+                self.errors += 1
+                continue
+            crc = 0
+            for byte in packet:
+                crc = table[crc ^ byte]
+            if crc:  # CRC over data + its own CRC is zero when intact
+                self.errors += 1
+                continue
+
+            seq = packet[0]
+            if self._expected_seq is not None:
+                self.lost += (seq - self._expected_seq) & 0xFF
+            self._expected_seq = (seq + 1) & 0xFF
+            frames.append((seq, packet[1:-1]))
+
+        self.frames += len(frames)
+        return frames
@@ -0,0 +1,144 @@
+"""
+Joint angle -> haptic motor byte mapping through precomputed lookup tables.
+
+Each of the 10 motors is driven by one joint (optionally mirrored) through a
+response curve. The curves are baked into a (10, 256) uint8 table once, so the
+live loop only does a quantize-and-index per motor, and whole recorded
+trajectories map to frames in a single NumPy gather.
+
+The table is indexed by the byte the original linear mapping sent,
+int(255 * (angle - min_angle) / (max_angle - min_angle)), computed the same
+way, so with the default linear curve the output is exactly that formula.
+"""
+import numpy as np
+
+NUM_MOTORS = 10
+NUM_JOINTS = 4
+FRAME_HEADER = 0xAA
+
+MIN_ANGLE = -3.14
+MAX_ANGLE = 3.14
+
+# (joint index, sign) per motor; None leaves the motor off.
+# Each joint drives a pair: the first motor follows -angle, the second +angle.
+DEFAULT_LAYOUT = [(0, -1), (0, 1), (1, -1), (1, 1), (2, -1), (2, 1), (3, -1), (3, 1), None, None]
+
+
+def linear():
+    return lambda x: x
+
+
+def gamma(exponent):
+    return lambda x: x ** exponent
+
+
+def deadzone(width):
+    """Nothing below `width` (0-1 of the input range), then linear up to full scale."""
+    if not 0.0 <= width < 1.0:
+        raise ValueError(f"Deadzone width must be at least 0 and below 1, got {width}")
+    return lambda x: np.clip((x - width) / (1.0 - width), 0.0, 1.0)
+
+
+def parse_curve(spec):
+    """Build a curve from "linear", "gamma:<exponent>" or "deadzone:<width>"."""
+    name, _, arg = spec.partition(":")
+    if name == "linear":
+        return linear()
+    if name == "gamma":
+        return gamma(float(arg or 2.2))
+    if name == "deadzone":
+        return deadzone(float(arg or 0.1))
+    raise ValueError(f"Unknown haptic curve: {spec}")
+
+
+class HapticMapper:
+    """Maps 4 joint angles to 10 motor bytes using per-motor lookup tables."""
+
+    def __init__(self, layout=DEFAULT_LAYOUT, curves=None, min_angle=MIN_ANGLE, max_angle=MAX_ANGLE,
+                 escape_header=True):
+        """
+        Args:
+            layout (list): (joint index, sign) or None for each of the 10 motors.
+            curves (callable or list): curve for every motor, or one per motor; default linear.
+            min_angle, max_angle (float): angle range mapped onto 0-255.
+            escape_header (bool): replace 0xAA outputs with 254 so they can't be
+                mistaken for a frame header by the receiver.
+        """
+        if len(layout) != NUM_MOTORS:
+            raise ValueError("Please provide a layout entry for each of the 10 motors.")
+        if curves is None or callable(curves):
+            curves = [curves or linear()] * NUM_MOTORS
+        if len(curves) != NUM_MOTORS:
+            raise ValueError("Please provide a curve for each of the 10 motors.")
+
+        self.min_angle = min_angle
+        self.max_angle = max_angle
+        self._span = max_angle - min_angle
+
+        self._joints = np.array([entry[0] if entry else 0 for entry in layout], dtype=np.intp)
+        self._signs = np.array([entry[1] if entry else 0 for entry in layout], dtype=np.float64)
+        self._active = [entry is not None for entry in layout]
+
+        # Entry i is the curve's output for the linear byte i, so a linear curve is the identity
+        x = np.arange(256) / 255.0
+        lut = np.zeros((NUM_MOTORS, 256), dtype=np.uint8)
+        for motor, (curve, active) in enumerate(zip(curves, self._active)):
+            if active:
+                y = np.clip(np.asarray(curve(x), dtype=np.float64), 0.0, 1.0)
+                lut[motor] = np.rint(y * 255.0).astype(np.uint8)
+        if escape_header:
+            lut[lut == FRAME_HEADER] = 254
+        self.lut = lut
+
+        # Plain-Python copies for the per-frame path, where NumPy call overhead dominates
+        self._rows = [(joint, sign, row) for joint, sign, row in
+                      zip(self._joints.tolist(), self._signs.tolist(), lut.tolist())]
+
+    def motor_values(self, joint_angles):
+        """Map one (base, shoulder, elbow, hand) tuple to a list of 10 motor bytes."""
+        lo = self.min_angle
+        span = self._span
+        values = []
+        for joint, sign, row in self._rows:
+            if not sign:
+                values.append(row[0])
+                continue
+            # Same operations in the same order as the original formula, so the truncation matches it
+            index = int(255 * (sign * joint_angles[joint] - lo) / span)
+            values.append(row[0 if index < 0 else 255 if index > 255 else index])
+        return values
+
+    def frame(self, joint_angles):
+        """Map one joint tuple straight to an 11-byte 0xAA frame."""
+        return bytes([FRAME_HEADER] + self.motor_values(joint_angles))
+
+    def motor_batch(self, joint_angles):
+        """
+        Map an (N, 4) array of joint angles to an (N, 10) uint8 array of motor bytes.
+
+        Suitable for whole recorded trajectories; no Python loop over rows.
+        """
+        angles = np.asarray(joint_angles, dtype=np.float64)
+        inputs = angles[:, self._joints] * self._signs
+        index = (255 * (inputs - self.min_angle) / self._span).astype(np.intp)
+        np.clip(index, 0, 255, out=index)
+        return self.lut[np.arange(NUM_MOTORS), index]
+
+    def frame_batch(self, joint_angles):
+        """Map an (N, 4) array of joint angles to an (N, 11) array of 0xAA frames."""
+        motors = self.motor_batch(joint_angles)
+        frames = np.empty((motors.shape[0], NUM_MOTORS + 1), dtype=np.uint8)
+        frames[:, 0] = FRAME_HEADER
+        frames[:, 1:] = motors
+        return frames
+
+
+def batch_mapper(curve="linear", escape_header=True, min_angle=MIN_ANGLE, max_angle=MAX_ANGLE):
+    """
+    HapticMapper.motor_batch as a frame_pool kernel.
+
+    Every worker process builds its own mapper from these picklable options.
+    """
+    mapper = HapticMapper(curves=parse_curve(curve), min_angle=min_angle, max_angle=max_angle,
+                          escape_header=escape_header)
+    return mapper.motor_batch
@@ -0,0 +1,117 @@
+"""
+Persistent, blitted renderer for the joint-angle gauges and haptic motor circles.
+
+The figure, gauge ticks (mathtext), background arcs and axes are built once.
+Each update only moves the angle bars, resizes the motor circles, changes the
+label text and blits those artists over a cached background, instead of
+clearing and rebuilding every axis per frame.
+"""
+import matplotlib.pyplot as plt
+import numpy as np
+
+NUM_JOINTS = 4
+NUM_MOTORS = 10
+
+COLORS = ["#39fc03", "#41b581", "#41fae4", "#f7adff", "#2877d1", "#e8204c", "#ffb703", "#e2edad", "#3c3c91", "#9c0b47"]
+
+ANGLE_BAR_WIDTH = 0.15
+
+
+class HapticRenderer:
+    """Draws 4 joint angle radian gauges and 10 haptic motor feedback circles."""
+
+    def __init__(self, colors=COLORS, figsize=(14, 7)):
+        self.fig = plt.figure(figsize=figsize)
+        self.canvas = self.fig.canvas
+        gs = self.fig.add_gridspec(2, NUM_JOINTS, height_ratios=[2, 1])
+
+        self._angle_bars = []
+        self._joint_titles = []
+        for i in range(NUM_JOINTS):
+            ax = self.fig.add_subplot(gs[0, i], projection='polar')
+            ax.set_theta_zero_location('N')
+            ax.set_theta_direction(-1)
+            ax.set_rticks([])
+            ax.set_ylim(0, 1)
+            ax.set_xticks(np.linspace(-np.pi, np.pi, 5))
+            ax.set_xticklabels([r"$-\pi$", r"$-\frac{\pi}{2}$", "0", r"$\frac{\pi}{2}$", r"$\pi$"])
+
+            # Background arc
+            ax.bar(np.linspace(-np.pi, np.pi, 100), [1] * 100, width=0.06, color='#eee', alpha=0.3)
+            # Current angle
+            bar = ax.bar([0.0], [1], width=ANGLE_BAR_WIDTH, color='C0', animated=True)[0]
+            title = ax.text(0.5, 1.12, "", transform=ax.transAxes, ha='center', va='bottom', animated=True)
+            self._angle_bars.append(bar)
+            self._joint_titles.append(title)
+
+        ax_haptics = self.fig.add_subplot(gs[1, :])
+        ax_haptics.set_xlim(0, NUM_MOTORS)
+        ax_haptics.set_ylim(0, 1)
+        ax_haptics.axis('off')
+        ax_haptics.set_title("Haptic Motor Feedback", fontsize=14)
+
+        self._circles = []
+        self._motor_labels = []
+        for i, color in enumerate(colors):
+            circle = plt.Circle((i + 0.5, 0.5), 0.1, color=color, animated=True)
+            ax_haptics.add_patch(circle)
+            label = ax_haptics.text(i + 0.5, 0.05, "", ha='center', va='center', fontsize=9, animated=True)
+            self._circles.append(circle)
+            self._motor_labels.append(label)
+
+        self._status = self.fig.text(0.5, 0.98, "", ha='center', va='top', fontsize=10, animated=True)
+
+        self._animated = self._angle_bars + self._joint_titles + self._circles + self._motor_labels + [self._status]
+        self._background = None
+        self._last = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        # A full draw (first show, resize) leaves out the animated artists; cache it and put them back.
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        for artist in self._animated:
+            self.fig.draw_artist(artist)
+
+    def update(self, joint_angles_rad, motor_values, status=None):
+        """
+        Redraw only what changed since the last frame.
+
+        Args:
+            joint_angles_rad (list of float): 4 values in radians (-π to π)
+            motor_values (list of int): 10 values between 1–255.
+            status (str): optional line shown at the top of the figure.
+        """
+        if len(joint_angles_rad) != NUM_JOINTS:
+            raise ValueError("Please provide 4 joint angles (radians).")
+        if len(motor_values) != NUM_MOTORS:
+            raise ValueError("Please provide 10 haptic motor values (1–255).")
+
+        frame = (tuple(joint_angles_rad), tuple(motor_values), status)
+        if frame == self._last and self._background is not None:
+            # Nothing changed; just keep the GUI responsive
+            self.canvas.flush_events()
+            return
+        self._last = frame
+
+        for i, angle in enumerate(joint_angles_rad):
+            self._angle_bars[i].set_x(angle - ANGLE_BAR_WIDTH / 2)
+            self._joint_titles[i].set_text(f"Joint {i+1}\n{angle:.2f} rad")
+
+        for i, val in enumerate(motor_values):
+            self._circles[i].set_radius(0.1 + (val / 255.0) * 0.3)
+            self._motor_labels[i].set_text(f"{val}")
+
+        if status is not None:
+            self._status.set_text(status)
+
+        if self._background is None:
+            # First frame: a full draw caches the background via _on_draw
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_animated()
+        self.canvas.blit(self.fig.bbox)
+        self.canvas.flush_events()
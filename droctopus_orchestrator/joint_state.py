@@ -0,0 +1,86 @@
+"""
+Observable store for the four RoArm-M2-S joint angles.
+
+Setting a joint bumps a version counter and wakes every coroutine waiting in
+`wait_changed`, so consumers react to a keypress immediately instead of
+polling a set of globals on a timer. `changed_ns` keeps the
+time.monotonic_ns() of the last change, which latency.py histograms use as
+the origin of everything a change sets off.
+"""
+import asyncio
+import time
+from array import array
+
+JOINT_NAMES = ("base", "shoulder", "elbow", "hand")
+
+
+def _joint_property(index):
+    def getter(self):
+        return self._angles[index]
+
+    def setter(self, value):
+        if self._angles[index] != value:
+            self._angles[index] = value
+            self._notify()
+
+    return property(getter, setter, doc=f"{JOINT_NAMES[index]} angle in radians")
+
+
+class JointState:
+    """Joint angles in radians with change notification."""
+
+    __slots__ = ("_angles", "_version", "_changed", "changed_ns")
+
+    base = _joint_property(0)
+    shoulder = _joint_property(1)
+    elbow = _joint_property(2)
+    hand = _joint_property(3)
+
+    def __init__(self, base=0.0, shoulder=0.0, elbow=0.0, hand=0.0):
+        self._angles = array('d', (base, shoulder, elbow, hand))
+        self._version = 0
+        self._changed = asyncio.Event()
+        self.changed_ns = time.monotonic_ns()  # may be backdated to the event behind a change, e.g. a keypress
+
+    @property
+    def version(self):
+        """Incremented on every change."""
+        return self._version
+
+    @property
+    def angles(self):
+        """Snapshot of (base, shoulder, elbow, hand)."""
+        return tuple(self._angles)
+
+    def update(self, **angles):
+        """Set several joints at once with a single notification."""
+        changed = False
+        for name, value in angles.items():
+            index = JOINT_NAMES.index(name)
+            if self._angles[index] != value:
+                self._angles[index] = value
+                changed = True
+        if changed:
+            self._notify()
+
+    def _notify(self):
+        self.changed_ns = time.monotonic_ns()
+        self._version += 1
+        # Waiters hold the old event; swap in a fresh one for the next change
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait_changed(self, seen_version, timeout=None):
+        """
+        Wait until the version differs from `seen_version` and return the new version.
+
+        Returns immediately if a change already happened. With a timeout, returns
+        the current (possibly unchanged) version once it expires.
+        """
+        if self._version != seen_version:
+            return self._version
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._version
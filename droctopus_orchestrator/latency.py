@@ -0,0 +1,168 @@
+"""
+Always-on latency histograms for the hot paths.
+
+Timestamps are time.monotonic_ns() integers carried with each frame (see
+FrameWriter.submit and ArmSerial.write). A LatencyHistogram buckets
+nanosecond values HdrHistogram-style: exact below 64 ns, then 32 linear
+sub-buckets per power of two, so every reported value is within about 3%
+and recording is a bit_length, a shift and a list increment (well under a
+microsecond) whatever the range.
+
+    metrics = LatencyStats()
+    mapping = metrics.histogram("mapping")
+    started = time.monotonic_ns()
+    ...
+    mapping.record(time.monotonic_ns() - started)
+
+    metrics.report()                    # p50/p99/max per stage, e.g. on exit
+    await metrics.serve(9108)           # or scrape http://127.0.0.1:9108/metrics
+"""
+import asyncio
+
+SUB_BITS = 5
+SUB_BUCKETS = 1 << SUB_BITS
+# Indexes cover every 64-bit value; latencies use the first thousand or so
+BUCKETS = (64 - SUB_BITS) * SUB_BUCKETS + 2 * SUB_BUCKETS
+
+
+def bucket_upper(index):
+    """Highest value that lands in bucket `index`."""
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index - shift * SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+def seconds(ns):
+    """Nanoseconds to seconds, passing None through."""
+    return ns / 1e9 if ns is not None else None
+
+
+def ms(value, digits=2, width=0, unit=" ms"):
+    """Seconds as milliseconds for a report, or "-" for None; `width` right-aligns table columns."""
+    if value is None:
+        return "-".rjust(width + len(unit) if width else 0)
+    return f"{value * 1000:{width}.{digits}f}{unit}"
+
+
+class LatencyHistogram:
+    """Log-linear histogram of nanosecond latencies."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        if ns < 2 * SUB_BUCKETS:
+            index = ns if ns > 0 else 0
+        else:
+            shift = ns.bit_length() - SUB_BITS - 1
+            index = shift * SUB_BUCKETS + (ns >> shift)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, p):
+        """Latency in ns at percentile p (0..1), None if nothing was recorded."""
+        if not self.count:
+            return None
+        target = max(1, p * self.count)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(bucket_upper(index), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def reset(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+
+class LatencyStats:
+    """Named LatencyHistograms, one per pipeline stage, with a report and a scrape endpoint."""
+
+    def __init__(self, prefix="droctopus"):
+        self.prefix = prefix
+        self.stages = {}  # name -> LatencyHistogram, in the order they were added
+        self._server = None
+
+    def histogram(self, stage):
+        """The histogram for `stage`, created on first use; keep it around on hot paths."""
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = LatencyHistogram()
+        return histogram
+
+    def add(self, stage, histogram):
+        """Publish a histogram owned by someone else (e.g. FrameWriter.write_latency) under `stage`."""
+        self.stages[stage] = histogram
+        return histogram
+
+    def summary(self):
+        """{stage: {"count", "mean", "p50", "p99", "max"}} with latencies in seconds."""
+        return {stage: {"count": h.count, "mean": seconds(h.mean), "p50": seconds(h.percentile(0.5)),
+                        "p99": seconds(h.percentile(0.99)), "max": seconds(h.max if h.count else None)}
+                for stage, h in self.stages.items()}
+
+    def report(self):
+        def column(value):
+            return ms(value, width=8, unit="")
+
+        print(f"{'latency (ms)':<28} {'count':>8} {'p50':>8} {'p99':>8} {'max':>8}")
+        for stage, stats in self.summary().items():
+            print(f"{stage:<28} {stats['count']:>8} {column(stats['p50'])} {column(stats['p99'])} "
+                  f"{column(stats['max'])}")
+
+    def prometheus(self):
+        """The histograms as a Prometheus text-format summary."""
+        name = f"{self.prefix}_latency_seconds"
+        lines = [f"# TYPE {name} summary"]
+        maxima = [f"# TYPE {self.prefix}_latency_max_seconds gauge"]
+        for stage, h in self.stages.items():
+            label = stage.replace("\\", "\\\\").replace('"', '\\"')
+            for quantile in (0.5, 0.9, 0.99, 0.999):
+                value = h.percentile(quantile)
+                lines.append(f'{name}{{stage="{label}",quantile="{quantile}"}} '
+                             f'{value / 1e9 if value is not None else "NaN"}')
+            lines.append(f'{name}_sum{{stage="{label}"}} {h.total / 1e9}')
+            lines.append(f'{name}_count{{stage="{label}"}} {h.count}')
+            maxima.append(f'{self.prefix}_latency_max_seconds{{stage="{label}"}} {h.max / 1e9}')
+        return "\n".join(lines + maxima) + "\n"
+
+    async def serve(self, port, host="127.0.0.1"):
+        """Answer every HTTP request on host:port with prometheus(); returns once listening."""
+
+        async def handle(reader, writer):
+            try:
+                await reader.readuntil(b"\r\n\r\n")
+                body = self.prometheus().encode()
+                writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                             b"Content-Length: %d\r\n\r\n" % len(body) + body)
+                await writer.drain()
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+        self._server = await asyncio.start_server(handle, host, port)
+        print(f"Latency metrics at http://{host}:{port}/metrics")
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
@@ -1,9 +1,18 @@
 import asyncio
-from bleak import BleakClient, BleakScanner
-import serial
 import argparse
-import threading
-import json
+import time
+
+from arm_commands import encode_all_angles
+from arm_serial import ArmSerial
+from ble_discovery import format_timings, timed
+from ble_writer import FrameWriter
+from fanout import Fanout
+from framing import FrameDecoder, make_encoder
+from latency import LatencyStats
+from ring_buffer import FrameRing
+from sampled_log import SampledLogger, setup_logging
+from session_log import SessionRecorder
+from transport import make_transport
 
 # UUIDs
 SERVICE_UUID_1 = "12345678-1234-1234-1234-1234567890ab"
@@ -16,98 +25,234 @@ CHARACTERISTIC_UUID_2 = "fedcbafe-4321-8765-4321-fedcbafedcba"
 DEVICE_NAME_1 = "ESP32_Sender"
 DEVICE_NAME_2 = "ESP32_Receiver"
 
-# Global buffer for collecting incoming data from ESP32 #1
-data_buffer = bytearray()
+# Ring buffer for collecting incoming data from ESP32 #1, already framed with 0xAA
+data_buffer = FrameRing(slots=64)
 
-# Clients (global so accessible inside callbacks)
-client1 = None
-client2 = None
+# Wire framing: "legacy" (0xAA + 10 raw bytes) or "cobs" (COBS with sequence number and CRC-8).
+# The receiver can also take "delta" (keyframes + changed motors only, see frame_delta.py).
+framing = "legacy"
+output_framing = "legacy"
+frame_decoder = FrameDecoder()
+frame_encoder = make_encoder("legacy")
 
-async def handle_notify(sender, data):
-    """Callback function when notification received from ESP32 #1."""
-    global data_buffer
-
-    print(f"Received from ESP32 #1: {list(data)}")
-
-    # Add received data to buffer
-    data_buffer.extend(data)
-
-    # Process buffer in 10-byte chunks
-    while len(data_buffer) >= 10:
-        chunk = data_buffer[:10]
-        data_buffer = data_buffer[10:]
-
-        # Frame the chunk with 0xAA header
-        framed_data = bytes([0xAA]) + chunk
+# Robot arm serial transport
+arm = None
 
-        # Send framed data to ESP32 #2
-        await client2.write_gatt_char(CHARACTERISTIC_UUID_2, framed_data)
-        print(f"Sent to ESP32 #2 (with header): {list(framed_data)}")
+# Real hardware or the in-memory simulation (see transport.py)
+transport = None
 
-async def main():
+# Supervised BLE links; they reconnect on their own if an ESP32 drops
+supervisor = None
 
+# Background writer that owns ESP32 #2's characteristic, or a Fanout over several vests
+writer2 = None
 
+# Per-frame log lines, sampled (see sampled_log.py); --log-every 1 shows every frame
+received_log = SampledLogger("droctopus.relay.received")
+queued_log = SampledLogger("droctopus.relay.queued")
 
-    global ser
-    parser = argparse.ArgumentParser(description='Serial JSON Communication')
-    parser.add_argument('port', type=str, help='Serial port name (e.g., COM1 or /dev/ttyUSB0)')
+# Session recorder (see session_log.py), None unless --record is given
+recorder = None
 
-    args = parser.parse_args()
+# Latency histograms per stage (see latency.py), printed on exit and served with --metrics-port
+metrics = LatencyStats()
+decode_latency = metrics.histogram("notify decode")
 
-    ser = serial.Serial(args.port, baudrate=115200, dsrdtr=None)
-    ser.setRTS(False)
-    ser.setDTR(False)
+# Startup stage timeouts in seconds
+SERIAL_TIMEOUT = 5.0
+BLE_TIMEOUT = 30.0
 
-    # serial_recv_thread = threading.Thread(target=read_serial)
-    # serial_recv_thread.daemon = True
-    # serial_recv_thread.start()
+def forward(frame, received_ns=None):
+    """Queue a frame for ESP32 #2, recording it if a session is being recorded."""
+    writer2.submit(frame, received_ns)
+    if recorder is not None:
+        recorder.frame(frame)
 
-    initial_command = {"T":102,"base":0,"shoulder":0,"elbow":1.57,"hand":3.14,"spd":0,"acc":10} # TODO: change this to All Angle Control -> {"T":102,"base":0,"shoulder":0,"elbow":1.57,"hand":3.14,"spd":0,"acc":10}
-    ser.write((json.dumps(initial_command) + "\n").encode())
+async def handle_notify(sender, data):
+    """Callback function when notification received from ESP32 #1."""
+    received_ns = time.monotonic_ns()
+    received_log("Received from ESP32 #1: %s", data)
+
+    if framing == "cobs":
+        # Decoder finds frame boundaries itself and skips anything corrupted
+        payloads = [payload for seq, payload in frame_decoder.feed(data)]
+    elif output_framing == "legacy":
+        # Add received data to the ring; every full 10-byte chunk becomes an 0xAA frame in place
+        data_buffer.write(data)
+
+        for framed_data in data_buffer.frames():
+            # Queue framed data for ESP32 #2; the writer task sends it without blocking this callback
+            forward(framed_data, received_ns)
+            queued_log("Queued for ESP32 #2 (with header): %s", framed_data)
+        decode_latency.record(time.monotonic_ns() - received_ns)
+        return
+    else:
+        data_buffer.write(data)
+        payloads = [framed_data[1:] for framed_data in data_buffer.frames()]
+
+    for payload in payloads:
+        if output_framing == "delta":
+            # Encoded by the writer when sent, so the delta chain only covers frames that went out
+            forward(payload, received_ns)
+        else:
+            forward(frame_encoder.encode(payload), received_ns)
+        queued_log("Queued for ESP32 #2 (%s): %s", output_framing, payload)
+    decode_latency.record(time.monotonic_ns() - received_ns)
+
+async def start_arm(port):
+    """Open the arm's serial port and send the initial pose."""
+    ser = await asyncio.to_thread(transport.open_arm, port)
+    arm_serial = await ArmSerial(ser).start()
+
+    initial_command = encode_all_angles(0, 0, 1.57, 3.14, spd=0, acc=10)  # All Angle Control (T:102)
+    await arm_serial.write(initial_command)
     # https://www.waveshare.com/wiki/RoArm-M2-S_Robotic_Arm_Control
+    return arm_serial
 
+async def main():
+    global arm, framing, output_framing, frame_encoder, transport, recorder
+    started = time.monotonic()  # for the startup-to-first-frame report
+    parser = argparse.ArgumentParser(description='Serial JSON Communication')
+    parser.add_argument('port', type=str, nargs='?',
+                        help='Serial port name (e.g., COM1 or /dev/ttyUSB0); not needed with --transport sim')
+    parser.add_argument('--framing', choices=['legacy', 'cobs'], default='legacy',
+                        help='Frame format used by both ESP32s: 0xAA header or COBS with CRC-8')
+    parser.add_argument('--output-framing', choices=['legacy', 'cobs', 'delta'], default=None,
+                        help='Frame format for ESP32 #2 if different from --framing; '
+                             'delta only sends motors that changed')
+    parser.add_argument('--rescan', action='store_true',
+                        help='Ignore the cached BLE addresses and scan for both ESP32s')
+    parser.add_argument('--serial-timeout', type=float, default=SERIAL_TIMEOUT,
+                        help='Seconds allowed for opening the arm\'s serial port')
+    parser.add_argument('--ble-timeout', type=float, default=BLE_TIMEOUT,
+                        help='Seconds allowed for finding and connecting both ESP32s')
+    parser.add_argument('--transport', default='bleak',
+                        help='"bleak" for the real devices, or "sim[:latency=..,jitter=..,mtu=..,loss=..,rate=..]" '
+                             'to simulate both ESP32s and the arm in memory')
+    parser.add_argument('--receivers', metavar='PATTERN',
+                        help='Drive every receiver whose name matches PATTERN (e.g. "ESP32_Receiver*") '
+                             'instead of a single ESP32 #2')
+    parser.add_argument('--vests', type=int, default=None,
+                        help='With --receivers, stop scanning once this many vests are connected')
+    parser.add_argument('--vest-rate', type=float, default=None,
+                        help='Most frames per second written to each vest')
+    parser.add_argument('--record', metavar='PATH',
+                        help='Record every frame relayed to ESP32 #2 to a session file '
+                             '(play it back with replay_session.py)')
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='Lowest level of log lines shown; WARNING hides the per-frame lines')
+    parser.add_argument('--log-every', type=int, default=100,
+                        help='Show one per-frame log line out of this many (1 shows every frame)')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='Serve the latency histograms in Prometheus text format on this local port')
 
-    global client1, client2
-
-    print("Scanning for devices...")
-
-    devices = await BleakScanner.discover()
-    address1 = None
-    address2 = None
-
-    for d in devices:
-        if d.name == DEVICE_NAME_1:
-            address1 = d.address
-        elif d.name == DEVICE_NAME_2:
-            address2 = d.address
-
-    if not address1 or not address2:
-        print("Could not find both devices!")
-        print(f"Found addresses so far: {[d.name for d in devices]}")
+    args = parser.parse_args()
+    if args.port is None and not args.transport.startswith("sim"):
+        parser.error("the serial port is required unless --transport sim is used")
+    setup_logging(args.log_level, every=args.log_every)
+    framing = args.framing
+    output_framing = args.output_framing or args.framing
+    frame_encoder = make_encoder(output_framing)
+    transport = make_transport(args.transport, framing=framing, output_framing=output_framing)
+
+    global supervisor, writer2
+
+    # Serial port and both BLE links come up side by side; each stage has its own timeout.
+    # The BLE stage tries cached addresses, then one early-exit scan, and connects both ESP32s at once.
+    timings = {}
+    names = [DEVICE_NAME_1] if args.receivers else [DEVICE_NAME_1, DEVICE_NAME_2]
+    supervisor = transport.supervisor(names, use_cache=not args.rescan)
+    vests = []
+
+    async def start_ble():
+        if not await supervisor.start(timings):
+            return False
+        if args.receivers:
+            # All vests advertise the same name; each one becomes a link of its own, named by address
+            vests.extend(await supervisor.add_matching(args.receivers, args.vests, timings))
+            return bool(vests)
+        return True
+
+    arm_result, ble_result = await asyncio.gather(
+        timed("serial", start_arm(args.port), timings, args.serial_timeout),
+        timed("ble", start_ble(), timings, args.ble_timeout),
+        return_exceptions=True,
+    )
+    timings["total"] = time.monotonic() - started
+    print(f"Startup: {format_timings(timings)}")
+
+    if isinstance(arm_result, BaseException) or ble_result is not True:
+        if isinstance(arm_result, BaseException):
+            print(f"Could not open the robot arm on {args.port}: {arm_result!r}")
+        else:
+            await arm_result.close()
+        if isinstance(ble_result, BaseException):
+            print(f"BLE startup failed: {ble_result!r}")
+        else:
+            print("Could not find both devices!" if not args.receivers else
+                  f"Could not find ESP32 #1 and any receiver matching {args.receivers}!")
+            print(f"Connected so far: {list(supervisor.clients())}")
+        await supervisor.close()
+        transport.close()
         return
 
-    print(f"Found devices:")
-    print(f"ESP32_Sender at {address1}")
-    print(f"ESP32_Receiver at {address2}")
-
-    client1 = BleakClient(address1)
-    client2 = BleakClient(address2)
-
-    # Connect to both devices
-    async with client1, client2:
-        await client1.connect()
-        await client2.connect()
-
-        print("Connected to both ESP32 #1 and ESP32 #2!")
-
-        # Start listening to ESP32 #1 notifications
-        await client1.start_notify(CHARACTERISTIC_UUID_1, handle_notify)
+    # Serial transport; its reader thread parses the arm's feedback into arm.latest
+    arm = arm_result
+    sender = supervisor[DEVICE_NAME_1]
+
+    try:
+        print(f"ESP32_Sender at {sender.address}")
+        if vests:
+            if args.vests is not None and len(vests) < args.vests:
+                print(f"Only found {len(vests)} of {args.vests} vests, carrying on with those")
+            print(f"Connected to ESP32 #1 and {len(vests)} vests: {', '.join(vest.name for vest in vests)}")
+
+            # One writer per vest, each with its own delta state, so a slow vest only holds up itself
+            encoder_factory = (lambda: make_encoder("delta")) if output_framing == "delta" else None
+            writer2 = Fanout(vests, CHARACTERISTIC_UUID_2, max_rate=args.vest_rate, encoder_factory=encoder_factory,
+                             report_interval=5.0, started_at=started).start()
+        else:
+            receiver = supervisor[DEVICE_NAME_2]
+            print(f"ESP32_Receiver at {receiver.address}")
+            print("Connected to both ESP32 #1 and ESP32 #2!")
+
+            encode = frame_encoder.encode if output_framing == "delta" else None
+            writer2 = FrameWriter(receiver.client, CHARACTERISTIC_UUID_2, report_interval=5.0, encode=encode,
+                                  started_at=started, max_rate=args.vest_rate).start()
+            if output_framing == "delta":
+                # The receiver lost its delta state with the connection; start over from a keyframe
+                receiver.on_up(lambda client: frame_encoder.force_keyframe())
+            # Pause while ESP32 #2 is away, then replay the latest frame to it
+            receiver.attach_writer(writer2)
+
+        writer2.publish_latency(metrics, "ble write", origin_stage="notify to write")
+        metrics.add("serial write", arm.write_latency)
+        if args.metrics_port:
+            await metrics.serve(args.metrics_port)
+
+        if args.record:
+            recorder = SessionRecorder(args.record, framing=output_framing)
+
+        # Start listening to ESP32 #1 notifications; re-subscribed after every reconnect
+        await sender.subscribe(CHARACTERISTIC_UUID_1, handle_notify)
 
         print("Listening for notifications from ESP32 #1...")
 
         # Keep running indefinitely
         while True:
             await asyncio.sleep(1)
+    finally:
+        if isinstance(writer2, Fanout):
+            writer2.report()
+        metrics.close()
+        metrics.report()
+        supervisor.report()
+        await supervisor.close()
+        await arm.close()
+        transport.close()
+        if recorder is not None:
+            recorder.close()
+            print(f"Recorded {recorder.count} frames to {args.record}")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,5 +1,12 @@
 import asyncio
-from bleak import BleakClient, BleakScanner
+import argparse
+import sys
+import time
+
+from ble_supervisor import LinkSupervisor
+from ble_writer import FrameWriter
+from command_input import CommandPlayer, LineReader, parse_line
+from framing import make_encoder
 
 # UUIDs (same as before)
 SERVICE_UUID_2 = "87654321-4321-4321-4321-0987654321ba"
@@ -8,59 +15,66 @@ CHARACTERISTIC_UUID_2 = "fedcbafe-4321-8765-4321-fedcbafedcba"
 # ESP32 advertised name
 DEVICE_NAME_2 = "ESP32_Receiver"
 
-async def send_user_commands():
-    print("Scanning for ESP32_Receiver...")
-
-    devices = await BleakScanner.discover()
-    address2 = None
+frame_encoder = make_encoder("legacy")
 
-    for d in devices:
-        if d.name == DEVICE_NAME_2:
-            address2 = d.address
+async def send_user_commands(script=None):
+    """
+    Args:
+        script (str): file of commands to play (see command_input.py), None or "-" to read stdin.
+    """
+    started = time.monotonic()
 
-    if not address2:
+    # Last-known address first, falling back to a scan that stops once the receiver is seen;
+    # afterwards the supervisor reconnects on its own if the receiver drops
+    supervisor = LinkSupervisor([DEVICE_NAME_2])
+    if not await supervisor.start():
         print("Could not find ESP32_Receiver!")
         return
 
-    print(f"Found ESP32_Receiver at {address2}")
-
-    client2 = BleakClient(address2)
-
-    async with client2:
-        await client2.connect()
-        print("Connected to ESP32_Receiver!")
-
-        while True:
+    receiver = supervisor[DEVICE_NAME_2]
+    print(f"Connected to ESP32_Receiver at {receiver.address} "
+          f"({(time.monotonic() - started) * 1000:.0f} ms after startup)!")
+
+    stream = open(script) if script and script != "-" else sys.stdin
+    try:
+        # Background writer that owns the receiver characteristic; replays the last frame after a reconnect
+        writer2 = FrameWriter(receiver.client, CHARACTERISTIC_UUID_2, started_at=started).start()
+        receiver.attach_writer(writer2)
+
+        reader = LineReader(stream, prompt="Enter 10 integers (0-255) separated by spaces, or commands: ")
+        interactive = reader.prompt is not None
+
+        def send(values):
+            # Frame with 0xAA header and queue for ESP32_Receiver
+            framed_data = frame_encoder.encode(values)
+            writer2.submit(framed_data)
+            if interactive:
+                print(f"Queued: {[hex(b) for b in framed_data]}")
+
+        # Streamed frames wait for the previous one to leave the queue, so none are coalesced away
+        player = CommandPlayer(send, writer2.wait_for_room)
+        # Read on a thread, so the writer and the link supervisor keep running while waiting for input
+        async for line in reader.lines():
             try:
-                # Get user input
-                user_input = input("Enter 10 integers (0-255) separated by spaces: ")
-                numbers = user_input.strip().split()
-
-                # Validate
-                if len(numbers) != 10:
-                    print("Error: You must enter exactly 10 integers.")
-                    continue
-
-                try:
-                    byte_values = [int(x) for x in numbers]
-                except ValueError:
-                    print("Error: Please enter only valid integers.")
-                    continue
-
-                if any(not (0 <= b <= 255) for b in byte_values):
-                    print("Error: Integers must be between 0 and 255.")
-                    continue
-
-                # Frame with 0xAA header
-                framed_data = bytes([0xAA] + byte_values)
-
-                # Send to ESP32_Receiver
-                await client2.write_gatt_char(CHARACTERISTIC_UUID_2, framed_data)
-                print(f"Sent: {[hex(b) for b in framed_data]}")
-
-            except KeyboardInterrupt:
-                print("\nExiting...")
-                break
+                commands = parse_line(line)
+            except ValueError as e:
+                print(f"Error: {e}")
+                continue
+            await player.run(commands)
+
+        await writer2.flush()
+        print(f"Sent {writer2.sent} of {player.frames} frames from {reader.lines_read} lines, "
+              f"{writer2.dropped} coalesced")
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        supervisor.report()
+        await supervisor.close()
 
 if __name__ == "__main__":
-    asyncio.run(send_user_commands())
+    parser = argparse.ArgumentParser(description='Send motor values to ESP32_Receiver')
+    parser.add_argument('script', nargs='?',
+                        help='File of frames and commands to play (see command_input.py); '
+                             'without it, or with -, they are read from stdin, which may be piped')
+    args = parser.parse_args()
+    asyncio.run(send_user_commands(args.script))
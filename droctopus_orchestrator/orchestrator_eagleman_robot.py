@@ -1,30 +1,31 @@
 import asyncio
-from bleak import BleakClient, BleakScanner
-import serial
 import argparse
-import json
+import time
 import matplotlib.pyplot as plt
-import numpy as np
 
-# Global figure and axes creation (one-time setup)
-fig = plt.figure(figsize=(14, 7))
-gs = fig.add_gridspec(2, 4, height_ratios=[2, 1])  # Create 4 columns for joint angle gauges
-ax_row1 = [fig.add_subplot(gs[0, i], projection='polar') for i in range(4)]  # 4 subplots in the first row
-ax_haptics = fig.add_subplot(gs[1, :])  # Single subplot for haptic motor feedback (spans all columns)
-
-# Turn on interactive mode
-plt.ion()
-
-# Set up the plot only once
-ax_haptics.set_xlim(0, 10)
-ax_haptics.set_ylim(0, 1)
-ax_haptics.axis('off')
-ax_haptics.set_title("Haptic Motor Feedback", fontsize=14)
-
-# Define the colors and other settings you may want to use
+from arm_commands import encode_all_angles
+from arm_serial import ArmSerial
+from ble_writer import FrameWriter
+from fanout import Fanout
+from frame_pool import FramePipeline
+from framing import make_encoder
+from haptic_mapping import HapticMapper, parse_curve
+from haptic_renderer import HapticRenderer
+from joint_state import JointState
+from latency import LatencyStats
+from rate_loop import POLICIES, RateLoop
+from render_process import RenderProcess
+from sampled_log import SampledLogger, setup_logging
+from session_log import SessionRecorder
+from transport import make_transport
+
+# Colors for the haptic motor circles
 COLORS = ["#39fc03", "#41b581", "#41fae4", "#f7adff", "#2877d1", "#e8204c", "#ffb703", "#e2edad", "#3c3c91", "#9c0b47"]
 BACKGROUND = "#ffeccf"
 
+# Persistent renderer, created on first draw so a render process can own the figure instead
+renderer_view = None
+
 
 # UUIDs
 SERVICE_UUID_2 = "87654321-4321-4321-4321-0987654321ba"
@@ -33,226 +34,431 @@ CHARACTERISTIC_UUID_2 = "fedcbafe-4321-8765-4321-fedcbafedcba"
 # ESP32 advertised name
 DEVICE_NAME_2 = "ESP32_Receiver"
 
-# Global serial object
-ser = None
+# Global robot arm serial transport
+arm = None
+
+# How the visualization is drawn: "process" (separate render process), "inline" (on the event loop) or "off"
+render_mode = "process"
+renderer = None
+
+# Global joint angles; setting one wakes the serial and BLE loops
+joint_state = JointState(base=0.0, shoulder=0.0, elbow=1.57, hand=3.14)
+
+# Joint angles reported back by the arm, and which state the haptics follow
+measured_state = JointState(base=0.0, shoulder=0.0, elbow=1.57, hand=3.14)
+haptic_state = joint_state
 
-# Global angles
-base_angle = 0.0
-shoulder_angle = 0.0
-elbow_angle = 1.57
-hand_angle = 3.14
+# Minimum time between robot serial commands (seconds)
+arm_min_interval = 0.05
 
-# For detecting changes
-prev_base = None
-prev_shoulder = None
-prev_elbow = None
-prev_hand = None
+# Fixed-rate tickers (see rate_loop.py) for the haptics and arm loops; None sends on every change instead
+haptics_loop = None
+arm_loop = None
+
+# Worker processes that compute the haptic frames (--workers), or None to map on the event loop
+frame_pipeline = None
 
 MIN_ANGLE = -3.14
 MAX_ANGLE = 3.14
+
+# Joint angle -> motor byte lookup tables (each joint drives a mirrored motor pair)
+haptic_mapper = HapticMapper(min_angle=MIN_ANGLE, max_angle=MAX_ANGLE)
+
+# Wire framing for the receiver (see framing.py)
+framing = "legacy"
+frame_encoder = make_encoder("legacy")
+
+# Real hardware or the in-memory simulation (see transport.py)
+transport = None
+
+# Per-frame log lines, sampled (see sampled_log.py); --log-every 1 shows every frame.
+# Arm commands only go out on changes, so they are limited to one line a second instead.
+haptics_log = SampledLogger("droctopus.haptics")
+arm_log = SampledLogger("droctopus.arm", every=1, interval=1.0)
+
+# Session recorder (see session_log.py), None unless --record is given
+recorder = None
+
+# Latency histograms per stage (see latency.py), printed on exit and served with --metrics-port.
+# A keypress backdates joint_state.changed_ns, so "change to haptics" and the end-to-end stage start at the key.
+metrics = LatencyStats()
+key_latency = metrics.histogram("key input")
+wake_latency = metrics.histogram("change to haptics")
+mapping_latency = metrics.histogram("mapping")
+render_latency = metrics.histogram("render")
+
 # Visualization function
-def draw_combined_visual(joint_angles_rad, motor_values):
+def draw_combined_visual(joint_angles_rad, motor_values, status=None):
     """
     Draws 4 joint angle radian gauges and 10 haptic motor feedback circles.
     
     Args:
         joint_angles_rad (list of float): 4 values in radians (-π to π)
         motor_values (list of int): 10 values between 1–255.
+        status (str): optional line shown above the gauges (e.g. render/control rates).
     """
-    if len(joint_angles_rad) != 4:
-        raise ValueError("Please provide 4 joint angles (radians).")
-    if len(motor_values) != 10:
-        raise ValueError("Please provide 10 haptic motor values (1–255).")
-
-    # --- Update the 4 Joint Angle Gauges ---
-    for i, (ax, angle) in enumerate(zip(ax_row1, joint_angles_rad)):
-        ax.clear()
-        ax.set_theta_zero_location('N')
-        ax.set_theta_direction(-1)
-        ax.set_rticks([])
-        ax.set_xticks(np.linspace(-np.pi, np.pi, 5))
-        ax.set_xticklabels([r"$-\pi$", r"$-\frac{\pi}{2}$", "0", r"$\frac{\pi}{2}$", r"$\pi$"])
-
-        # Background arc
-        ax.bar(np.linspace(-np.pi, np.pi, 100), [1]*100, width=0.06, color='#eee', alpha=0.3)
-        # Current angle
-        ax.bar([angle], [1], width=0.15, color='C0')
-        ax.set_title(f"Joint {i+1}\n{angle:.2f} rad", va='bottom')
-
-    # --- Update the 10 Haptic Motor Circles ---
-    ax_haptics.clear()  # Clear the existing motor circle plot
-    ax_haptics.set_xlim(0, 10)
-    ax_haptics.set_ylim(0, 1)
-    ax_haptics.axis('off')
-    ax_haptics.set_title("Haptic Motor Feedback", fontsize=14)
-
-    for i, (val, color) in enumerate(zip(motor_values, COLORS)):
-        radius = 0.1 + (val / 255.0) * 0.3
-        circle = plt.Circle((i + 0.5, 0.5), radius, color=color)
-        ax_haptics.add_patch(circle)
-        ax_haptics.text(i + 0.5, 0.05, f"{val}", ha='center', va='center', fontsize=9)
-
-    # Redraw the plot and pause for a brief moment to allow for updates
-    plt.draw()  
-    plt.pause(0.001)  # Short pause to allow updates without blocking
+    global renderer_view
+
+    if renderer_view is None:
+        plt.ion()
+        renderer_view = HapticRenderer(COLORS)
+        plt.show(block=False)
+
+    renderer_view.update(joint_angles_rad, motor_values, status)
 
 
 async def send_robot_commands():
-    global base_angle, shoulder_angle, elbow_angle, hand_angle
-    global prev_base, prev_shoulder, prev_elbow, prev_hand
+    last_write = float("-inf")
+    version = -1  # always send the initial pose
 
     while True:
-        if (base_angle != prev_base or
-            shoulder_angle != prev_shoulder or
-            elbow_angle != prev_elbow or
-            hand_angle != prev_hand):
-
-            command = {
-                "T": 102,
-                "base": base_angle,
-                "shoulder": shoulder_angle,
-                "elbow": elbow_angle,
-                "hand": hand_angle,
-                "spd": 10,
-                "acc": 10
-            }
-
-            ser.write((json.dumps(command) + "\n").encode())
-            print(f"Sent robot command: {command}")
-
-            prev_base = base_angle
-            prev_shoulder = shoulder_angle
-            prev_elbow = elbow_angle
-            prev_hand = hand_angle
-
-        await asyncio.sleep(0.1)
+        if arm_loop is not None:
+            # Fixed rate: send on the ticks where a joint changed since the last command
+            await arm_loop.tick()
+            if joint_state.version == version:
+                continue
+        else:
+            # Sleep until a joint changes instead of polling
+            version = await joint_state.wait_changed(version)
+
+            # Keep at least arm_min_interval between writes; changes made meanwhile are coalesced
+            delay = last_write + arm_min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        version = joint_state.version
+        base_angle, shoulder_angle, elbow_angle, hand_angle = joint_state.angles
+
+        command = encode_all_angles(base_angle, shoulder_angle, elbow_angle, hand_angle, spd=10, acc=10)
+        await arm.write(command)
+        last_write = time.monotonic()
+        if recorder is not None:
+            recorder.command(base_angle, shoulder_angle, elbow_angle, hand_angle, spd=10, acc=10)
+        arm_log("Sent robot command: base %.2f, shoulder %.2f, elbow %.2f, hand %.2f",
+                base_angle, shoulder_angle, elbow_angle, hand_angle)
+
+async def track_arm_telemetry():
+    """Mirror the arm's feedback stream into measured_state."""
+    await arm.set_feedback_flow(True)
+    async for telemetry in arm.telemetry():
+        base, shoulder, elbow, hand = telemetry.angles
+        measured_state.update(base=base, shoulder=shoulder, elbow=elbow, hand=hand)
+        if recorder is not None:
+            recorder.joints(telemetry.angles)
 
 async def keyboard_control():
     import sys
     import termios
     import tty
 
-    global base_angle, shoulder_angle, elbow_angle, hand_angle
-
     def getch():
         fd = sys.stdin.fileno()
         old_settings = termios.tcgetattr(fd)
         try:
             tty.setraw(sys.stdin.fileno())
             ch = sys.stdin.read(1)
+            pressed_ns = time.monotonic_ns()
         finally:
             termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
-        return ch
+        return ch, pressed_ns
 
     print("Keyboard control active (W/S: Shoulder, A/D: Base, Q/E: Elbow, T/G: Hand)")
 
     while True:
-        key = await asyncio.to_thread(getch)
+        key, pressed_ns = await asyncio.to_thread(getch)
+        version = joint_state.version
         step = 0.3  # radians
 
         if key.lower() == 'w':
-            shoulder_angle = min(shoulder_angle + step, MAX_ANGLE)
-            print(f"Shoulder up: {shoulder_angle:.2f}")
+            joint_state.shoulder = min(joint_state.shoulder + step, MAX_ANGLE)
+            print(f"Shoulder up: {joint_state.shoulder:.2f}")
         elif key.lower() == 's':
-            shoulder_angle = max(shoulder_angle - step, MIN_ANGLE)
-            print(f"Shoulder down: {shoulder_angle:.2f}")
+            joint_state.shoulder = max(joint_state.shoulder - step, MIN_ANGLE)
+            print(f"Shoulder down: {joint_state.shoulder:.2f}")
         elif key.lower() == 'a':
-            base_angle = max(base_angle - step, MIN_ANGLE)
-            print(f"Base rotate left: {base_angle:.2f}")
+            joint_state.base = max(joint_state.base - step, MIN_ANGLE)
+            print(f"Base rotate left: {joint_state.base:.2f}")
         elif key.lower() == 'd':
-            base_angle = min(base_angle + step, MAX_ANGLE)
-            print(f"Base rotate right: {base_angle:.2f}")
+            joint_state.base = min(joint_state.base + step, MAX_ANGLE)
+            print(f"Base rotate right: {joint_state.base:.2f}")
         elif key.lower() == 'q':
-            elbow_angle = min(elbow_angle + step, MAX_ANGLE)
-            print(f"Elbow up: {elbow_angle:.2f}")
+            joint_state.elbow = min(joint_state.elbow + step, MAX_ANGLE)
+            print(f"Elbow up: {joint_state.elbow:.2f}")
         elif key.lower() == 'e':
-            elbow_angle = max(elbow_angle - step, MIN_ANGLE)
-            print(f"Elbow down: {elbow_angle:.2f}")
+            joint_state.elbow = max(joint_state.elbow - step, MIN_ANGLE)
+            print(f"Elbow down: {joint_state.elbow:.2f}")
         elif key.lower() == 't':
-            hand_angle = min(hand_angle + step, MAX_ANGLE)
-            print(f"Hand rotate open: {hand_angle:.2f}")
+            joint_state.hand = min(joint_state.hand + step, MAX_ANGLE)
+            print(f"Hand rotate open: {joint_state.hand:.2f}")
         elif key.lower() == 'g':
-            hand_angle = max(hand_angle - step, MIN_ANGLE)
-            print(f"Hand rotate close: {hand_angle:.2f}")
+            joint_state.hand = max(joint_state.hand - step, MIN_ANGLE)
+            print(f"Hand rotate close: {joint_state.hand:.2f}")
         elif key.lower() == 'x':
             print("Exiting keyboard control...")
             break
 
+        if joint_state.version != version:
+            # Nothing has seen the change yet, so the rest of the pipeline is timed from the keypress
+            joint_state.changed_ns = pressed_ns
+            key_latency.record(time.monotonic_ns() - pressed_ns)
+
         await asyncio.sleep(0.05)
 
-async def send_continuous_commands(client2):
-    global base_angle, shoulder_angle, elbow_angle, hand_angle
+def send_haptic_frame(writer2, joint_angles, bytes_to_send, origin_ns, loop_hz, mapped_ns):
+    """Draw, encode, queue and record one frame of motor values."""
+    if render_mode == "process":
+        renderer.publish(joint_angles, bytes_to_send, loop_hz)
+    elif render_mode == "inline":
+        draw_combined_visual(joint_angles, bytes_to_send, status=f"control loop {loop_hz:.1f} Hz")
+    if render_mode != "off":
+        render_latency.record(time.monotonic_ns() - mapped_ns)
+    if framing == "delta":
+        # The writer encodes at send time and skips frames that change nothing
+        framed_data = bytes(bytes_to_send)
+        writer2.submit(framed_data, origin_ns)
+        haptics_log("Continuously queued (delta): %s", framed_data)
+    else:
+        framed_data = frame_encoder.encode(bytes_to_send)
+        writer2.submit(framed_data, origin_ns)
+        haptics_log("Continuously queued: %s", framed_data)
+    if recorder is not None:
+        recorder.frame(framed_data, joint_angles)
+
+async def forward_pooled_frames(writer2):
+    """Send the frames the worker processes finish, in the order the control loop asked for them."""
+    async for motor_values, (woken_ns, origin_ns, joint_angles, loop_hz) in frame_pipeline.frames():
+        mapped_ns = time.monotonic_ns()
+        mapping_latency.record(mapped_ns - woken_ns)
+        send_haptic_frame(writer2, joint_angles, motor_values.tolist(), origin_ns, loop_hz, mapped_ns)
+
+async def send_continuous_commands(writer2):
+    loop_hz = 0.0
+    last_tick = time.monotonic()
+    version = seen = haptic_state.version
 
     while True:
-        def map_angle_to_byte(angle):
-            value = int(255 * (angle - MIN_ANGLE) / (MAX_ANGLE - MIN_ANGLE))
-            return 254 if value == 0xAA else value
-
-        bytes_to_send = [
-            map_angle_to_byte(-base_angle),
-            map_angle_to_byte(base_angle),
-            map_angle_to_byte(-shoulder_angle),
-            map_angle_to_byte(shoulder_angle),
-            map_angle_to_byte(-elbow_angle),
-            map_angle_to_byte(elbow_angle),
-            map_angle_to_byte(-hand_angle),
-            map_angle_to_byte(hand_angle),
-            0,
-            0
-        ]
-        draw_combined_visual([base_angle, shoulder_angle, elbow_angle, hand_angle], bytes_to_send)
-        framed_data = bytes([0xAA] + bytes_to_send)
-        await client2.write_gatt_char(CHARACTERISTIC_UUID_2, framed_data)
-        print(f"Continuously sent: {[hex(b) for b in framed_data]}")
-
-        await asyncio.sleep(0.1)
-
-async def send_user_commands():
-    print("Scanning for ESP32_Receiver...")
-
-    devices = await BleakScanner.discover()
-    address2 = None
-
-    for d in devices:
-        if d.name == DEVICE_NAME_2:
-            address2 = d.address
-
-    if not address2:
-        print("Could not find ESP32_Receiver!")
-        return
-
-    print(f"Found ESP32_Receiver at {address2}")
-
-    client2 = BleakClient(address2)
-
-    async with client2:
-        await client2.connect()
-        print("Connected to ESP32_Receiver!")
-
+        woken_ns = time.monotonic_ns()
+        now = woken_ns / 1e9
+        loop_hz = 0.9 * loop_hz + 0.1 / max(now - last_tick, 1e-6)  # smoothed control-loop rate
+        last_tick = now
+
+        # Frames sent because a joint changed carry the time of the change; refreshes carry none
+        origin_ns = None
+        if version != seen:
+            seen = version
+            origin_ns = haptic_state.changed_ns
+            wake_latency.record(woken_ns - origin_ns)
+
+        joint_angles = haptic_state.angles
+        if frame_pipeline is not None:
+            # A worker process maps the angles; forward_pooled_frames sends the result
+            await frame_pipeline.put(joint_angles, (woken_ns, origin_ns, joint_angles, loop_hz))
+        else:
+            bytes_to_send = haptic_mapper.motor_values(joint_angles)
+            mapped_ns = time.monotonic_ns()
+            mapping_latency.record(mapped_ns - woken_ns)
+            send_haptic_frame(writer2, joint_angles, bytes_to_send, origin_ns, loop_hz, mapped_ns)
+
+        if haptics_loop is not None:
+            # One frame per tick, on a fixed grid however long this iteration took
+            await haptics_loop.tick()
+            version = haptic_state.version
+        else:
+            # Send again as soon as a joint changes, or after 100 ms to keep the vest refreshed
+            version = await haptic_state.wait_changed(version, timeout=0.1)
+
+async def connect_vests(supervisor, pattern, count, vest_rate, started):
+    """Connect every receiver matching `pattern` and return a Fanout over them, or None if there are none."""
+    vests = await supervisor.add_matching(pattern, count)
+    if not vests:
+        print(f"Could not find any receiver matching {pattern}!")
+        return None
+    if count is not None and len(vests) < count:
+        print(f"Only found {len(vests)} of {count} vests, carrying on with those")
+    print(f"Connected to {len(vests)} vests: {', '.join(vest.name for vest in vests)}")
+
+    # One writer per vest, each with its own delta state, so a slow vest only holds up itself
+    encoder_factory = (lambda: make_encoder("delta")) if framing == "delta" else None
+    return Fanout(vests, CHARACTERISTIC_UUID_2, max_rate=vest_rate, encoder_factory=encoder_factory,
+                  report_interval=5.0, started_at=started).start()
+
+async def send_user_commands(started=None, use_cache=True, receivers=None, vests=None, vest_rate=None):
+    """
+    Args:
+        started (float): time.monotonic() at program start, for the first-frame delay.
+        use_cache (bool): try the cached receiver address(es) before scanning.
+        receivers (str): name pattern to drive every matching vest, None for the single ESP32_Receiver.
+        vests (int): with `receivers`, stop scanning once this many vests are connected.
+        vest_rate (float): most frames per second written to each vest.
+    """
+    if receivers:
+        supervisor = transport.supervisor([], use_cache=use_cache)
+        writer2 = await connect_vests(supervisor, receivers, vests, vest_rate, started)
+        if writer2 is None:
+            return
+    else:
+        # Last-known address first, falling back to a scan that stops once the receiver is seen;
+        # afterwards the supervisor reconnects on its own if the receiver drops
+        supervisor = transport.supervisor([DEVICE_NAME_2], use_cache=use_cache)
+        if not await supervisor.start():
+            print("Could not find ESP32_Receiver!")
+            return
+
+        receiver = supervisor[DEVICE_NAME_2]
+        print(f"Connected to ESP32_Receiver at {receiver.address}!")
+
+        # Background writer that owns the receiver characteristic
+        encode = frame_encoder.encode if framing == "delta" else None
+        writer2 = FrameWriter(receiver.client, CHARACTERISTIC_UUID_2, report_interval=5.0, encode=encode,
+                              started_at=started, max_rate=vest_rate).start()
+        if framing == "delta":
+            # The receiver lost its delta state with the connection; start over from a keyframe
+            receiver.on_up(lambda client: frame_encoder.force_keyframe())
+        # Pause while the receiver is away, then replay the latest frame to it
+        receiver.attach_writer(writer2)
+
+    writer2.publish_latency(metrics, "ble write",
+                            origin_stage="key to motor" if haptic_state is joint_state else "telemetry to motor")
+
+    try:
         # Start robot serial command loop
         asyncio.create_task(send_robot_commands())
 
+        # Follow the arm's measured joint angles if the haptics are driven by them
+        if haptic_state is measured_state:
+            asyncio.create_task(track_arm_telemetry())
+
         # Start keyboard control loop
         asyncio.create_task(keyboard_control())
 
         # Start continuous BLE command loop
-        asyncio.create_task(send_continuous_commands(client2))
+        asyncio.create_task(send_continuous_commands(writer2))
+        if frame_pipeline is not None:
+            asyncio.create_task(forward_pooled_frames(writer2))
 
         while True:
             await asyncio.sleep(1)
+    finally:
+        if isinstance(writer2, Fanout):
+            writer2.report()
+        supervisor.report()
+        await supervisor.close()
 
 async def main():
-    global ser
+    global arm, render_mode, renderer, arm_min_interval, haptic_state, haptic_mapper, framing, frame_encoder
+    global transport, recorder, haptics_loop, arm_loop, frame_pipeline
+    started = time.monotonic()  # for the startup-to-first-frame report
 
     parser = argparse.ArgumentParser(description='Serial JSON Communication')
-    parser.add_argument('port', type=str, help='Serial port name (e.g., COM1 or /dev/ttyUSB0)')
+    parser.add_argument('port', type=str, nargs='?',
+                        help='Serial port name (e.g., COM1 or /dev/ttyUSB0); not needed with --transport sim')
+    parser.add_argument('--render', choices=['process', 'inline', 'off'], default='process',
+                        help='Draw the visualization in a separate process, on the event loop, or not at all')
+    parser.add_argument('--arm-interval', type=float, default=0.05,
+                        help='Minimum seconds between robot arm serial commands')
+    parser.add_argument('--arm-rate', type=float, default=None,
+                        help='Run the arm loop at this many ticks per second, sending on ticks where a joint '
+                             'changed (e.g. 50); by default commands go out on change, --arm-interval apart')
+    parser.add_argument('--haptics-rate', type=float, default=None,
+                        help='Send haptic frames at this fixed rate (e.g. 200); by default a frame goes out '
+                             'on every change plus a refresh every 100 ms')
+    parser.add_argument('--tick-policy', choices=POLICIES, default='skip',
+                        help='What the fixed-rate loops do after running late: skip the missed ticks '
+                             'or catch up on them')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Compute the haptic frames in this many worker processes, keeping heavy mappings '
+                             'off the BLE event loop; 0 maps on the event loop')
+    parser.add_argument('--haptics-source', choices=['commanded', 'measured'], default='commanded',
+                        help='Drive the vest from the commanded joint angles or from the arm\'s feedback')
+    parser.add_argument('--curve', default='linear',
+                        help='Motor response curve: linear, gamma:<exponent> or deadzone:<width>')
+    parser.add_argument('--framing', choices=['legacy', 'cobs', 'delta'], default='legacy',
+                        help='Frame format the receiver expects: 0xAA header, COBS with CRC-8, '
+                             'or COBS carrying keyframes and changed motors only')
+    parser.add_argument('--rescan', action='store_true',
+                        help='Ignore the cached BLE address and scan for the receiver')
+    parser.add_argument('--transport', default='bleak',
+                        help='"bleak" for the real devices, or "sim[:latency=..,jitter=..,mtu=..,loss=..]" '
+                             'to simulate the receiver and the arm in memory')
+    parser.add_argument('--receivers', metavar='PATTERN',
+                        help='Drive every receiver whose name matches PATTERN (e.g. "ESP32_Receiver*")')
+    parser.add_argument('--vests', type=int, default=None,
+                        help='With --receivers, stop scanning once this many vests are connected')
+    parser.add_argument('--vest-rate', type=float, default=None,
+                        help='Most frames per second written to each vest')
+    parser.add_argument('--record', metavar='PATH',
+                        help='Record joint angles, haptic frames and arm commands to a session file '
+                             '(play it back with replay_session.py)')
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='Lowest level of log lines shown; WARNING hides the per-frame lines')
+    parser.add_argument('--log-every', type=int, default=100,
+                        help='Show one per-frame log line out of this many (1 shows every frame)')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='Serve the latency histograms in Prometheus text format on this local port')
     args = parser.parse_args()
-
-    ser = serial.Serial(args.port, baudrate=115200)
-    ser.setRTS(False)
-    ser.setDTR(False)
-
-    await send_user_commands()
+    if args.port is None and not args.transport.startswith("sim"):
+        parser.error("the serial port is required unless --transport sim is used")
+    try:
+        curves = parse_curve(args.curve)
+    except ValueError as e:
+        parser.error(f"--curve: {e}")
+
+    setup_logging(args.log_level, every=args.log_every)
+
+    # COBS carries every byte value, so the 0xAA escape is only needed for the legacy format
+    framing = args.framing
+    frame_encoder = make_encoder(args.framing)
+    haptic_mapper = HapticMapper(curves=curves, min_angle=MIN_ANGLE, max_angle=MAX_ANGLE,
+                                 escape_header=args.framing == "legacy")
+    arm_min_interval = args.arm_interval
+    if args.haptics_rate:
+        haptics_loop = RateLoop(args.haptics_rate, policy=args.tick_policy, name="haptics loop")
+        metrics.add("haptics tick lateness", haptics_loop.lateness)
+    if args.arm_rate:
+        arm_loop = RateLoop(args.arm_rate, policy=args.tick_policy, name="arm loop")
+        metrics.add("arm tick lateness", arm_loop.lateness)
+    if args.haptics_source == "measured":
+        haptic_state = measured_state
+    render_mode = args.render
+    if render_mode == "process":
+        renderer = RenderProcess("orchestrator_eagleman_robot:draw_combined_visual").start()
+
+    transport = make_transport(args.transport, output_framing=args.framing)
+    arm = await ArmSerial(transport.open_arm(args.port)).start()
+    metrics.add("serial write", arm.write_latency)
+    if args.metrics_port:
+        await metrics.serve(args.metrics_port)
+    if args.record:
+        recorder = SessionRecorder(args.record, framing=args.framing)
+
+    try:
+        if args.workers:
+            # Inside the try, so the workers and the shared ring are freed whatever fails from here on
+            frame_pipeline = FramePipeline("haptic_mapping:batch_mapper", {
+                "curve": args.curve,
+                "escape_header": args.framing == "legacy",
+                "min_angle": MIN_ANGLE,
+                "max_angle": MAX_ANGLE,
+            }, workers=args.workers).start()
+            await frame_pipeline.warm_up()
+
+        await send_user_commands(started, use_cache=not args.rescan, receivers=args.receivers, vests=args.vests,
+                                 vest_rate=args.vest_rate)
+    finally:
+        for loop in (haptics_loop, arm_loop):
+            if loop is not None:
+                loop.report()
+        if frame_pipeline is not None:
+            frame_pipeline.report()
+        metrics.close()
+        metrics.report()
+        await arm.close()
+        transport.close()
+        if recorder is not None:
+            recorder.close()
+            print(f"Recorded {recorder.count} records to {args.record}")
+        if frame_pipeline is not None:
+            # Last, after every await, so the control loop cannot put() into a freed ring
+            frame_pipeline.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,120 @@
+"""
+Fixed-rate ticks for the control loops.
+
+Sleeping for a fixed time after the work makes the real period the sleep
+plus the work, so a loop drifts and its jitter grows with every slow
+iteration. A RateLoop keeps absolute time.monotonic_ns() deadlines one
+period apart instead: a tick sleeps only for what is left until the next
+deadline, so slow iterations do not shift the ones after them.
+
+When an iteration runs past one or more deadlines the tick counts an
+overrun and, depending on the policy,
+
+    "skip"      drops the deadlines that already passed and runs once now,
+                staying on the original grid (the right thing for frames:
+                only the newest state matters)
+    "catch-up"  runs the missed ticks back to back, up to `max_burst` of
+                them, then skips the rest
+
+    haptics = RateLoop(200, name="haptics")
+    while True:
+        send_frame()
+        await haptics.tick()
+
+How late each tick woke is kept in a latency.LatencyHistogram. The event
+loop's timers have about a millisecond of resolution, so expect up to that
+much lateness even on an idle machine; it does not accumulate.
+"""
+import asyncio
+import time
+
+from latency import LatencyHistogram, ms, seconds
+
+POLICIES = ("skip", "catch-up")
+
+
+class RateLoop:
+    """Absolute-deadline ticker with overrun counters."""
+
+    def __init__(self, rate, policy="skip", max_burst=4, name="loop"):
+        """
+        Args:
+            rate (float): ticks per second.
+            policy (str): "skip" or "catch-up", what to do with deadlines that already passed.
+            max_burst (int): with "catch-up", most missed ticks run back to back before skipping.
+            name (str): label used in the printed stats.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown tick policy {policy!r}, expected one of {', '.join(POLICIES)}")
+        self.rate = rate
+        self.period_ns = round(1e9 / rate)
+        self.policy = policy
+        self.max_burst = max_burst
+        self.name = name
+
+        self.deadline_ns = None
+        self.started_ns = None
+        self.ticks = 0
+        self.overruns = 0  # ticks entered after their deadline had already passed
+        self.missed = 0  # deadlines skipped without running
+        self.lateness = LatencyHistogram()  # ns each tick woke after its deadline
+
+    def start(self):
+        """Put the first deadline one period from now; tick() does this itself if needed."""
+        self.started_ns = self.deadline_ns = time.monotonic_ns()
+        return self
+
+    async def tick(self):
+        """
+        Wait for the next deadline.
+
+        Returns:
+            int: deadlines skipped since the previous tick (always 0 when keeping up).
+        """
+        if self.deadline_ns is None:
+            self.start()
+        deadline = self.deadline_ns + self.period_ns
+        now = time.monotonic_ns()
+        skipped = 0
+        if now > deadline:
+            self.overruns += 1
+            behind = (now - deadline) // self.period_ns  # further deadlines that also passed
+            if self.policy == "catch-up":
+                behind = max(0, behind - self.max_burst)
+            if behind:
+                skipped = behind
+                self.missed += behind
+                deadline += behind * self.period_ns
+        else:
+            await asyncio.sleep((deadline - now) / 1e9)
+            now = time.monotonic_ns()
+        self.deadline_ns = deadline
+        self.lateness.record(now - deadline)
+        self.ticks += 1
+        return skipped
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.tick()
+
+    def stats(self):
+        """Tick counters; lateness in seconds."""
+        elapsed = (time.monotonic_ns() - self.started_ns) / 1e9 if self.started_ns is not None else 0.0
+        return {
+            "rate": self.rate,
+            "achieved": self.ticks / elapsed if elapsed else 0.0,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "missed": self.missed,
+            "lateness_p50": seconds(self.lateness.percentile(0.5)),
+            "lateness_p99": seconds(self.lateness.percentile(0.99)),
+            "lateness_max": seconds(self.lateness.max if self.ticks else None),
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"[{self.name}] {stats['achieved']:.1f} of {self.rate:g} ticks/s, {stats['overruns']} overruns, "
+              f"{stats['missed']} missed, lateness p50 {ms(stats['lateness_p50'])} "
+              f"p99 {ms(stats['lateness_p99'])} max {ms(stats['lateness_max'])}")
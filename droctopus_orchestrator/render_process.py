@@ -0,0 +1,135 @@
+"""
+Runs the matplotlib visualization in its own process.
+
+The control loop publishes the latest joint angles and motor values into a
+shared-memory slot and carries on; the render process draws whatever is
+newest whenever it is ready. Nothing on the asyncio side ever waits for a
+draw, and if the renderer falls behind the intermediate snapshots are simply
+never seen.
+"""
+import importlib
+import multiprocessing
+import time
+
+NUM_JOINTS = 4
+NUM_MOTORS = 10
+
+# Slot layout: [seq, control_hz, joint angles..., motor values...]
+_SEQ = 0
+_CONTROL_HZ = 1
+_ANGLES = 2
+_MOTORS = _ANGLES + NUM_JOINTS
+_SLOT_SIZE = _MOTORS + NUM_MOTORS
+
+
+class SnapshotSlot:
+    """
+    Single latest-value slot in shared memory, guarded by a sequence counter.
+
+    The writer bumps the counter to an odd value, fills the slot and bumps it
+    to the next even value, so it never takes a lock. A reader that sees an
+    odd or changed counter just tries again.
+    """
+
+    def __init__(self, ctx=multiprocessing):
+        self._array = ctx.RawArray('d', _SLOT_SIZE)
+
+    def publish(self, joint_angles, motor_values, control_hz=0.0):
+        array = self._array
+        seq = int(array[_SEQ])
+        array[_SEQ] = seq + 1
+        array[_CONTROL_HZ] = control_hz
+        array[_ANGLES:_MOTORS] = joint_angles
+        array[_MOTORS:_SLOT_SIZE] = motor_values
+        array[_SEQ] = seq + 2
+
+    def take(self, last_seq):
+        """Return (seq, joint_angles, motor_values, control_hz) if newer than last_seq, else None."""
+        array = self._array
+        while True:
+            seq = int(array[_SEQ])
+            if seq == last_seq:
+                return None
+            if seq % 2:
+                continue
+            snapshot = array[:]
+            if int(array[_SEQ]) == seq:
+                break
+        return (
+            seq,
+            snapshot[_ANGLES:_MOTORS],
+            [int(v) for v in snapshot[_MOTORS:_SLOT_SIZE]],
+            snapshot[_CONTROL_HZ],
+        )
+
+
+def _render_loop(slot, stop, draw_target, idle_interval):
+    import matplotlib.pyplot as plt
+
+    module_name, func_name = draw_target.split(":")
+    draw = getattr(importlib.import_module(module_name), func_name)
+
+    last_seq = 0
+    skipped = 0
+    frames = 0
+    fps = 0.0
+    window_start = time.monotonic()
+
+    while not stop.is_set():
+        snapshot = slot.take(last_seq)
+        if snapshot is None:
+            # Keep the GUI responsive while waiting for the next snapshot
+            for num in plt.get_fignums():
+                plt.figure(num).canvas.flush_events()
+            time.sleep(idle_interval)
+            continue
+
+        seq, joint_angles, motor_values, control_hz = snapshot
+        if last_seq:
+            skipped += (seq - last_seq) // 2 - 1
+        last_seq = seq
+
+        draw(joint_angles, motor_values,
+             status=f"render {fps:.1f} FPS (skipped {skipped})  |  control loop {control_hz:.1f} Hz")
+
+        frames += 1
+        now = time.monotonic()
+        if now - window_start >= 1.0:
+            fps = frames / (now - window_start)
+            frames = 0
+            window_start = now
+
+
+class RenderProcess:
+    """Owns the render process and the snapshot slot it reads from."""
+
+    def __init__(self, draw_target, idle_interval=0.01):
+        """
+        Args:
+            draw_target (str): "module:function" drawing one snapshot; it is called as
+                draw(joint_angles, motor_values, status=...) inside the render process.
+            idle_interval (float): seconds the renderer pumps GUI events while idle.
+        """
+        # spawn so the child never inherits the parent's GUI or BLE state
+        ctx = multiprocessing.get_context("spawn")
+        self.slot = SnapshotSlot(ctx)
+        self._stop = ctx.Event()
+        self._process = ctx.Process(
+            target=_render_loop,
+            args=(self.slot, self._stop, draw_target, idle_interval),
+            daemon=True,
+        )
+
+    def start(self):
+        self._process.start()
+        return self
+
+    def publish(self, joint_angles, motor_values, control_hz=0.0):
+        """Hand the newest snapshot to the renderer; never blocks."""
+        self.slot.publish(joint_angles, motor_values, control_hz)
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
@@ -0,0 +1,119 @@
+"""
+Play a recorded session (see session_log.py) back to the vest and the arm.
+
+    python replay_session.py session.drs /dev/ttyUSB0                # real time
+    python replay_session.py session.drs /dev/ttyUSB0 --speed 4      # four times faster
+    python replay_session.py session.drs --no-arm --speed 0 --loop 10 --transport sim
+
+With --speed 0 nothing is waited for: haptic frames go out as fast as the
+BLE link takes them, which makes a replay a stress test for the transport.
+In that mode the writer does not coalesce, and the replay only holds back
+while the writer's queue is full, so every frame is offered to the link.
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+from arm_commands import encode_all_angles
+from arm_serial import ArmSerial
+from ble_writer import FrameWriter
+from framing import make_encoder
+from session_log import KIND_NAMES, SessionReader, read_header, replay
+from transport import make_transport
+
+CHARACTERISTIC_UUID_2 = "fedcbafe-4321-8765-4321-fedcbafedcba"
+DEVICE_NAME_2 = "ESP32_Receiver"
+
+# Queued frames at which a --speed 0 replay waits for the writer
+STRESS_QUEUE_DEPTH = 6
+
+
+def describe(reader):
+    counts = dict(Counter(KIND_NAMES.get(record.kind, record.kind) for record in reader))
+    started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(reader.started))
+    return f"{reader.path}: {len(reader)} records over {reader.duration:.1f} s from {started}, " \
+           f"framing {reader.framing}, {counts}"
+
+
+async def run(args):
+    reader = SessionReader(args.path)
+    print(describe(reader))
+    if args.info:
+        reader.close()
+        return
+
+    transport = make_transport(args.transport, output_framing=reader.framing)
+    supervisor = None
+    writer = None
+    arm = None
+    try:
+        if not args.no_vest:
+            supervisor = transport.supervisor([DEVICE_NAME_2], use_cache=not args.rescan)
+            if not await supervisor.start():
+                print("Could not find ESP32_Receiver!")
+                return
+            receiver = supervisor[DEVICE_NAME_2]
+            # Delta recordings hold raw payloads; everything else is replayed byte for byte
+            encoder = make_encoder("delta") if reader.framing == "delta" else None
+            writer = FrameWriter(receiver.client, CHARACTERISTIC_UUID_2, maxsize=STRESS_QUEUE_DEPTH + 2,
+                                 coalesce=bool(args.speed), report_interval=5.0,
+                                 encode=encoder.encode if encoder is not None else None).start()
+            if encoder is not None:
+                receiver.on_up(lambda client: encoder.force_keyframe())
+            receiver.attach_writer(writer)
+        if not args.no_arm:
+            arm = await ArmSerial(transport.open_arm(args.port)).start()
+
+        async def send_frame(record):
+            if not args.speed:
+                await writer.wait_for_room(STRESS_QUEUE_DEPTH)
+            writer.submit(record.data)
+
+        async def send_command(record):
+            await arm.write(encode_all_angles(*record.joints, spd=record.spd, acc=record.acc))
+
+        for _ in range(args.loop):
+            result = await replay(reader, args.speed, on_frame=send_frame if writer is not None else None,
+                                  on_command=send_command if arm is not None else None)
+            rate = result["records"] / result["seconds"] if result["seconds"] else 0.0
+            print(f"Replayed {result['records']} records in {result['seconds']:.2f} s ({rate:.0f} records/s)")
+        if writer is not None:
+            await writer.flush()
+            print(f"Writer: {writer.stats()}")
+    finally:
+        if writer is not None:
+            await writer.stop()
+        if supervisor is not None:
+            await supervisor.close()
+        if arm is not None:
+            await arm.close()
+        transport.close()
+        reader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a recorded haptic session to the vest and arm')
+    parser.add_argument('path', help='Session file written with --record')
+    parser.add_argument('port', type=str, nargs='?',
+                        help='Serial port of the arm; not needed with --no-arm or --transport sim')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Playback speed; 0 sends everything as fast as the transport allows')
+    parser.add_argument('--loop', type=int, default=1, help='Play the recording this many times')
+    parser.add_argument('--no-arm', action='store_true', help='Do not replay arm commands')
+    parser.add_argument('--no-vest', action='store_true', help='Do not replay haptic frames')
+    parser.add_argument('--info', action='store_true', help='Only describe the recording')
+    parser.add_argument('--rescan', action='store_true', help='Ignore the cached BLE address')
+    parser.add_argument('--transport', default='bleak', help='"bleak" or "sim[:...]" (see transport.py)')
+    args = parser.parse_args()
+    try:
+        read_header(args.path)  # fail early on a file that is not a recording
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if not args.info and not args.no_arm and args.port is None and not args.transport.startswith("sim"):
+        parser.error("the serial port is required unless --no-arm or --transport sim is used")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Fixed-capacity ring buffer for relaying ESP32_Sender data to ESP32_Receiver.
+
+The ring is laid out as a row of frame slots, each one already carrying the
+0xAA header byte in front of its 10 payload bytes:
+
+    | AA p0 p1 .. p9 | AA p0 p1 .. p9 | AA p0 p1 .. p9 | ...
+
+Incoming notification bytes are copied straight into the payload part of the
+slots, so once a slot is full it *is* the framed packet and can be handed to
+`write_gatt_char` as a memoryview. Nothing is sliced off the front of a
+growing bytearray and no header is concatenated per frame.
+"""
+
+FRAME_HEADER = 0xAA
+PAYLOAD_SIZE = 10
+
+
+class FrameRing:
+    """Ring of pre-framed slots that BLE notifications are written into."""
+
+    def __init__(self, slots=64, payload_size=PAYLOAD_SIZE, header=FRAME_HEADER):
+        if slots < 2:
+            raise ValueError("FrameRing needs at least 2 slots.")
+        self.slots = slots
+        self.payload_size = payload_size
+        self.frame_size = payload_size + 1
+
+        self._storage = bytearray(slots * self.frame_size)
+        self._storage[::self.frame_size] = bytes([header]) * slots
+        view = memoryview(self._storage)
+
+        # One view per slot for the whole frame and for its payload, built once
+        # so neither writing nor popping allocates anything.
+        self._frames = [view[i * self.frame_size:(i + 1) * self.frame_size] for i in range(slots)]
+        self._payloads = [frame[1:] for frame in self._frames]
+
+        self._write_slot = 0
+        self._fill = 0  # payload bytes already in the slot being written
+        self._read_slot = 0
+        self._count = 0  # complete frames queued
+        self.dropped = 0
+
+    def __len__(self):
+        """Number of complete frames waiting to be popped."""
+        return self._count
+
+    def _start_slot(self):
+        # The slot about to be filled still holds the oldest queued frame.
+        if self._count == self.slots:
+            self._read_slot = (self._read_slot + 1) % self.slots
+            self._count -= 1
+            self.dropped += 1
+
+    def _commit_slot(self):
+        self._write_slot = (self._write_slot + 1) % self.slots
+        self._fill = 0
+        self._count += 1
+
+    def write(self, data):
+        """
+        Copy raw payload bytes into the ring.
+
+        When the ring is full the oldest queued frame is discarded, since only
+        the most recent motor state matters to the vest. `dropped` counts how
+        many frames were lost that way.
+        """
+        size = self.payload_size
+
+        # Fast path: the sender notifies in whole 10-byte chunks.
+        if self._fill == 0 and len(data) == size:
+            if self._count == self.slots:
+                self._start_slot()
+            slot = self._write_slot
+            self._payloads[slot][:] = data
+            self._write_slot = (slot + 1) % self.slots
+            self._count += 1
+            return
+
+        src = memoryview(data)
+        pos = 0
+        remaining = len(src)
+        while remaining:
+            fill = self._fill
+            if fill == 0:
+                self._start_slot()
+            take = min(size - fill, remaining)
+            self._payloads[self._write_slot][fill:fill + take] = src[pos:pos + take]
+            pos += take
+            remaining -= take
+            if fill + take == size:
+                self._commit_slot()
+            else:
+                self._fill = fill + take
+
+    def pop_frame(self):
+        """
+        Return the oldest complete frame (header + payload) or None.
+
+        The returned memoryview points into the ring itself. It stays valid
+        until the ring wraps around onto that slot again, i.e. for the next
+        `slots - 1` frames, which is plenty for awaiting a single BLE write.
+        """
+        if not self._count:
+            return None
+        slot = self._read_slot
+        self._read_slot = (slot + 1) % self.slots
+        self._count -= 1
+        return self._frames[slot]
+
+    def frames(self):
+        """Yield complete frames until the ring runs dry."""
+        frames = self._frames
+        slots = self.slots
+        while self._count:
+            slot = self._read_slot
+            self._read_slot = (slot + 1) % slots
+            self._count -= 1
+            yield frames[slot]
+
+    def clear(self):
+        """Discard everything queued, including a partially filled frame."""
+        self._write_slot = self._read_slot = 0
+        self._fill = self._count = 0
@@ -0,0 +1,172 @@
+"""
+Logging for the per-frame hot paths of the orchestrators.
+
+Printing a freshly formatted list for every frame costs more than relaying
+the frame, and on a slow terminal the print blocks the event loop. Instead:
+
+  - hot paths log through a SampledLogger, which only lets one call in
+    `every` through (and at most one per `interval` seconds); skipped calls
+    cost a counter increment;
+  - the message is a %-format string with its arguments, so nothing is
+    formatted unless the record is emitted, and byte buffers are snapshotted
+    as Frame objects that turn into a list of ints only when printed;
+  - records go onto a bounded queue and are formatted and written by a
+    listener thread; when the queue is full records are counted and
+    dropped, so logging never blocks the loop.
+
+    setup_logging("INFO", every=100)
+    frames = SampledLogger("droctopus.relay")
+    frames("Received from ESP32 #1: %s", data)
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+LOG_FORMAT = "%(message)s"  # the status lines keep looking like the prints they replace
+QUEUE_SIZE = 1000
+
+# Sampling applied by SampledLoggers created without explicit values; see setup_logging
+default_every = 100
+default_interval = 0.0
+
+_listener = None
+_handler = None
+
+
+class Frame:
+    """Immutable copy of a byte buffer that formats as a list of ints."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = bytes(data)
+
+    def __str__(self):
+        return str(list(self.data))
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks and leaves all formatting to the listener thread."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The stock handler formats here, on the caller's thread. Arguments are
+        # already snapshots (see SampledLogger), so the record can go as it is.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at the time, so redirect_stdout() still applies."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def setup_logging(level="INFO", every=None, interval=None):
+    """
+    Route the "droctopus" loggers through a queue to a stdout listener thread.
+
+    Safe to call again (e.g. per benchmark run); later calls only change the
+    level and the default sampling.
+
+    Args:
+        level (str or int): lowest level emitted, e.g. "DEBUG", "INFO", "WARNING".
+        every (int): default for SampledLogger: emit one call in this many.
+        interval (float): default for SampledLogger: at most one line per this many seconds.
+    """
+    global _listener, _handler, default_every, default_interval
+    if every is not None:
+        default_every = max(1, every)
+    if interval is not None:
+        default_interval = interval
+
+    logger = logging.getLogger("droctopus")
+    logger.setLevel(level)
+    if _listener is None:
+        log_queue = queue.Queue(QUEUE_SIZE)
+        _handler = NonBlockingQueueHandler(log_queue)
+        output = _StdoutHandler()
+        output.setFormatter(logging.Formatter(LOG_FORMAT))
+        _listener = logging.handlers.QueueListener(log_queue, output)
+        _listener.start()
+        logger.addHandler(_handler)
+        logger.propagate = False
+        atexit.register(shutdown_logging)
+    return logger
+
+
+def shutdown_logging():
+    """Write out whatever is still queued and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        logging.getLogger("droctopus").removeHandler(_handler)
+        if _handler.dropped:
+            print(f"Logging dropped {_handler.dropped} records while the queue was full")
+
+
+class SampledLogger:
+    """
+    Logs one call out of every `every`, and at most one per `interval` seconds.
+
+    Call it like logger.info: `sampled("Queued: %s", frame)`. Byte buffers
+    among the arguments are copied into Frame objects when (and only when)
+    a call is let through, so callers may pass views into buffers they reuse.
+    """
+
+    def __init__(self, name, level=logging.INFO, every=None, interval=None):
+        """
+        Args:
+            name (str): logger name, e.g. "droctopus.relay".
+            level (int): level of the emitted records.
+            every (int): emit one call in this many; default from setup_logging.
+            interval (float): minimum seconds between emitted lines; default from setup_logging.
+        """
+        self.logger = logging.getLogger(name)
+        self.level = level
+        self._every = every
+        self._interval = interval
+        self._count = 0
+        self._last = float("-inf")
+
+    @property
+    def every(self):
+        return self._every or default_every
+
+    @property
+    def interval(self):
+        return default_interval if self._interval is None else self._interval
+
+    def __call__(self, msg, *args):
+        self._count += 1
+        if self._count < (self._every or default_every):
+            return
+        self._count = 0
+        if not self.logger.isEnabledFor(self.level):
+            return
+        interval = self.interval
+        if interval:
+            now = time.monotonic()
+            if now - self._last < interval:
+                return
+            self._last = now
+        args = tuple(Frame(arg) if isinstance(arg, (bytes, bytearray, memoryview)) else arg for arg in args)
+        self.logger.log(self.level, msg, *args)
@@ -0,0 +1,283 @@
+"""
+Offline statistics for recorded sessions (see session_log.py).
+
+The session file is mapped as a NumPy structured array with the same layout
+as session_log.RECORD, so nothing is unpacked into Python objects. Records
+are processed in chunks, each one fully vectorized, which keeps memory flat
+however long the recording is:
+
+    duty cycle     per motor, the fraction of time its value was above a threshold
+    intensities    per motor, a 256-bin histogram of the values sent
+    coverage       per joint, the share of angle bins visited and the range used
+    update jitter  intervals between haptic frames: mean, std and percentiles
+
+Motors and joints follow the 10-motor / 4-joint layout that
+draw_combined_visual shows (haptic_mapping.DEFAULT_LAYOUT, joint_state.JOINT_NAMES).
+
+    python session_analysis.py session.drs
+    python session_analysis.py session.drs --plot
+"""
+import argparse
+import os
+
+import numpy as np
+
+from haptic_mapping import DEFAULT_LAYOUT, MAX_ANGLE, MIN_ANGLE, NUM_JOINTS, NUM_MOTORS
+from joint_state import JOINT_NAMES
+from session_log import FRAME, HEADER_SIZE, MAX_DATA, RECORD_SIZE, read_header
+
+RECORD_DTYPE = np.dtype([
+    ("t_ns", "<i8"),
+    ("kind", "u1"),
+    ("length", "u1"),
+    ("channel", "<u2"),
+    ("joints", "<f4", (4,)),
+    ("spd", "<u2"),
+    ("acc", "<u2"),
+    ("data", "u1", (MAX_DATA,)),
+])
+assert RECORD_DTYPE.itemsize == RECORD_SIZE
+
+CHUNK_RECORDS = 1 << 20
+COVERAGE_BINS = 64
+# Frame intervals are binned at 0.1 ms up to one second; longer gaps land in the last bin
+JITTER_BIN = 1e-4
+JITTER_BINS = 10_001
+
+
+def load(path):
+    """Map a session file read-only; returns (header dict, structured memmap of its records)."""
+    header = read_header(path)
+    # A file cut short by a crash holds fewer records than the count says
+    count = min(header["count"], (os.path.getsize(path) - HEADER_SIZE) // RECORD_SIZE)
+    if not count:
+        return header, np.empty(0, dtype=RECORD_DTYPE)
+    return header, np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def cobs_payloads(data, payload_size=NUM_MOTORS):
+    """
+    Decode COBS motor frames (framing.py) for a whole (N, 32) block at once.
+
+    Every frame has the same length, so instead of walking each frame the
+    code-byte positions are followed for all rows together, one byte column
+    at a time; code bytes decode to 0x00, all other bytes to themselves.
+
+    Returns:
+        (N, payload_size) uint8 array of the payloads.
+    """
+    width = payload_size + 3  # code byte + seq + payload + crc
+    next_code = np.zeros(len(data), dtype=np.intp)
+    is_code = np.zeros((len(data), width), dtype=bool)
+    for position in range(width):
+        here = next_code == position
+        is_code[:, position] = here
+        next_code = np.where(here, position + data[:, position].astype(np.intp), next_code)
+    decoded = np.where(is_code[:, 2:2 + payload_size], 0, data[:, 2:2 + payload_size])
+    return decoded.astype(np.uint8)
+
+
+def motor_values(frames, framing):
+    """(N, 10) motor bytes of FRAME records recorded with the given framing."""
+    data = frames["data"]
+    if framing == "legacy":
+        return data[:, 1:1 + NUM_MOTORS]
+    if framing == "delta":
+        return data[:, :NUM_MOTORS]  # raw payloads; the writer encoded them when sending
+    if framing == "cobs":
+        return cobs_payloads(data)
+    raise ValueError(f"Unknown framing: {framing}")
+
+
+def analyze(path, threshold=0, chunk=CHUNK_RECORDS, coverage_bins=COVERAGE_BINS):
+    """
+    Compute the session statistics of a recording.
+
+    Args:
+        path (str): session file.
+        threshold (int): a motor counts as on while its value is above this.
+        chunk (int): records processed per vectorized step.
+        coverage_bins (int): angle bins per joint across MIN_ANGLE..MAX_ANGLE.
+
+    Returns:
+        dict: "frames", "duration" (s), "duty" (10,), "histogram" (10, 256),
+        "coverage" (4,), "joint_min"/"joint_max" (4,), "coverage_counts" (4, bins)
+        and "jitter" with interval "mean", "std", "p50", "p99", "max" in seconds.
+    """
+    header, records = load(path)
+    framing = header["framing"]
+
+    on_time = np.zeros(NUM_MOTORS)
+    histogram = np.zeros(NUM_MOTORS * 256, dtype=np.int64)
+    coverage_counts = np.zeros((NUM_JOINTS, coverage_bins), dtype=np.int64)
+    joint_min = np.full(NUM_JOINTS, np.inf)
+    joint_max = np.full(NUM_JOINTS, -np.inf)
+    intervals = np.zeros(JITTER_BINS, dtype=np.int64)
+    interval_sum = interval_sq = interval_max = 0.0
+    frames = 0
+    first_t = prev_t = None
+    prev_on = np.zeros(NUM_MOTORS, dtype=bool)
+    motor_offsets = np.arange(NUM_MOTORS) * 256
+    joint_offsets = np.arange(NUM_JOINTS) * coverage_bins
+    bin_scale = np.float32(coverage_bins / (MAX_ANGLE - MIN_ANGLE))
+
+    for start in range(0, len(records), chunk):
+        block = records[start:start + chunk]
+
+        # Joint coverage from every record that carries angles
+        joints = block["joints"]
+        known = np.isfinite(joints).all(axis=1)
+        if known.any():
+            if not known.all():
+                joints = joints[known]
+            np.minimum(joint_min, joints.min(axis=0), out=joint_min)
+            np.maximum(joint_max, joints.max(axis=0), out=joint_max)
+            bins = ((joints - np.float32(MIN_ANGLE)) * bin_scale).astype(np.intp)
+            np.clip(bins, 0, coverage_bins - 1, out=bins)
+            bins += joint_offsets
+            coverage_counts += np.bincount(bins.ravel(), minlength=NUM_JOINTS * coverage_bins).reshape(
+                NUM_JOINTS, coverage_bins)
+
+        is_frame = block["kind"] == FRAME
+        if not is_frame.all():
+            block = block[is_frame]
+            if not len(block):
+                continue
+        t = block["t_ns"] * 1e-9
+        values = motor_values(block, framing)
+        on = values > threshold
+
+        histogram += np.bincount((values.astype(np.intp) + motor_offsets).ravel(), minlength=NUM_MOTORS * 256)
+
+        # Each frame holds until the next one; the last frame's share waits for the next chunk
+        dt = np.diff(t)
+        if prev_t is not None:
+            gap = t[0] - prev_t
+            dt = np.concatenate(([gap], dt))
+            on_time += prev_on * gap
+        else:
+            first_t = t[0]
+        on_time += np.diff(t) @ on[:-1]
+        prev_t = t[-1]
+        prev_on = on[-1]
+
+        if len(dt):
+            interval_sum += dt.sum()
+            interval_sq += np.square(dt).sum()
+            interval_max = max(interval_max, dt.max())
+            intervals += np.bincount(np.minimum((dt / JITTER_BIN).astype(np.intp), JITTER_BINS - 1),
+                                     minlength=JITTER_BINS)
+        frames += len(block)
+
+    duration = prev_t - first_t if frames else 0.0
+    count = frames - 1
+
+    def percentile(p):
+        if count <= 0:
+            return None
+        return np.searchsorted(np.cumsum(intervals), p * count) * JITTER_BIN
+
+    mean = interval_sum / count if count > 0 else None
+    return {
+        "path": path,
+        "framing": framing,
+        "records": len(records),
+        "frames": frames,
+        "duration": duration,
+        "duty": on_time / duration if duration else np.zeros(NUM_MOTORS),
+        "histogram": histogram.reshape(NUM_MOTORS, 256),
+        "coverage": (coverage_counts > 0).mean(axis=1),
+        "coverage_counts": coverage_counts,
+        "joint_min": joint_min,
+        "joint_max": joint_max,
+        "intervals": intervals,  # frame intervals in JITTER_BIN steps
+        "jitter": {
+            "mean": mean,
+            "std": np.sqrt(max(interval_sq / count - mean * mean, 0.0)) if count > 0 else None,
+            "p50": percentile(0.5),
+            "p99": percentile(0.99),
+            "max": interval_max if count > 0 else None,
+        },
+    }
+
+
+def motor_label(motor):
+    entry = DEFAULT_LAYOUT[motor]
+    if entry is None:
+        return f"motor {motor + 1} (unused)"
+    joint, sign = entry
+    return f"motor {motor + 1} ({JOINT_NAMES[joint]} {'+' if sign > 0 else '-'})"
+
+
+def report(stats):
+    print(f"{stats['path']}: {stats['frames']} frames of {stats['records']} records, "
+          f"{stats['duration']:.1f} s, framing {stats['framing']}")
+    histogram = stats["histogram"]
+    levels = np.arange(256)
+    for motor in range(NUM_MOTORS):
+        sent = histogram[motor].sum()
+        mean = (histogram[motor] * levels).sum() / sent if sent else 0.0
+        print(f"  {motor_label(motor):<24} duty {stats['duty'][motor]:6.1%}, mean intensity {mean:5.1f}")
+    for joint in range(NUM_JOINTS):
+        if np.isfinite(stats["joint_min"][joint]):
+            span = f"{stats['joint_min'][joint]:+.2f}..{stats['joint_max'][joint]:+.2f} rad"
+        else:
+            span = "no angles recorded"
+        print(f"  {JOINT_NAMES[joint]:<24} coverage {stats['coverage'][joint]:6.1%}, {span}")
+    jitter = stats["jitter"]
+    if jitter["mean"] is not None:
+        print(f"  frame interval: mean {jitter['mean'] * 1000:.2f} ms, std {jitter['std'] * 1000:.2f} ms, "
+              f"p50 {jitter['p50'] * 1000:.1f} ms, p99 {jitter['p99'] * 1000:.1f} ms, max {jitter['max'] * 1000:.1f} ms")
+
+
+def plot(stats):
+    """Duty cycle, intensity histograms, joint coverage and interval distribution in one figure."""
+    import matplotlib.pyplot as plt
+
+    from haptic_renderer import COLORS
+
+    fig, ((ax_duty, ax_hist), (ax_cover, ax_jitter)) = plt.subplots(2, 2, figsize=(14, 8))
+    motors = np.arange(1, NUM_MOTORS + 1)
+    ax_duty.bar(motors, stats["duty"], color=COLORS)
+    ax_duty.set_xticks(motors)
+    ax_duty.set_title("Duty cycle per motor")
+
+    for motor in range(NUM_MOTORS):
+        ax_hist.step(np.arange(256), stats["histogram"][motor], color=COLORS[motor], label=str(motor + 1))
+    ax_hist.set_yscale("log")
+    ax_hist.set_title("Intensity histogram")
+    ax_hist.legend(ncol=5, fontsize=8)
+
+    edges = np.linspace(MIN_ANGLE, MAX_ANGLE, stats["coverage_counts"].shape[1] + 1)
+    for joint in range(NUM_JOINTS):
+        ax_cover.stairs(stats["coverage_counts"][joint], edges, label=JOINT_NAMES[joint])
+    ax_cover.set_title("Joint angle coverage (rad)")
+    ax_cover.legend()
+
+    jitter = stats["jitter"]
+    if jitter["mean"] is not None:
+        shown = min(JITTER_BINS, int(2 * jitter["p99"] / JITTER_BIN) + 2)
+        ax_jitter.bar(np.arange(shown) * JITTER_BIN * 1000, stats["intervals"][:shown], width=JITTER_BIN * 1000)
+        ax_jitter.axvline(jitter["p50"] * 1000, color="C1", label="p50")
+        ax_jitter.axvline(jitter["p99"] * 1000, color="C3", label="p99")
+        ax_jitter.legend()
+    ax_jitter.set_title("Frame interval (ms)")
+    fig.tight_layout()
+    plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Statistics for a recorded haptic session')
+    parser.add_argument('path', help='Session file written with --record')
+    parser.add_argument('--threshold', type=int, default=0, help='Motor values above this count as on')
+    parser.add_argument('--plot', action='store_true', help='Show the statistics as plots')
+    args = parser.parse_args()
+
+    stats = analyze(args.path, threshold=args.threshold)
+    report(stats)
+    if args.plot:
+        plot(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Compact binary recording of haptic sessions.
+
+A session file is a 64-byte header followed by fixed 64-byte records, all
+little-endian:
+
+    header  magic "DRSESS01", version, record size, framing, wall-clock start,
+            record count
+    record  t_ns      int64     nanoseconds since the recording started (monotonic)
+            kind      uint8     JOINTS, FRAME or COMMAND
+            length    uint8     bytes of `data` in use
+            channel   uint16    vest index for fanned-out frames, otherwise 0
+            joints    4*float32 base, shoulder, elbow, hand in radians (NaN if unknown)
+            spd, acc  2*uint16  speed and acceleration of a T:102 arm command
+            data      32 bytes  the haptic frame exactly as it was submitted
+
+JOINTS records hold measured joint angles, FRAME records a haptic frame plus
+the angles it was rendered from, COMMAND records a T:102 all-angles command
+(replayed through arm_commands.encode_all_angles).
+
+The recorder writes into a memory-mapped file that grows in large steps, so
+appending a record is one struct.pack_into and never a system call; the
+record count in the header is updated with every record, so a recording cut
+short by a crash is still readable. Fixed records also make the file a flat
+array that offline analysis can map directly.
+
+    recorder = SessionRecorder("session.drs", framing="legacy")
+    recorder.frame(frame, joint_angles)
+    recorder.command(base, shoulder, elbow, hand, spd, acc)
+    recorder.close()
+
+    for record in SessionReader("session.drs"):
+        ...
+
+`replay` streams a recording back through callbacks at its original pace,
+faster, or as fast as the callbacks take it (see replay_session.py).
+"""
+import asyncio
+import mmap
+import os
+import struct
+import time
+from typing import NamedTuple
+
+MAGIC = b"DRSESS01"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHH8sdQ28x")
+RECORD = struct.Struct("<qBBH4f2H32s")
+HEADER_SIZE = HEADER.size  # 64
+RECORD_SIZE = RECORD.size  # 64
+# Offset of the record count inside the header
+COUNT_OFFSET = struct.calcsize("<8sHH8sd")
+MAX_DATA = 32
+
+JOINTS = 1
+FRAME = 2
+COMMAND = 3
+KIND_NAMES = {JOINTS: "joints", FRAME: "frame", COMMAND: "command"}
+
+NO_JOINTS = (float("nan"),) * 4
+
+# Records the file grows by when it is full; 64 MiB, about an hour at 100 Hz with three record kinds
+GROW_RECORDS = 1 << 20
+
+
+class Record(NamedTuple):
+    """One decoded session record; `t` is in seconds since the recording started."""
+    t: float
+    kind: int
+    channel: int
+    joints: tuple
+    spd: int
+    acc: int
+    data: bytes
+
+
+class SessionRecorder:
+    """Appends records to a memory-mapped session file."""
+
+    def __init__(self, path, framing="legacy", grow_records=GROW_RECORDS):
+        """
+        Args:
+            path (str): file to create; an existing file is overwritten.
+            framing (str): how FRAME data is encoded ("legacy", "cobs" or "delta"
+                for raw payloads that the writer encodes), kept for the replayer.
+            grow_records (int): records added to the file each time it fills up.
+        """
+        self.path = path
+        self.framing = framing
+        self.grow_records = grow_records
+        self.count = 0
+        self._start_ns = time.monotonic_ns()
+        self._file = open(path, "w+b")
+        self._capacity = 0
+        self._map = None
+        self._grow()
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, RECORD_SIZE, framing.encode(), time.time(), 0)
+
+    def _grow(self):
+        if self._map is not None:
+            self._map.close()
+        self._capacity += self.grow_records
+        self._file.truncate(HEADER_SIZE + self._capacity * RECORD_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def _append(self, kind, channel, joints, spd, acc, data):
+        if self.count == self._capacity:
+            self._grow()
+        if len(data) > MAX_DATA:
+            raise ValueError(f"Frame of {len(data)} bytes does not fit a {MAX_DATA}-byte record")
+        b, s, e, h = joints
+        RECORD.pack_into(self._map, HEADER_SIZE + self.count * RECORD_SIZE, time.monotonic_ns() - self._start_ns,
+                         kind, len(data), channel, b, s, e, h, spd, acc, data)
+        self.count += 1
+        struct.pack_into("<Q", self._map, COUNT_OFFSET, self.count)
+
+    def joints(self, angles):
+        """Record measured joint angles (base, shoulder, elbow, hand)."""
+        self._append(JOINTS, 0, angles, 0, 0, b"")
+
+    def frame(self, frame, angles=NO_JOINTS, channel=0):
+        """Record a haptic frame as submitted to the writer, and the angles it came from."""
+        self._append(FRAME, channel, angles, 0, 0, bytes(frame))
+
+    def command(self, base, shoulder, elbow, hand, spd=10, acc=10):
+        """Record a T:102 all-angles command sent to the arm."""
+        self._append(COMMAND, 0, (base, shoulder, elbow, hand), spd, acc, b"")
+
+    def close(self):
+        """Trim the file to the records written and close it."""
+        if self._map is None:
+            return
+        self._map.flush()
+        self._map.close()
+        self._map = None
+        self._file.truncate(HEADER_SIZE + self.count * RECORD_SIZE)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_header(path):
+    """Return {"framing", "started", "count"} for a session file; ValueError if it is not one."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path} is too short to be a session file")
+    magic, version, record_size, framing, started, count = HEADER.unpack(header)
+    if magic != MAGIC or record_size != RECORD_SIZE:
+        raise ValueError(f"{path} is not a version {VERSION} session file")
+    return {"framing": framing.rstrip(b"\0").decode(), "started": started, "count": count}
+
+
+class SessionReader:
+    """Memory-mapped, read-only view of a session file; iterates Records."""
+
+    def __init__(self, path):
+        header = read_header(path)
+        self.path = path
+        self.framing = header["framing"]
+        self.started = header["started"]
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # A file cut short by a crash holds fewer records than the count says
+        self.count = min(header["count"], (size - HEADER_SIZE) // RECORD_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        t_ns, kind, length, channel, b, s, e, h, spd, acc, data = RECORD.unpack_from(
+            self._map, HEADER_SIZE + index * RECORD_SIZE)
+        return Record(t_ns / 1e9, kind, channel, (b, s, e, h), spd, acc, data[:length])
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    @property
+    def duration(self):
+        return self[self.count - 1].t if self.count else 0.0
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def replay(reader, speed=1.0, on_frame=None, on_command=None, on_joints=None, batch=64):
+    """
+    Feed the records of a session to callbacks, keeping their relative timing.
+
+    Callbacks take a Record and may be coroutines, which are awaited; that is
+    how a replay applies backpressure, e.g. from ArmSerial.write.
+
+    Args:
+        reader (SessionReader): the recording.
+        speed (float): 1 for real time, 4 for four times faster, 0 for no
+            waiting at all (the loop is still yielded to every `batch` records).
+        on_frame, on_command, on_joints (callable): called for FRAME, COMMAND
+            and JOINTS records; kinds without a callback are skipped.
+
+    Returns:
+        dict: {"records": records handed to a callback, "seconds": wall time taken}.
+    """
+    handlers = {FRAME: on_frame, COMMAND: on_command, JOINTS: on_joints}
+    started = time.monotonic()
+    replayed = 0
+    for index in range(len(reader)):
+        record = reader[index]
+        handler = handlers.get(record.kind)
+        if handler is None:
+            continue
+        if speed:
+            delay = started + record.t / speed - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif index % batch == 0:
+            await asyncio.sleep(0)
+        result = handler(record)
+        if asyncio.iscoroutine(result):
+            await result
+        replayed += 1
+    return {"records": replayed, "seconds": time.monotonic() - started}
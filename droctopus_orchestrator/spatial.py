@@ -0,0 +1,278 @@
+"""
+Spatial haptics on the vest's real motor layout.
+
+Motor positions come from the PCB placement file
+(eagleman-vest-rev1/production/positions.csv). Each motor is wired to a
+screw terminal next to its own DRV2605 driver, so the driver positions give
+the layout: two columns of five, motors 0-4 down one side and 5-9 back up
+the other. Which driver drives which motor index follows from the firmware
+(ntab-conf/src/main.cpp, driver_mux_addr/driver_mux_sel) and the netlist;
+see MOTOR_DRIVERS.
+
+Positions are normalized to x in 0..1 (y keeps the aspect ratio) and a grid
+of nodes is laid over them. Two (10, nodes) weight matrices are computed
+once, so that every frame is a single small matrix-vector product:
+
+    phantom   a point between motors, felt through the nearest motors with
+              the energy-summation model of phantom sensations: weights go
+              with 1/sqrt(distance) and their squares sum to 1, so a moving
+              point keeps a constant perceived strength. A point blends the
+              weights of the 4 nodes around it, and the blend is scaled back
+              to unit energy, which would otherwise sag between nodes
+              (render_point, render_points for whole paths at once)
+    sampling  an intensity field over the grid, e.g. a travelling wave or a
+              gradient; each motor takes the field's value at its position
+              (render_field)
+
+    renderer = SpatialRenderer(load_layout())
+    motors = renderer.render_point(0.3, 0.6, 200)      # 10 motor bytes
+
+    python spatial.py --info
+    python spatial.py --path circle --period 2 --loop 3 --transport sim
+"""
+import argparse
+import asyncio
+import csv
+import os
+import time
+
+import numpy as np
+
+from haptic_mapping import NUM_MOTORS
+
+POSITIONS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "eagleman-vest-rev1", "production",
+                             "positions.csv")
+
+# DRV2605 driver of each motor index. The firmware reaches motor i through channel driver_mux_addr[i] of
+# the upper (0x70, U4) or lower (0x74, U3) TCA9548A; in the netlist those channels' SDA lines go to these
+# drivers, whose outputs go to screw terminals J9, J8, J7, J6, J11, J10, J2, J3, J4, J5.
+MOTOR_DRIVERS = ("U14", "U13", "U12", "U11", "U16", "U15", "U7", "U8", "U9", "U10")
+
+GRID = 33  # nodes across the layout's width
+NEIGHBOURS = 3  # motors that share a phantom point
+
+
+def read_positions(path=POSITIONS_CSV):
+    """{designator: (x, y)} in mm from a KiCad placement file."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return {row["Designator"]: (float(row["Mid X"]), float(row["Mid Y"])) for row in csv.DictReader(f)}
+
+
+def load_layout(path=POSITIONS_CSV, designators=MOTOR_DRIVERS):
+    """
+    (10, 2) motor positions in mm.
+
+    Args:
+        path (str): the PCB placement file, or a layout file written by save_layout().
+        designators (tuple): parts whose positions stand for motors 0-9 in a placement file.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        header = next(csv.reader(f))
+    if "motor" in header:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = sorted(csv.DictReader(f), key=lambda row: int(row["motor"]))
+        positions = np.array([(float(row["x"]), float(row["y"])) for row in rows])
+    else:
+        placements = read_positions(path)
+        missing = [designator for designator in designators if designator not in placements]
+        if missing:
+            raise ValueError(f"{path} has no position for {', '.join(missing)}")
+        positions = np.array([placements[designator] for designator in designators])
+    if positions.shape != (NUM_MOTORS, 2):
+        raise ValueError(f"{path}: expected {NUM_MOTORS} motor positions, got {len(positions)}")
+    return positions
+
+
+def save_layout(path, positions, designators=MOTOR_DRIVERS):
+    """Write motor positions as a small motor,designator,x,y file that load_layout() reads back."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["motor", "designator", "x", "y"])
+        for motor, ((x, y), designator) in enumerate(zip(positions, designators)):
+            writer.writerow([motor, designator, f"{x:.4f}", f"{y:.4f}"])
+
+
+def normalize(positions):
+    """Map positions to x in 0..1 and y in 0..height, keeping the aspect ratio; returns (positions, height)."""
+    low = positions.min(axis=0)
+    span = positions.max(axis=0) - low
+    if not span[0] > 0:
+        raise ValueError("Motor positions must span some width")
+    normalized = (positions - low) / span[0]
+    return normalized, span[1] / span[0]
+
+
+class SpatialRenderer:
+    """Phantom points and intensity fields onto the motors."""
+
+    def __init__(self, positions, grid=GRID, neighbours=NEIGHBOURS, power=0.5):
+        """
+        Args:
+            positions (ndarray): (10, 2) motor positions in any unit, e.g. from load_layout().
+            grid (int): nodes across the width; the height gets as many as the aspect ratio needs.
+            neighbours (int): motors that share each phantom point.
+            power (float): weights go with distance ** -power before normalizing; 0.5 is the
+                energy model, higher values keep the sensation closer to the nearest motor.
+        """
+        self.positions, self.height = normalize(np.asarray(positions, dtype=np.float64))
+        neighbours = min(neighbours, NUM_MOTORS)
+        self.shape = (max(2, round(self.height * (grid - 1)) + 1), grid)  # (rows, columns) of nodes
+        rows, columns = self.shape
+        ys, xs = np.meshgrid(np.linspace(0.0, self.height, rows), np.linspace(0.0, 1.0, columns), indexing="ij")
+        self.nodes = np.column_stack((xs.ravel(), ys.ravel()))
+
+        # Phantom weights: the nearest motors of every node, energy-normalized
+        distance = np.linalg.norm(self.nodes[:, None, :] - self.positions[None, :, :], axis=2)
+        nearest = np.argsort(distance, axis=1)[:, :neighbours]
+        near = np.take_along_axis(distance, nearest, axis=1)
+        weights = np.maximum(near, 1e-9) ** -power
+        weights[near[:, 0] < 1e-9] = [1.0] + [0.0] * (neighbours - 1)  # right on a motor: only that one
+        weights /= np.sqrt(np.square(weights).sum(axis=1, keepdims=True))
+        self.phantom = np.zeros((NUM_MOTORS, len(self.nodes)), dtype=np.float32)
+        np.put_along_axis(self.phantom.T, nearest, weights.astype(np.float32), axis=1)
+        self._phantom_nodes = self.phantom.T.astype(np.float64)  # (nodes, 10) for gathering by node
+
+        # Sampling weights: every motor reads the field at its position, bilinearly
+        self.sampling = np.zeros((NUM_MOTORS, len(self.nodes)), dtype=np.float32)
+        for motor, (x, y) in enumerate(self.positions):
+            for node, weight in zip(*self._bilinear(x, y)):
+                self.sampling[motor, node] += weight
+
+    def _bilinear(self, x, y):
+        """The 4 nodes around (x, y) and their bilinear weights, as two arrays of shape (..., 4)."""
+        rows, columns = self.shape
+        fx = np.clip(np.asarray(x, dtype=np.float64), 0.0, 1.0) * (columns - 1)
+        fy = np.clip(np.asarray(y, dtype=np.float64), 0.0, self.height) / self.height * (rows - 1)
+        x0 = np.minimum(fx.astype(np.intp), columns - 2)
+        y0 = np.minimum(fy.astype(np.intp), rows - 2)
+        tx = fx - x0
+        ty = fy - y0
+        base = y0 * columns + x0
+        nodes = np.stack((base, base + 1, base + columns, base + columns + 1), axis=-1)
+        weights = np.stack(((1 - tx) * (1 - ty), tx * (1 - ty), (1 - tx) * ty, tx * ty), axis=-1)
+        return nodes, weights
+
+    def phantom_weights(self, xy):
+        """(N, 10) motor weights of phantom points at (N, 2) normalized positions; each row's squares sum to 1."""
+        xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+        nodes, weights = self._bilinear(xy[:, 0], xy[:, 1])
+        blended = np.einsum("nk,nkm->nm", weights, self._phantom_nodes[nodes])
+        return blended / np.sqrt(np.square(blended).sum(axis=1, keepdims=True))
+
+    def render_point(self, x, y, intensity=255):
+        """Motor bytes for a phantom point at (x, y) in normalized coordinates."""
+        # _bilinear() for one point in plain floats; NumPy only for the (4, 10) gather and product
+        rows, columns = self.shape
+        fx = min(max(x, 0.0), 1.0) * (columns - 1)
+        fy = min(max(y, 0.0), self.height) / self.height * (rows - 1)
+        x0 = min(int(fx), columns - 2)
+        y0 = min(int(fy), rows - 2)
+        tx = fx - x0
+        ty = fy - y0
+        base = y0 * columns + x0
+        corners = self._phantom_nodes[[base, base + 1, base + columns, base + columns + 1]]
+        blended = np.array(((1 - tx) * (1 - ty), tx * (1 - ty), (1 - tx) * ty, tx * ty)) @ corners
+        levels = blended * (intensity / np.sqrt(blended @ blended))
+        return bytes(np.clip(np.rint(levels), 0, 255).astype(np.uint8))
+
+    def render_points(self, xy, intensity=255):
+        """
+        Motor values for a whole path of phantom points at once.
+
+        Args:
+            xy (ndarray): (N, 2) normalized positions, one per frame.
+            intensity (float or ndarray): strength 0-255, one value or one per frame.
+
+        Returns:
+            (N, 10) uint8 array, ready for waveform.RenderedSequence.
+        """
+        levels = self.phantom_weights(xy) * np.asarray(intensity, dtype=np.float64).reshape(-1, 1)
+        return np.clip(np.rint(levels), 0, 255).astype(np.uint8)
+
+    def render_field(self, field):
+        """Motor bytes from a (rows, columns) intensity field over the grid (see `shape`)."""
+        levels = self.sampling @ np.asarray(field, dtype=np.float32).ravel()
+        return bytes(np.clip(np.rint(levels), 0, 255).astype(np.uint8))
+
+
+def demo_path(name, renderer, rate, period):
+    """(N, 2) positions of a phantom point over one `period` for the command line."""
+    t = np.arange(round(rate * period)) / (rate * period)
+    height = renderer.height
+    if name == "circle":
+        radius = 0.4 * min(1.0, height)  # within the motors across the narrower side
+        return np.column_stack((0.5 + radius * np.cos(2 * np.pi * t), height / 2 + radius * np.sin(2 * np.pi * t)))
+    if name == "sweep":
+        # Up the middle, between the columns, and back down
+        return np.column_stack((np.full_like(t, 0.5), height * (1 - np.abs(2 * t - 1))))
+    if name == "zigzag":
+        return np.column_stack((np.abs(((4 * t) % 2) - 1), height * t))
+    raise ValueError(f"Unknown path: {name}")
+
+
+def describe(renderer, designators=MOTOR_DRIVERS):
+    print(f"Layout {renderer.shape[1]}x{renderer.shape[0]} nodes, height {renderer.height:.2f} of the width")
+    for motor, ((x, y), designator) in enumerate(zip(renderer.positions, designators)):
+        print(f"  motor {motor + 1:>2} ({designator:>3}): x {x:.2f}, y {y:.2f}")
+    started = time.perf_counter()
+    for step in range(1000):
+        renderer.render_point(step / 1000, renderer.height / 2)
+    print(f"render_point: {(time.perf_counter() - started) * 1000:.1f} us per frame")
+
+
+def plot(renderer, designators=MOTOR_DRIVERS):
+    """Motor positions over the strongest phantom weight at every grid node: 1 on a motor, lowest between them."""
+    import matplotlib.pyplot as plt
+
+    from haptic_renderer import COLORS
+
+    fig, ax = plt.subplots(figsize=(5, 5 * renderer.height))
+    peak = renderer.phantom.max(axis=0).reshape(renderer.shape)
+    ax.imshow(peak, origin="lower", extent=(0, 1, 0, renderer.height), cmap="Greys", vmin=0)
+    for motor, ((x, y), designator) in enumerate(zip(renderer.positions, designators)):
+        ax.scatter([x], [y], s=200, color=COLORS[motor])
+        ax.annotate(f"{motor + 1} ({designator})", (x, y), xytext=(8, 8), textcoords="offset points")
+    ax.set_title("Motor layout")
+    plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move a phantom point across the vest\'s motor layout')
+    parser.add_argument('--layout', default=POSITIONS_CSV,
+                        help='PCB placement file, or a layout file written with --save-layout')
+    parser.add_argument('--save-layout', metavar='PATH', help='Write the motor positions to a layout file')
+    parser.add_argument('--path', choices=['circle', 'sweep', 'zigzag'], default='circle')
+    parser.add_argument('--period', type=float, default=2.0, help='Seconds per trip along the path')
+    parser.add_argument('--intensity', type=float, default=255.0)
+    parser.add_argument('--rate', type=float, default=100.0, help='Frames per second')
+    parser.add_argument('--loop', type=int, default=1, help='Trips along the path')
+    parser.add_argument('--framing', choices=['legacy', 'cobs', 'delta'], default='legacy')
+    parser.add_argument('--info', action='store_true', help='Only print the layout and the render cost')
+    parser.add_argument('--plot', action='store_true', help='Only show the layout')
+    parser.add_argument('--rescan', action='store_true', help='Ignore the cached BLE address')
+    parser.add_argument('--transport', default='bleak', help='"bleak" or "sim[:...]" (see transport.py)')
+    args = parser.parse_args()
+
+    positions = load_layout(args.layout)
+    if args.save_layout:
+        save_layout(args.save_layout, positions)
+        print(f"Wrote the motor layout to {args.save_layout}")
+    renderer = SpatialRenderer(positions)
+    if args.info:
+        describe(renderer)
+        return
+    if args.plot:
+        plot(renderer)
+        return
+
+    from waveform import RenderedSequence, play
+
+    payloads = renderer.render_points(demo_path(args.path, renderer, args.rate, args.period), args.intensity)
+    sequence = RenderedSequence(payloads, args.rate, framing=args.framing)
+    print(f"Rendered {args.path}: {len(sequence)} frames over {sequence.duration:.2f} s, "
+          f"peak motor value {payloads.max()}")
+    asyncio.run(play(sequence, args.transport, loops=args.loop, use_cache=not args.rescan))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The orchestrator modules are scripts that import each other by name, as when run from their directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
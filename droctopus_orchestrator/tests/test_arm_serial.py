@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import pytest
+from arm_commands import CMD_ALL_ANGLES, CMD_FEEDBACK_FLOW, FEEDBACK, encode_all_angles
+from arm_serial import ArmSerial, open_arm_port, parse_feedback
+from fake_arm import FakeArm, FakeArmSerial
+
+INITIAL = (0.0, 0.0, 1.57, 3.14)
+
+
+def test_parse_feedback_line():
+    line = json.dumps({"T": FEEDBACK, "b": 0.1, "s": -0.2, "e": 1.5, "t": 3.0,
+                       "torB": 10, "torS": 20, "torE": 30, "torH": 40})
+    telemetry = parse_feedback(line, timestamp=12.5)
+    assert telemetry.timestamp == 12.5
+    assert telemetry.angles == (0.1, -0.2, 1.5, 3.0)
+    assert (telemetry.base_load, telemetry.shoulder_load, telemetry.elbow_load, telemetry.hand_load) == (10, 20, 30, 40)
+
+
+def test_parse_feedback_without_loads():
+    telemetry = parse_feedback(json.dumps({"T": FEEDBACK, "b": 0, "s": 0, "e": 1.57, "t": 3.14}))
+    assert telemetry.angles == INITIAL
+    assert telemetry.base_load == 0
+
+
+@pytest.mark.parametrize("line", [
+    "",
+    "not json",
+    "[1, 2]",
+    json.dumps({"T": CMD_FEEDBACK_FLOW, "cmd": 1}),
+    json.dumps({"T": FEEDBACK, "b": 0, "s": 0, "e": 0}),
+    json.dumps({"T": FEEDBACK, "b": "x", "s": 0, "e": 0, "t": 0}),
+])
+def test_parse_feedback_ignores_other_lines(line):
+    assert parse_feedback(line) is None
+
+
+def run_against_fake(scenario, **options):
+    """Run `scenario(arm, fake)` with an ArmSerial talking to a FakeArmSerial."""
+    async def main():
+        fake = FakeArmSerial(**options).start()
+        arm = await ArmSerial(fake).start()
+        try:
+            return await asyncio.wait_for(scenario(arm, fake), 5.0)
+        finally:
+            await arm.close()
+
+    return asyncio.run(main())
+
+
+async def next_telemetry(arm):
+    async for telemetry in arm.telemetry():
+        return telemetry
+
+
+def test_requested_feedback_reports_the_fake_arm_pose():
+    async def scenario(arm, fake):
+        await arm.request_feedback()
+        return await next_telemetry(arm)
+
+    telemetry = run_against_fake(scenario)
+    assert telemetry.angles == pytest.approx(INITIAL, abs=1e-4)
+    assert telemetry.base_load == 0
+
+
+def test_feedback_flow_follows_a_move():
+    target = (0.5, -0.3, 1.2, 2.8)
+
+    async def scenario(arm, fake):
+        await arm.write(encode_all_angles(*target, spd=0, acc=0))
+        await arm.set_feedback_flow(True)
+        seen = 0
+        async for telemetry in arm.telemetry():
+            seen += 1
+            if telemetry.angles == pytest.approx(target, abs=1e-3):
+                break
+        await arm.set_feedback_flow(False)
+        return seen, arm.latest, fake.commands
+
+    seen, latest, commands = run_against_fake(scenario, speed=20.0, feedback_interval=0.01)
+    assert seen > 1  # streamed while the joints were still moving
+    assert latest.angles == pytest.approx(target, abs=1e-3)
+    assert commands[0]["T"] == CMD_ALL_ANGLES
+    assert [commands[0][joint] for joint in ("base", "shoulder", "elbow", "hand")] == pytest.approx(target)
+
+
+def test_fake_arm_over_a_pty():
+    pytest.importorskip("termios")
+    target = (-0.4, 0.2, 1.0, 3.0)
+
+    async def main():
+        with FakeArm(speed=20.0, feedback_interval=0.01) as fake:
+            arm = await ArmSerial(open_arm_port(fake.port)).start()
+            try:
+                await arm.write(encode_all_angles(*target, spd=0, acc=0))
+                await arm.set_feedback_flow(True)
+
+                async def reach_target():
+                    async for telemetry in arm.telemetry():
+                        if telemetry.angles == pytest.approx(target, abs=1e-3):
+                            return telemetry
+
+                return await asyncio.wait_for(reach_target(), 5.0), fake.commands
+            finally:
+                await arm.close()
+
+    telemetry, commands = asyncio.run(main())
+    assert telemetry.angles == pytest.approx(target, abs=1e-3)
+    assert [command["T"] for command in commands[:2]] == [CMD_ALL_ANGLES, CMD_FEEDBACK_FLOW]
@@ -0,0 +1,98 @@
+import asyncio
+import re
+
+import pytest
+
+pytest.importorskip("bleak")
+
+from ble_supervisor import LinkSupervisor  # noqa: E402
+from ble_writer import FrameWriter  # noqa: E402
+from fake_ble import FakeBle  # noqa: E402
+
+NAME = "ESP32_Receiver"
+NOTIFY_UUID = "beb5483e-36e1-4688-b7f5-ea07361b26a8"
+WRITE_UUID = "beb5483e-36e1-4688-b7f5-ea07361b26a9"
+
+
+def supervise(scenario, tmp_path, **options):
+    """Run `scenario(supervisor, peripheral)` with one fake ESP32 kept up by a LinkSupervisor."""
+    async def main():
+        ble = FakeBle(advertising_interval=0.01)
+        peripheral = ble.add(NAME, "AA:00:00:00:00:02",
+                             {NOTIFY_UUID: ["notify"], WRITE_UUID: ["write-without-response"]}, connect_delay=0.01)
+        supervisor = LinkSupervisor([NAME], cache_path=str(tmp_path / "cache.json"), scan_timeout=0.05,
+                                    connect_timeout=0.5, client_factory=ble.client, scanner_factory=ble.scanner,
+                                    **options)
+        try:
+            assert await supervisor.start()
+            return await asyncio.wait_for(scenario(supervisor, peripheral), 10.0)
+        finally:
+            await supervisor.close()
+
+    return asyncio.run(main())
+
+
+def test_reconnects_with_backoff_after_a_drop(tmp_path, capsys):
+    async def scenario(supervisor, peripheral):
+        link = supervisor[NAME]
+        first = link.client
+        peripheral.drop(offline_for=1.0)
+        assert not supervisor.connected
+        await link.up.wait()
+        return first, link
+
+    first, link = supervise(scenario, tmp_path, min_backoff=0.1, max_backoff=0.4)
+    assert link.client is not None and link.client is not first
+    assert link.reconnects == 1
+    assert link.downtime >= 1.0
+
+    delays = [float(delay) for delay in re.findall(r"retrying in ([\d.]+) s", capsys.readouterr().out)]
+    assert delays[:3] == [0.1, 0.2, 0.4]
+    assert max(delays) == 0.4
+
+
+def test_reconnect_restores_subscriptions_and_runs_hooks(tmp_path):
+    async def scenario(supervisor, peripheral):
+        link = supervisor[NAME]
+        received = []
+        events = []
+        await link.subscribe(NOTIFY_UUID, lambda sender, data: received.append(bytes(data)))
+        link.on_down(lambda: events.append("down"))
+        link.on_up(lambda client: events.append("up"))
+
+        peripheral.notify(NOTIFY_UUID, b"before")
+        peripheral.drop(offline_for=0.1)
+        await link.up.wait()
+        peripheral.notify(NOTIFY_UUID, b"after")
+        return received, events
+
+    received, events = supervise(scenario, tmp_path, min_backoff=0.05)
+    assert received == [b"before", b"after"]
+    assert events == ["down", "up"]
+
+
+def test_reconnect_replays_the_last_frame(tmp_path):
+    frame = bytes([0xAA, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100])
+
+    async def writes_arrive(peripheral, count):
+        while len(peripheral.writes) < count:
+            await asyncio.sleep(0.01)
+
+    async def scenario(supervisor, peripheral):
+        link = supervisor[NAME]
+        writer = FrameWriter(link.client, WRITE_UUID).start()
+        link.attach_writer(writer)
+        try:
+            writer.submit(frame)
+            await writes_arrive(peripheral, 1)
+            peripheral.drop(offline_for=0.1)
+            assert not writer.online
+            await link.up.wait()
+            await writes_arrive(peripheral, 2)
+            return [data for _, _, data in peripheral.writes], writer.sent
+        finally:
+            await writer.stop()
+
+    writes, sent = supervise(scenario, tmp_path, min_backoff=0.05)
+    assert writes == [frame, frame]
+    assert sent == 2
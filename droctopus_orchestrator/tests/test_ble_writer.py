@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("bleak")
+
+from ble_writer import FrameWriter  # noqa: E402
+from fake_ble import FakeBle  # noqa: E402
+
+WRITE_UUID = "beb5483e-36e1-4688-b7f5-ea07361b26a8"
+
+
+def run_writer(scenario, interval=0.005, **options):
+    """Run `scenario(writer, peripheral)` with a FrameWriter on a fake vest taking one write per `interval`."""
+    async def main():
+        ble = FakeBle()
+        peripheral = ble.add("ESP32_Receiver", "AA:00:00:00:00:02", {WRITE_UUID: ["write"]}, connect_delay=0,
+                             interval=interval)
+        client = ble.client(peripheral.address)
+        await client.connect()
+        writer = FrameWriter(client, WRITE_UUID, **options).start()
+        try:
+            return await asyncio.wait_for(scenario(writer, peripheral), 5.0)
+        finally:
+            await writer.stop()
+
+    return asyncio.run(main())
+
+
+def test_flush_waits_for_every_queued_frame():
+    frames = [bytes([i] * 10) for i in range(8)]
+
+    async def scenario(writer, peripheral):
+        for frame in frames:
+            writer.submit(frame)
+        await writer.flush()
+        return writer.depth, [data for _, _, data in peripheral.writes]
+
+    depth, written = run_writer(scenario, coalesce=False)
+    assert depth == 0
+    assert written == frames
+
+
+def test_flush_returns_when_paused():
+    async def scenario(writer, peripheral):
+        writer.pause()
+        writer.submit(bytes(10))
+        await writer.flush()
+        return writer.depth, peripheral.writes
+
+    depth, written = run_writer(scenario)
+    assert depth == 1
+    assert written == []
@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+from command_input import CommandPlayer, Frame, Repeat, Wait, parse_line
+
+
+def test_parse_line():
+    assert parse_line("  # a comment") == []
+    commands = parse_line("all 7 @250ms; wait 0.5s; off")
+    assert commands == [Frame(bytes([7] * 10), 0.25), Wait(0.5), Frame(bytes(10), 0.0)]
+
+
+def test_repeat_is_not_expanded():
+    [repeat] = parse_line("repeat 100000000: all 255 @100ms; off")
+    assert repeat == Repeat(100000000, (Frame(bytes([255] * 10), 0.1), Frame(bytes(10), 0.0)))
+    assert parse_line("repeat 0: off") == []
+
+
+@pytest.mark.parametrize("line", ["repeat: off", "repeat x: off", "repeat 3 off", "repeat -1: off"])
+def test_bad_repeat(line):
+    with pytest.raises(ValueError):
+        parse_line(line)
+
+
+def test_player_plays_a_repeat_count_times():
+    sent = []
+    player = CommandPlayer(sent.append)
+    asyncio.run(player.run(parse_line("repeat 3: all 255; off")))
+    assert sent == [bytes([255] * 10), bytes(10)] * 3
+    assert player.frames == 6
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("bleak")
+
+from fake_ble import FakeBle  # noqa: E402
+
+WRITE_UUID = "beb5483e-36e1-4688-b7f5-ea07361b26a8"
+NOTIFY_UUID = "beb5483e-36e1-4688-b7f5-ea07361b26a9"
+PACKETS = 200
+
+
+def run_link(scenario):
+    """Run `scenario(client, peripheral)` over a connected link with a lot of jitter."""
+    async def main():
+        ble = FakeBle(latency=0.005, jitter=0.004, seed=1)
+        peripheral = ble.add("ESP32_Receiver", "AA:00:00:00:00:02",
+                             {WRITE_UUID: ["write-without-response"], NOTIFY_UUID: ["notify"]}, connect_delay=0)
+        client = ble.client(peripheral.address)
+        await client.connect()
+        try:
+            return await scenario(client, peripheral)
+        finally:
+            await client.disconnect()
+
+    return asyncio.run(main())
+
+
+def test_jitter_does_not_reorder_writes():
+    async def scenario(client, peripheral):
+        for number in range(PACKETS):
+            await client.write_gatt_char(WRITE_UUID, number.to_bytes(2, "little"), response=False)
+        await asyncio.sleep(0.05)
+        return [int.from_bytes(data, "little") for _, _, data in peripheral.writes]
+
+    assert run_link(scenario) == list(range(PACKETS))
+
+
+def test_jitter_does_not_reorder_acknowledged_writes_behind_unacknowledged_ones():
+    async def scenario(client, peripheral):
+        for number in range(PACKETS):
+            await client.write_gatt_char(WRITE_UUID, number.to_bytes(2, "little"), response=number % 10 == 9)
+        await asyncio.sleep(0.05)
+        return [int.from_bytes(data, "little") for _, _, data in peripheral.writes]
+
+    assert run_link(scenario) == list(range(PACKETS))
+
+
+def test_jitter_does_not_reorder_notifications():
+    async def scenario(client, peripheral):
+        received = []
+        await client.start_notify(NOTIFY_UUID, lambda sender, data: received.append(int.from_bytes(data, "little")))
+        for number in range(PACKETS):
+            peripheral.notify(NOTIFY_UUID, number.to_bytes(2, "little"))
+            await asyncio.sleep(0.0005)
+        await asyncio.sleep(0.05)
+        return received
+
+    assert run_link(scenario) == list(range(PACKETS))
@@ -0,0 +1,132 @@
+import numpy as np
+import pytest
+from frame_delta import KEY, PAIRS, SPAN, DeltaDecoder, DeltaEncoder, DeltaFrameDecoder, DeltaFrameEncoder
+from framing import FrameDecoder
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def motor_states(count, seed=0):
+    """A stream like the orchestrator's: mostly one joint's motor pair changing, sometimes nothing or everything."""
+    rng = np.random.default_rng(seed)
+    state = rng.integers(0, 256, 10, dtype=np.uint8)
+    states = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            pair = rng.integers(0, 5)
+            state[[pair, pair + 5]] = rng.integers(0, 256, 2)
+        elif kind < 0.7:
+            start = rng.integers(0, 8)
+            state[start:start + 3] = rng.integers(0, 256, 3)
+        elif kind < 0.75:
+            state = rng.integers(0, 256, 10, dtype=np.uint8)
+        states.append(bytes(state))
+    return states
+
+
+def wire_packets(states, keyframe_interval=0.1, tick=0.01):
+    """(state index, wire bytes, packet kind) for every state that produced a packet."""
+    clock = Clock()
+    encoder = DeltaFrameEncoder(keyframe_interval, clock)
+    packets = []
+    for index, state in enumerate(states):
+        data = encoder.encode(state)
+        if data is not None:
+            [(_, packet)] = FrameDecoder(payload_size=None).feed(data)
+            packets.append((index, data, packet[0]))
+        clock.now += tick
+    return packets
+
+
+def test_packet_kinds():
+    clock = Clock()
+    encoder = DeltaEncoder(keyframe_interval=1.0, clock=clock)
+    base = bytes(range(10, 20))
+    assert encoder.encode(base) == bytes((KEY,)) + base
+    assert encoder.encode(base) is None
+
+    pairs = bytearray(base)
+    pairs[1], pairs[8] = 0, 255
+    assert encoder.encode(pairs) == bytes((PAIRS, 1, 0, 8, 255))
+
+    span = bytearray(pairs)
+    span[3:6] = b"\x07\x08\x09"
+    assert encoder.encode(span) == bytes((SPAN, 3, 3, 7, 8, 9))
+
+    everything = bytes(255 - value for value in span)
+    assert encoder.encode(everything) == bytes((KEY,)) + everything
+
+
+def test_keyframe_interval_and_force_keyframe():
+    clock = Clock()
+    encoder = DeltaEncoder(keyframe_interval=1.0, clock=clock)
+    state = bytes(10)
+    assert encoder.encode(state)[0] == KEY
+    clock.now = 0.5
+    assert encoder.encode(state) is None
+    encoder.force_keyframe()
+    assert encoder.encode(state)[0] == KEY
+    clock.now = 1.4
+    assert encoder.encode(state) is None
+    clock.now = 1.5
+    assert encoder.encode(state)[0] == KEY
+
+
+def test_decoder_waits_for_a_keyframe():
+    decoder = DeltaDecoder()
+    assert decoder.decode(bytes((PAIRS, 0, 1))) is None
+    assert decoder.skipped == 1
+    assert decoder.decode(bytes((KEY,)) + bytes(10)) == bytes(10)
+    assert decoder.decode(bytes((PAIRS, 0, 1))) == b"\x01" + bytes(9)
+
+
+def test_round_trip():
+    states = motor_states(3000)
+    packets = wire_packets(states)
+    decoder = DeltaFrameDecoder()
+    decoded = decoder.feed(b"".join(data for _, data, _ in packets))
+    assert decoded == [states[index] for index, _, _ in packets]
+    assert decoded[-1] == states[-1]
+
+
+@pytest.mark.parametrize("fault", ["lost", "reordered"])
+def test_recovers_at_the_next_keyframe_without_wrong_states(fault):
+    states = motor_states(3000, seed=1)
+    packets = list(enumerate(wire_packets(states)))  # (position on the wire, (state index, bytes, kind))
+    rng = np.random.default_rng(2)
+    faults = set(rng.choice(np.arange(1, len(packets) - 1), 100, replace=False).tolist())
+
+    received = []
+    for position, packet in packets:
+        if position in faults:
+            if fault == "lost":
+                continue
+            received[-1:] = [(position, packet), received[-1]]  # overtakes the packet sent before it
+        else:
+            received.append((position, packet))
+
+    decoder = DeltaFrameDecoder()
+    newest = -1
+    waiting = False
+    recovered = 0
+    for position, (index, data, kind) in received:
+        decoded = decoder.feed(data)
+        if decoded:
+            # Never a stale state, and never a delta applied to the wrong base
+            assert position > newest
+            assert decoded == [states[index]]
+        if position != newest + 1:
+            waiting = True
+        elif waiting and kind == KEY:
+            assert decoded == [states[index]]
+            waiting = False
+            recovered += 1
+        newest = max(newest, position)
+    assert recovered > 50
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from framing import DELIMITER, FrameDecoder, FrameEncoder, cobs_decode, cobs_encode
+
+
+def payloads():
+    rng = np.random.default_rng(0)
+    fixed = [bytes(10), bytes([0xAA] * 10), bytes([0xFF] * 10), bytes(range(10))]
+    return fixed + [bytes(row) for row in rng.integers(0, 256, (500, 10), dtype=np.uint8)]
+
+
+@pytest.mark.parametrize("payload", [bytes(10), bytes([0xAA] * 10), bytes([0, 1] * 5), bytes(range(1, 254))])
+def test_cobs_round_trip(payload):
+    encoded = cobs_encode(payload)
+    assert DELIMITER not in encoded
+    assert cobs_decode(encoded) == payload
+
+
+def test_round_trip():
+    encoder = FrameEncoder()
+    decoder = FrameDecoder()
+    sent = payloads()
+    received = decoder.feed(b"".join(encoder.encode(payload) for payload in sent))
+    assert [payload for _, payload in received] == sent
+    assert [seq for seq, _ in received] == [i & 0xFF for i in range(len(sent))]
+    assert (decoder.frames, decoder.errors, decoder.lost) == (len(sent), 0, 0)
+
+
+def test_encode_many_matches_encode():
+    sent = payloads()
+    assert FrameEncoder(seq=250).encode_many(sent) == b"".join(map(FrameEncoder(seq=250).encode, sent))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_arbitrary_chunks(seed):
+    sent = payloads()
+    data = FrameEncoder().encode_many(sent)
+    rng = np.random.default_rng(seed)
+    decoder = FrameDecoder()
+    received = []
+    start = 0
+    while start < len(data):
+        size = int(rng.integers(1, 40))
+        received += decoder.feed(data[start:start + size])
+        start += size
+    assert [payload for _, payload in received] == sent
+    assert (decoder.errors, decoder.lost) == (0, 0)
+
+
+def test_corrupted_byte_is_rejected():
+    encoder = FrameEncoder()
+    before, frame, after = (encoder.encode(payload) for payload in payloads()[4:7])
+    for index in range(len(frame) - 1):  # every byte but the delimiter
+        for bit in range(8):
+            corrupted = bytearray(frame)
+            corrupted[index] ^= 1 << bit
+            if corrupted[index] == 0:
+                continue  # a delimiter splits the packet instead, see test_inserted_delimiter_is_rejected
+            decoder = FrameDecoder()
+            received = decoder.feed(before + bytes(corrupted) + after)
+            assert [seq for seq, _ in received] == [0, 2]
+            assert decoder.errors == 1
+            assert decoder.lost == 1
+
+
+def test_inserted_delimiter_is_rejected():
+    encoder = FrameEncoder()
+    before, frame, after = (encoder.encode(payload) for payload in payloads()[4:7])
+    decoder = FrameDecoder()
+    received = decoder.feed(before + frame[:5] + DELIMITER + frame[5:] + after)
+    assert [seq for seq, _ in received] == [0, 2]
+    assert decoder.errors == 2
+
+
+def test_dropped_frames_are_counted():
+    encoder = FrameEncoder(seq=254)
+    frames = [encoder.encode(payload) for payload in payloads()[:6]]  # seq 254, 255, 0, 1, 2, 3
+    decoder = FrameDecoder()
+    received = decoder.feed(b"".join(frames[:2] + frames[3:4] + frames[5:]))
+    assert [seq for seq, _ in received] == [254, 255, 1, 3]
+    assert decoder.lost == 2
+    assert decoder.errors == 0
+
+
+def test_junk_without_delimiter_is_dropped():
+    decoder = FrameDecoder()
+    assert decoder.feed(b"\x05" * 100) == []
+    assert decoder.errors == 1
+    frame = FrameEncoder().encode(bytes(10))
+    assert decoder.feed(DELIMITER + frame) == [(0, bytes(10))]
+
+
+def test_variable_length_payloads():
+    sent = [b"\x01", bytes(50), bytes(range(250))]
+    decoder = FrameDecoder(payload_size=None)
+    received = decoder.feed(FrameEncoder().encode_many(sent))
+    assert [payload for _, payload in received] == sent
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from haptic_mapping import DEFAULT_LAYOUT, FRAME_HEADER, MAX_ANGLE, MIN_ANGLE, HapticMapper, parse_curve
+
+
+def baseline_byte(angle):
+    """map_angle_to_byte as the orchestrator had it before the lookup tables."""
+    value = int(255 * (angle - MIN_ANGLE) / (MAX_ANGLE - MIN_ANGLE))
+    return 254 if value == 0xAA else value
+
+
+def baseline_motors(joint_angles):
+    return [baseline_byte(entry[1] * joint_angles[entry[0]]) if entry else 0 for entry in DEFAULT_LAYOUT]
+
+
+def poses():
+    rng = np.random.default_rng(0)
+    edges = [[MAX_ANGLE] * 4, [MIN_ANGLE] * 4, [0.0] * 4, [0.0, 0.0, 1.57, 3.14]]
+    return np.vstack([edges, rng.uniform(MIN_ANGLE, MAX_ANGLE, (5000, 4))])
+
+
+def test_linear_mapping_matches_the_original_formula():
+    mapper = HapticMapper()
+    for pose in poses():
+        assert mapper.motor_values(pose) == baseline_motors(pose)
+
+
+def test_batch_mapping_matches_the_original_formula():
+    angles = poses()
+    expected = np.array([baseline_motors(pose) for pose in angles], dtype=np.uint8)
+    np.testing.assert_array_equal(HapticMapper().motor_batch(angles), expected)
+
+
+def test_full_deflection_frame():
+    frame = HapticMapper().frame((0.0, 0.0, 1.57, 3.14))
+    assert list(frame) == [FRAME_HEADER, 127, 127, 127, 127, 63, 191, 0, 255, 0, 0]
+
+
+@pytest.mark.parametrize("spec", ["deadzone:1", "deadzone:1.5", "deadzone:-0.1"])
+def test_deadzone_width_is_validated(spec):
+    with pytest.raises(ValueError):
+        parse_curve(spec)
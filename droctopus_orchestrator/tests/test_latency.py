@@ -0,0 +1,22 @@
+from latency import LatencyHistogram, ms, seconds
+
+
+def test_seconds():
+    assert seconds(1_500_000) == 0.0015
+    assert seconds(None) is None
+
+
+def test_ms():
+    assert ms(0.00125) == "1.25 ms"
+    assert ms(0.00125, 1) == "1.2 ms"
+    assert ms(None) == "-"
+    assert ms(0.00125, width=8, unit="") == "    1.25"
+    assert ms(None, width=8, unit="") == "       -"
+
+
+def test_percentiles_within_bucket_resolution():
+    histogram = LatencyHistogram()
+    for ns in range(1, 100_001):
+        histogram.record(ns * 1000)
+    assert abs(histogram.percentile(0.5) - 50_000_000) / 50_000_000 < 0.04
+    assert histogram.max == 100_000_000
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from spatial import SpatialRenderer, demo_path, load_layout
+
+
+@pytest.fixture(scope="module")
+def renderer():
+    return SpatialRenderer(load_layout())
+
+
+@pytest.mark.parametrize("path", ["circle", "sweep", "zigzag"])
+def test_phantom_point_keeps_constant_energy(renderer, path):
+    values = renderer.render_points(demo_path(path, renderer, 100, 2)).astype(np.float64)
+    energy = np.sqrt(np.square(values).sum(axis=1))
+    assert energy.min() > 253 and energy.max() < 257
+
+
+def test_render_point_matches_render_points(renderer):
+    xy = np.random.default_rng(0).uniform((-0.1, -0.1), (1.1, renderer.height + 0.1), (500, 2))
+    single = np.array([np.frombuffer(renderer.render_point(x, y, 200), dtype=np.uint8) for x, y in xy])
+    np.testing.assert_array_equal(single, renderer.render_points(xy, 200))
+
+
+def test_every_grid_node_has_unit_phantom_energy(renderer):
+    np.testing.assert_allclose(np.sqrt(np.square(renderer.phantom).sum(axis=0)), 1.0, rtol=1e-6)
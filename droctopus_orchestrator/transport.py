@@ -0,0 +1,239 @@
+"""
+Hardware access behind one object, so the orchestrators run unchanged on the
+real ESP32s and RoArm or on an in-memory simulation of all three.
+
+    transport = make_transport("bleak")       # bleak + pyserial, the default
+    transport = make_transport("sim:latency=0.01,jitter=0.002,mtu=23,loss=0.01,rate=200")
+    transport = make_transport("sim:receivers=4,slow=0.05")   # four vests, the last one slow
+
+Both transports provide
+    client(target, disconnected_callback=None, timeout=...)   like BleakClient(...)
+    scanner(detection_callback)                               like BleakScanner(...)
+    connect_devices(names, **options)                         ble_discovery.connect_devices
+    supervisor(names, **options)                              a LinkSupervisor
+    open_arm(port)                                            like open_arm_port(port)
+    close()
+
+The simulation streams numbered 10-byte payloads from ESP32_Sender, decodes
+whatever reaches ESP32_Receiver, and keeps end-to-end frame and latency
+statistics (see bench_pipeline.py). With several receivers every one of them
+decodes on its own and is counted separately.
+"""
+import os
+import struct
+import tempfile
+import time
+from collections import deque
+
+from bleak import BleakClient, BleakScanner
+
+import ble_discovery
+from arm_serial import open_arm_port
+from ble_supervisor import LinkSupervisor
+from fake_arm import FakeArmSerial
+from fake_ble import FakeBle
+from frame_delta import DeltaFrameDecoder
+from framing import PAYLOAD_SIZE, FrameDecoder, FrameEncoder
+
+SENDER_NAME = "ESP32_Sender"
+RECEIVER_NAME = "ESP32_Receiver"
+SENDER_UUID = "abcdefab-1234-5678-1234-abcdefabcdef"
+RECEIVER_UUID = "fedcbafe-4321-8765-4321-fedcbafedcba"
+
+
+class BleakTransport:
+    """The real devices: bleak for the ESP32s, pyserial for the arm."""
+
+    name = "bleak"
+
+    def client(self, target, disconnected_callback=None, timeout=ble_discovery.CONNECT_TIMEOUT):
+        return BleakClient(target, disconnected_callback=disconnected_callback, timeout=timeout)
+
+    def scanner(self, detection_callback):
+        return BleakScanner(detection_callback=detection_callback)
+
+    def connect_devices(self, names, **options):
+        return ble_discovery.connect_devices(names, client_factory=self.client, scanner_factory=self.scanner,
+                                             **options)
+
+    def supervisor(self, names, **options):
+        return LinkSupervisor(names, client_factory=self.client, scanner_factory=self.scanner, **options)
+
+    def open_arm(self, port):
+        return open_arm_port(port)
+
+    def close(self):
+        pass
+
+
+class SimTransport:
+    """
+    ESP32_Sender, one or more ESP32_Receivers and the RoArm simulated in-process.
+
+    Sender payloads carry a 32-bit frame number in their first four bytes, so
+    the receiver side can count frames and measure their end-to-end latency.
+    """
+
+    name = "sim"
+
+    def __init__(self, latency=0.005, jitter=0.002, mtu=23, loss=0.0, airtime=0.0, rate=100.0,
+                 framing="legacy", output_framing=None, receivers=1, slow=0.0, seed=None):
+        """
+        Args:
+            latency, jitter (float): one-way BLE packet delay in seconds, +/- jitter.
+            mtu (int): ATT MTU of both links.
+            loss (float): probability of losing a notification or unacknowledged write.
+            airtime (float): seconds of radio time per packet (caps packets/s).
+            rate (float): sender notifications per second while subscribed.
+            framing (str): what the sender emits, "legacy" (raw 10 bytes) or "cobs".
+            output_framing (str): what the receiver decodes: "legacy", "cobs" or
+                "delta"; defaults to `framing`.
+            receivers (int): number of vests, all advertising as ESP32_Receiver.
+            slow (float): if set, the last vest takes at most one write per `slow` seconds.
+            seed (int): makes jitter and loss reproducible.
+        """
+        self.framing = framing
+        self.output_framing = output_framing or framing
+        self.ble = FakeBle(latency=latency, jitter=jitter, mtu=mtu, loss=loss, airtime=airtime, seed=seed)
+        self.sender = self.ble.add(SENDER_NAME, "5E:00:00:00:00:01", {SENDER_UUID: ["notify"]})
+        self.receivers = []
+        for index in range(receivers):
+            interval = slow if index == receivers - 1 else 0.0
+            receiver = self.ble.add(RECEIVER_NAME, f"5E:00:00:00:00:{index + 2:02X}",
+                                    {RECEIVER_UUID: ["write", "write-without-response"]}, interval=interval)
+            receiver.on_write = lambda char_uuid, data, address=receiver.address: self._on_receiver_write(address, data)
+            self.receivers.append(receiver)
+        self.receiver = self.receivers[0]
+        self.sender.stream(SENDER_UUID, rate, self._next_payload)
+        self.cache_path = os.path.join(tempfile.mkdtemp(prefix="droctopus-sim-"), "ble_cache.json")
+        self.arms = []
+
+        self._encoder = FrameEncoder()
+        decoders = {"cobs": FrameDecoder, "delta": DeltaFrameDecoder}
+        self._decoders = {receiver.address: decoders[self.output_framing]() if self.output_framing in decoders
+                          else None for receiver in self.receivers}
+        self.sent = 0
+        self.received = 0
+        self.latencies = deque(maxlen=100_000)  # seconds, one per frame that reached a receiver
+        self.per_receiver = {}  # address -> {"received", "latencies"}
+        self._last_number = {}  # address -> newest frame number seen, so replays are not counted twice
+        self._sent_at = {}  # frame number -> send time, until it is given up on
+        self._sent_base = 0
+        self._started = time.monotonic()
+
+    def client(self, target, disconnected_callback=None, timeout=ble_discovery.CONNECT_TIMEOUT):
+        return self.ble.client(target, disconnected_callback, timeout)
+
+    def scanner(self, detection_callback):
+        return self.ble.scanner(detection_callback)
+
+    def connect_devices(self, names, **options):
+        options.setdefault("cache_path", self.cache_path)
+        return ble_discovery.connect_devices(names, client_factory=self.client, scanner_factory=self.scanner,
+                                             **options)
+
+    def supervisor(self, names, **options):
+        options.setdefault("cache_path", self.cache_path)
+        return LinkSupervisor(names, client_factory=self.client, scanner_factory=self.scanner, **options)
+
+    def open_arm(self, port):
+        arm = FakeArmSerial().start()
+        self.arms.append(arm)
+        return arm
+
+    def close(self):
+        for arm in self.arms:
+            arm.stop()
+
+    def _next_payload(self):
+        number = self.sent
+        self.sent += 1
+        now = time.monotonic()
+        self._sent_at[number] = now
+        if number % 1000 == 0:
+            # Frames lost or coalesced away never arrive; forget them after a few seconds
+            self._sent_at = {n: t for n, t in self._sent_at.items() if now - t < 5.0}
+        payload = struct.pack(">I", number) + bytes((number + i) & 0xFF for i in range(PAYLOAD_SIZE - 4))
+        if self.framing == "cobs":
+            return self._encoder.encode(payload)
+        return payload
+
+    def _on_receiver_write(self, address, data):
+        decoder = self._decoders[address]
+        if decoder is None:
+            payloads = [data[1:]] if len(data) == PAYLOAD_SIZE + 1 else []
+        elif self.output_framing == "cobs":
+            payloads = [payload for seq, payload in decoder.feed(data)]
+        else:
+            payloads = decoder.feed(data)
+
+        now = time.monotonic()
+        receiver = self.per_receiver.setdefault(address, {"received": 0, "latencies": deque(maxlen=100_000)})
+        for payload in payloads:
+            number = struct.unpack(">I", bytes(payload[:4]))[0]
+            sent_at = self._sent_at.get(number)
+            if sent_at is not None and number > self._last_number.get(address, -1):
+                self._last_number[address] = number
+                self.received += 1
+                self.latencies.append(now - sent_at)
+                receiver["received"] += 1
+                receiver["latencies"].append(now - sent_at)
+
+    def reset_stats(self):
+        self.received = 0
+        self.latencies.clear()
+        self.per_receiver.clear()
+        self._sent_at.clear()
+        self._started = time.monotonic()
+        self._sent_base = self.sent
+
+    def stats(self):
+        """
+        End-to-end counters since the start (or the last reset_stats()).
+
+        "received" and "fps" add up all receivers; "receivers" has the same
+        figures for each one, keyed by address.
+        """
+        elapsed = time.monotonic() - self._started
+        sent = self.sent - self._sent_base
+
+        def counters(received, latencies):
+            latencies = sorted(latencies)
+
+            def percentile(p):
+                return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else None
+
+            return {
+                "received": received,
+                "fps": received / elapsed if elapsed else 0.0,
+                "latency_p50": percentile(0.5),
+                "latency_p99": percentile(0.99),
+            }
+
+        stats = {"seconds": elapsed, "sent": sent, **counters(self.received, self.latencies)}
+        stats["receivers"] = {
+            receiver.address: counters(**self.per_receiver.get(receiver.address, {"received": 0, "latencies": ()}))
+            for receiver in self.receivers
+        }
+        return stats
+
+
+def make_transport(spec="bleak", **defaults):
+    """
+    Transport for a --transport choice: "bleak" or "sim[:key=value,...]".
+
+    Keyword arguments are defaults for the simulation (e.g. the orchestrator's
+    framing) and are overridden by the spec.
+    """
+    name, _, arg = spec.partition(":")
+    if name == "bleak":
+        return BleakTransport()
+    if name == "sim":
+        options = dict(defaults)
+        types = {"mtu": int, "seed": int, "receivers": int, "framing": str, "output_framing": str}
+        for item in filter(None, arg.split(",")):
+            key, _, value = item.partition("=")
+            key = key.strip().replace("-", "_")
+            options[key] = types.get(key, float)(value)
+        return SimTransport(**options)
+    raise ValueError(f"Unknown transport: {spec}")
@@ -0,0 +1,348 @@
+"""
+Haptic waveform sequencer.
+
+The receiver firmware can play a pattern on its own (the rtp[] table in
+src/main.cpp: DRV2605 real-time values, each held for a number of
+milliseconds with a blocking delay()), but from the host the vest only ever
+gets static 10-motor snapshots. Here the patterns live on the host instead:
+
+  - a pattern is a function of time for one motor: Steps (amplitude,
+    duration pairs such as the firmware's rtp ramp), Ramp, Envelope, Pulse;
+  - a Timeline places patterns on motors at start times, overlapping
+    patterns on a motor combine by taking the stronger one;
+  - render() samples the whole timeline at the frame rate in one vectorized
+    pass, and RenderedSequence encodes every frame up front;
+  - stream() submits the prepared frames on a RateLoop tick, so playing even
+    a complex pattern costs an index and a submit() per frame.
+
+Motors are numbered 0-9 in code and 1-10 on the command line, as elsewhere.
+
+    timeline = Timeline().add(rtp_steps(), motors=[0, 1]).add(Pulse(0.2, 0.5, 255, 5), motors=[4])
+    sequence = RenderedSequence(timeline.render(100), 100, framing="legacy")
+    await stream(sequence, writer.submit)
+
+    python waveform.py --pattern rtp --transport sim
+    python waveform.py --pattern wave --rate 200 --loop 5 --transport sim:latency=0.01
+"""
+import argparse
+import asyncio
+import math
+import time
+
+import numpy as np
+
+from framing import make_encoder
+from haptic_mapping import FRAME_HEADER, NUM_MOTORS
+from rate_loop import RateLoop
+
+ALL_MOTORS = tuple(range(NUM_MOTORS))
+
+# The firmware's rtp[] table (src/main.cpp): DRV2605 real-time values and the milliseconds each is held
+RTP_RAMP = (
+    0x30, 100, 0x32, 100,
+    0x34, 100, 0x36, 100,
+    0x38, 100, 0x3A, 100,
+    0x00, 100,
+    0x40, 200, 0x00, 100,
+    0x40, 200, 0x00, 100,
+    0x40, 200, 0x00, 100,
+)
+RTP_FULL_SCALE = 0x7F  # real-time values are signed 8-bit, so 0x7F is full strength
+RTP_REST = 1.0  # seconds the firmware waits at 0 before playing the table again
+
+CHARACTERISTIC_UUID_2 = "fedcbafe-4321-8765-4321-fedcbafedcba"
+DEVICE_NAME_2 = "ESP32_Receiver"
+
+
+class Steps:
+    """Piecewise-constant amplitudes, each held for its duration."""
+
+    def __init__(self, steps):
+        """
+        Args:
+            steps (list): (amplitude 0-255, seconds) pairs.
+        """
+        self.levels = np.array([amplitude for amplitude, _ in steps], dtype=np.float32)
+        # Rounded so that e.g. 0.1 + 0.1 + 0.1 ends exactly where a frame at 0.3 s starts
+        self.ends = np.round(np.cumsum([seconds for _, seconds in steps]), 9)
+        self.duration = float(self.ends[-1])
+
+    def sample(self, t):
+        index = np.searchsorted(self.ends, t, side="right")
+        return self.levels[np.minimum(index, len(self.levels) - 1)]
+
+
+def rtp_steps(table=RTP_RAMP, full_scale=RTP_FULL_SCALE, rest=RTP_REST):
+    """
+    Steps from a flat DRV2605 rtp[] table of (value, milliseconds) pairs.
+
+    Args:
+        table (tuple): value, milliseconds, value, milliseconds, ...
+        full_scale (int): real-time value that maps to motor value 255.
+        rest (float): seconds at 0 appended after the table, as the firmware's loop() does.
+    """
+    steps = [(min(255.0, value * 255.0 / full_scale), milliseconds / 1000)
+             for value, milliseconds in zip(table[::2], table[1::2])]
+    if rest:
+        steps.append((0.0, rest))
+    return Steps(steps)
+
+
+class Ramp:
+    """Straight line from one amplitude to another."""
+
+    def __init__(self, start, end, duration):
+        self.start = start
+        self.end = end
+        self.duration = duration
+
+    def sample(self, t):
+        return self.start + (self.end - self.start) * np.clip(t / self.duration, 0.0, 1.0)
+
+
+class Envelope:
+    """Attack to `peak`, hold, release back to 0 (all in seconds)."""
+
+    def __init__(self, attack, hold, release, peak=255):
+        self.points = [0.0, attack, attack + hold, attack + hold + release]
+        self.peak = peak
+        self.duration = self.points[-1]
+
+    def sample(self, t):
+        return np.interp(t, self.points, [0.0, self.peak, self.peak, 0.0])
+
+
+class Pulse:
+    """`count` on/off pulses of `amplitude`, on for `duty` of every `period` seconds."""
+
+    def __init__(self, period, duty=0.5, amplitude=255, count=1):
+        self.period = period
+        self.duty = duty
+        self.amplitude = amplitude
+        self.duration = period * count
+
+    def sample(self, t):
+        return np.where(np.mod(t, self.period) < self.duty * self.period, self.amplitude, 0).astype(np.float32)
+
+
+class Timeline:
+    """Patterns placed on motors at start times."""
+
+    def __init__(self):
+        self.placements = []  # (motors, pattern, start seconds, gain)
+
+    @property
+    def duration(self):
+        return max((start + pattern.duration for _, pattern, start, _ in self.placements), default=0.0)
+
+    def add(self, pattern, motors=ALL_MOTORS, at=None, repeat=1, gain=1.0):
+        """
+        Place a pattern; returns the timeline so calls can be chained.
+
+        Args:
+            pattern: Steps, Ramp, Envelope, Pulse or anything with `duration` and `sample(t)`.
+            motors (int or list): motor index or indexes 0-9 that play it.
+            at (float): start in seconds, None to start where the timeline currently ends.
+            repeat (int): play it this many times back to back.
+            gain (float): amplitude scale.
+        """
+        motors = (motors,) if isinstance(motors, int) else tuple(motors)
+        if any(not 0 <= motor < NUM_MOTORS for motor in motors):
+            raise ValueError(f"Motors are numbered 0 to {NUM_MOTORS - 1}, got {motors}")
+        start = self.duration if at is None else at
+        for index in range(repeat):
+            self.placements.append((motors, pattern, start + index * pattern.duration, gain))
+        return self
+
+    def render(self, rate):
+        """Sample the timeline at `rate` frames per second into an (N, 10) uint8 array."""
+        count = math.ceil(self.duration * rate)
+        levels = np.zeros((count, NUM_MOTORS), dtype=np.float32)
+        t = np.arange(count) / rate
+        for motors, pattern, start, gain in self.placements:
+            first = math.ceil(start * rate)
+            last = min(count, math.ceil((start + pattern.duration) * rate))
+            if first >= last:
+                continue
+            values = pattern.sample(t[first:last] - start) * gain
+            for motor in motors:
+                np.maximum(levels[first:last, motor], values, out=levels[first:last, motor])
+        return np.clip(np.rint(levels), 0, 255).astype(np.uint8)
+
+
+class RenderedSequence:
+    """A rendered timeline with every frame already encoded for the wire."""
+
+    def __init__(self, payloads, rate, framing="legacy"):
+        """
+        Args:
+            payloads (ndarray): (N, 10) uint8 motor values, e.g. from Timeline.render().
+            rate (float): frames per second the payloads were rendered at.
+            framing (str): "legacy", "cobs" or "delta"; delta frames stay raw payloads,
+                because the writer delta-encodes them as they are sent.
+        """
+        self.payloads = payloads
+        self.rate = rate
+        self.framing = framing
+        if framing == "legacy":
+            # The legacy receiver takes any 0xAA as the start of a frame (see HapticMapper)
+            framed = np.empty((len(payloads), NUM_MOTORS + 1), dtype=np.uint8)
+            framed[:, 0] = FRAME_HEADER
+            framed[:, 1:] = np.where(payloads == FRAME_HEADER, 254, payloads)
+            self.frames = [row.tobytes() for row in framed]
+        elif framing == "delta":
+            self.frames = [row.tobytes() for row in payloads]
+        else:
+            encoder = make_encoder(framing)
+            self.frames = [encoder.encode(row.tobytes()) for row in payloads]
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def duration(self):
+        return len(self.frames) / self.rate
+
+
+async def stream(sequence, submit, loops=1, ticker=None):
+    """
+    Submit the sequence's frames at its rate.
+
+    Frames are picked by tick, not by count: if the loop falls behind, the
+    ticks it skips skip their frames too, so the pattern keeps its timing.
+
+    Args:
+        sequence (RenderedSequence): frames to play.
+        submit (callable): takes one frame, e.g. FrameWriter.submit.
+        loops (int): times to play the sequence.
+        ticker (RateLoop): ticker to use, by default one at sequence.rate that skips missed ticks.
+
+    Returns:
+        dict: "submitted" and "skipped" frame counts and the "ticker".
+    """
+    ticker = ticker or RateLoop(sequence.rate, name="sequencer")
+    frames = sequence.frames
+    total = len(frames) * loops
+    index = submitted = 0
+    ticker.start()
+    while index < total:
+        submit(frames[index % len(frames)])
+        submitted += 1
+        index += 1 + await ticker.tick()
+    return {"submitted": submitted, "skipped": index - submitted, "ticker": ticker}
+
+
+def parse_motors(text):
+    """Motor numbers 1-10 such as "1,3,5-7" -> 0-based indexes."""
+    motors = []
+    for part in text.split(","):
+        first, _, last = part.partition("-")
+        motors.extend(range(int(first) - 1, int(last or first)))
+    return motors
+
+
+def demo_timeline(name, motors=ALL_MOTORS):
+    """Built-in patterns for the command line."""
+    timeline = Timeline()
+    if name == "rtp":
+        timeline.add(rtp_steps(), motors)
+    elif name == "pulse":
+        timeline.add(Pulse(period=0.2, duty=0.5, amplitude=255, count=10), motors)
+    elif name == "breathe":
+        timeline.add(Envelope(attack=1.0, hold=0.2, release=1.0), motors, repeat=3)
+    elif name == "wave":
+        # A bump that travels across the motors, each one starting 80 ms after the previous
+        for order, motor in enumerate(motors):
+            timeline.add(Envelope(attack=0.1, hold=0.05, release=0.15), motor, at=order * 0.08)
+    else:
+        raise ValueError(f"Unknown pattern: {name}")
+    return timeline
+
+
+async def drive(feed, framing="legacy", transport_spec="bleak", use_cache=True):
+    """
+    Connect to ESP32_Receiver and run `await feed(writer)` with a FrameWriter for it, printing the writer stats.
+
+    Args:
+        feed (coroutine function): submits frames to the writer it is given; the writer is
+            flushed once it returns.
+        framing (str): "legacy", "cobs" or "delta"; with delta the writer encodes the raw payloads.
+        transport_spec (str): "bleak" or "sim[:...]" (see transport.py).
+        use_cache (bool): try the cached receiver address before scanning.
+    """
+    # Only playing needs the BLE stack; patterns render without bleak installed
+    from ble_writer import FrameWriter
+    from transport import make_transport
+
+    transport = make_transport(transport_spec, output_framing=framing)
+    supervisor = transport.supervisor([DEVICE_NAME_2], use_cache=use_cache)
+    writer = None
+    try:
+        if not await supervisor.start():
+            print("Could not find ESP32_Receiver!")
+            return
+        receiver = supervisor[DEVICE_NAME_2]
+        encoder = make_encoder("delta") if framing == "delta" else None
+        writer = FrameWriter(receiver.client, CHARACTERISTIC_UUID_2,
+                             encode=encoder.encode if encoder is not None else None).start()
+        if encoder is not None:
+            receiver.on_up(lambda client: encoder.force_keyframe())
+        receiver.attach_writer(writer)
+
+        await feed(writer)
+        await writer.flush()
+        stats = writer.stats()
+        print(f"Writer: sent {stats['sent']}, coalesced {stats['dropped']}, skipped {stats['skipped']}, "
+              f"errors {stats['errors']}")
+    finally:
+        if writer is not None:
+            await writer.stop()
+        await supervisor.close()
+        transport.close()
+
+
+async def play(sequence, transport_spec="bleak", loops=1, use_cache=True):
+    """
+    Connect to ESP32_Receiver and stream a RenderedSequence to it, printing the stats afterwards.
+
+    Args:
+        sequence (RenderedSequence): frames to play.
+        transport_spec (str): "bleak" or "sim[:...]" (see transport.py).
+        loops (int): times to play the sequence.
+        use_cache (bool): try the cached receiver address before scanning.
+    """
+    async def feed(writer):
+        result = await stream(sequence, writer.submit, loops=loops)
+        print(f"Submitted {result['submitted']} frames, skipped {result['skipped']}")
+        result["ticker"].report()
+
+    await drive(feed, sequence.framing, transport_spec, use_cache)
+
+
+async def run(args):
+    motors = parse_motors(args.motors) if args.motors else ALL_MOTORS
+    started = time.perf_counter()
+    timeline = demo_timeline(args.pattern, motors)
+    sequence = RenderedSequence(timeline.render(args.rate), args.rate, framing=args.framing)
+    print(f"Rendered {args.pattern}: {len(sequence)} frames, {sequence.duration:.2f} s at {args.rate:g} Hz, "
+          f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+    await play(sequence, args.transport, loops=args.loop, use_cache=not args.rescan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play a haptic waveform pattern on the vest')
+    parser.add_argument('--pattern', choices=['rtp', 'pulse', 'breathe', 'wave'], default='rtp',
+                        help='rtp is the ramp from the firmware\'s rtp[] table')
+    parser.add_argument('--motors', help='Motors 1-10 that play it, e.g. "1,2" or "1-5" (default all)')
+    parser.add_argument('--rate', type=float, default=100.0, help='Frames per second')
+    parser.add_argument('--loop', type=int, default=1, help='Play the pattern this many times')
+    parser.add_argument('--framing', choices=['legacy', 'cobs', 'delta'], default='legacy',
+                        help='Frame format the receiver expects')
+    parser.add_argument('--rescan', action='store_true', help='Ignore the cached BLE address')
+    parser.add_argument('--transport', default='bleak', help='"bleak" or "sim[:...]" (see transport.py)')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()